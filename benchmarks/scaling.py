@@ -0,0 +1,263 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+"""
+Measure how build times scale with the size and shape of a project by building synthetic projects.
+
+    python benchmarks/scaling.py run --modules 10 100 --output results.json
+    python benchmarks/scaling.py compare baseline.json results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from tempfile import TemporaryDirectory
+
+SHAPES = ('chain', 'tree', 'star', 'random')
+SCENARIOS = ('full', 'no-op', 'incremental')
+PACKAGE_NAME = 'bench_app'
+
+
+def get_imports(index: int, shape: str, rng: random.Random, fan_out: int = 3) -> list[int]:
+    """Return the indices of the modules imported by a module, which always come before it."""
+    if index == 0:
+        return []
+    elif shape == 'chain':
+        return [index - 1]
+    elif shape == 'tree':
+        return [(index - 1) // 2]
+    elif shape == 'star':
+        return [0]
+
+    return sorted(rng.sample(range(index), min(index, fan_out)))
+
+
+def get_module_name(index: int) -> str:
+    return f'module_{index:04d}'
+
+
+def generate_module(index: int, imports: list[int], size: int) -> str:
+    lines = [f'from {PACKAGE_NAME}.{get_module_name(i)} import function_{i:04d}_0' for i in imports]
+    if lines:
+        lines.extend(('', ''))
+
+    lines.extend(
+        (
+            f'class Record{index:04d}:',
+            '    def __init__(self, value: int) -> None:',
+            '        self.value = value',
+            '',
+            '    def scale(self, factor: int) -> int:',
+            '        return self.value * factor',
+        )
+    )
+    for i in range(size):
+        calls = ' + '.join(f'function_{imported:04d}_0(n // 2)' for imported in imports) or '0'
+        lines.extend(
+            (
+                '',
+                '',
+                f'def function_{index:04d}_{i}(n: int) -> int:',
+                '    if n <= 0:',
+                '        return 0',
+                '',
+                '    total = 0',
+                '    for i in range(n):',
+                f'        total += Record{index:04d}(i).scale({i + 1})',
+                '',
+                f'    return total + {calls}',
+            )
+        )
+
+    return '\n'.join(lines) + '\n'
+
+
+def generate_project(directory: str, modules: int, size: int, shape: str, options: dict, seed: int = 0) -> None:
+    rng = random.Random(seed)  # noqa: S311
+    package_dir = os.path.join(directory, PACKAGE_NAME)
+    os.makedirs(package_dir)
+
+    with open(os.path.join(package_dir, '__init__.py'), 'w', encoding='utf-8') as f:
+        f.write("__version__ = '1.0.0'\n")
+
+    for index in range(modules):
+        with open(os.path.join(package_dir, f'{get_module_name(index)}.py'), 'w', encoding='utf-8') as f:
+            f.write(generate_module(index, get_imports(index, shape, rng), size))
+
+    hook_options = ', '.join(f'{name} = {json.dumps(value)}' for name, value in options.items())
+    with open(os.path.join(directory, 'pyproject.toml'), 'w', encoding='utf-8') as f:
+        f.write(f"""\
+[build-system]
+requires = ["hatchling", "hatch-mypyc"]
+build-backend = "hatchling.build"
+
+[project]
+name = "bench-app"
+dynamic = ["version"]
+
+[tool.hatch.version]
+path = "{PACKAGE_NAME}/__init__.py"
+
+[tool.hatch.build.targets.wheel.hooks.mypyc]
+incremental = true
+options = {{ {hook_options} }}
+""")
+
+
+def modify_project(directory: str, modules: int) -> None:
+    # Nothing imports the last module so this is the smallest possible change
+    with open(os.path.join(directory, PACKAGE_NAME, f'{get_module_name(modules - 1)}.py'), 'a', encoding='utf-8') as f:
+        f.write('\n\ndef modified(n: int) -> int:\n    return n + 1\n')
+
+
+def build(directory: str, env: dict[str, str]) -> float:
+    # Build in the current environment so that the checked out version of the build hook is measured
+    command = [sys.executable, '-m', 'hatchling', 'build', '--target', 'wheel']
+    start = time.perf_counter()
+    process = subprocess.run(command, cwd=directory, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    elapsed = time.perf_counter() - start
+    if process.returncode:
+        raise SystemExit(process.stdout.decode('utf-8'))
+
+    return elapsed
+
+
+def run_case(modules: int, size: int, shape: str, options: dict, repeat: int) -> dict[str, dict]:
+    times: dict[str, list[float]] = {scenario: [] for scenario in SCENARIOS}
+    phases: dict[str, dict] = {}
+    for _ in range(repeat):
+        with TemporaryDirectory() as temp_dir:
+            project_dir = os.path.join(temp_dir, 'project')
+            report_file = os.path.join(temp_dir, 'timings.json')
+            generate_project(project_dir, modules, size, shape, options)
+            env = {
+                **os.environ,
+                'HATCH_MYPYC_CACHE_DIR': os.path.join(temp_dir, 'cache'),
+                'HATCH_MYPYC_TIMING_REPORT': report_file,
+            }
+            for scenario in SCENARIOS:
+                if scenario == 'incremental':
+                    modify_project(project_dir, modules)
+
+                times[scenario].append(build(project_dir, env))
+                with open(report_file, encoding='utf-8') as f:
+                    phases[scenario] = {phase: timing['wall_time'] for phase, timing in json.load(f)['phases'].items()}
+
+    return {
+        scenario: {
+            'times': scenario_times,
+            'min': min(scenario_times),
+            'mean': sum(scenario_times) / len(scenario_times),
+            'phases': phases[scenario],
+        }
+        for scenario, scenario_times in times.items()
+    }
+
+
+def get_metadata() -> dict:
+    from mypy.version import __version__ as mypy_version
+
+    from hatch_mypyc.__about__ import __version__
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'hatch-mypyc': __version__,
+        'mypy': mypy_version,
+        'python': platform.python_version(),
+        'implementation': sys.implementation.name,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def get_case_id(result: dict) -> str:
+    return (
+        f'modules={result["modules"]},size={result["size"]},shape={result["shape"]},'
+        f'separate={str(result["separate"]).lower()},opt_level={result["opt_level"]},scenario={result["scenario"]}'
+    )
+
+
+def run(args: argparse.Namespace) -> None:
+    results = []
+    separate_modes = {'both': (False, True), 'on': (True,), 'off': (False,)}[args.separate]
+    for modules, shape, separate, opt_level in itertools.product(
+        args.modules, args.shapes, separate_modes, args.opt_levels
+    ):
+        options = {'opt_level': opt_level, 'separate': separate}
+        timings = run_case(modules, args.size, shape, options, args.repeat)
+        for scenario, timing in timings.items():
+            result = {
+                'modules': modules,
+                'size': args.size,
+                'shape': shape,
+                'separate': separate,
+                'opt_level': opt_level,
+                'scenario': scenario,
+                **timing,
+            }
+            results.append(result)
+            print(f'{get_case_id(result)}: {timing["min"]:.2f}s', flush=True)  # noqa: T201
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'metadata': get_metadata(), 'results': results}, f, indent=2)
+        f.write('\n')
+
+
+def compare(args: argparse.Namespace) -> None:
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = {get_case_id(result): result for result in json.load(f)['results']}
+    with open(args.current, encoding='utf-8') as f:
+        current = {get_case_id(result): result for result in json.load(f)['results']}
+
+    regressions = 0
+    for case_id, result in current.items():
+        if case_id not in baseline:
+            continue
+
+        # The minimum is the least affected by noise
+        change = result['min'] / max(baseline[case_id]['min'], 1e-9) - 1
+        regressed = change > args.threshold
+        regressions += regressed
+        marker = ' REGRESSION' if regressed else ''
+        print(  # noqa: T201
+            f'{case_id}: {baseline[case_id]["min"]:.2f}s -> {result["min"]:.2f}s ({change:+.1%}){marker}'
+        )
+
+    if regressions:
+        raise SystemExit(f'{regressions} case(s) regressed by more than {args.threshold:.0%}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='build synthetic projects and record the timings')
+    run_parser.add_argument('--modules', type=int, nargs='+', default=[10, 100, 1000])
+    run_parser.add_argument('--size', type=int, default=5, help='the number of functions per module')
+    run_parser.add_argument('--shapes', nargs='+', choices=SHAPES, default=['tree'])
+    run_parser.add_argument('--separate', choices=('both', 'on', 'off'), default='both')
+    run_parser.add_argument('--opt-levels', nargs='+', choices=('0', '1', '2', '3'), default=['0', '3'])
+    run_parser.add_argument('--repeat', type=int, default=1)
+    run_parser.add_argument('--output', default='benchmark-results.json')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser('compare', help='compare the results of two runs')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='the tolerated relative slowdown')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+#
+# This is executed as a script by the build hook to time benchmarks in a fresh interpreter, so it must only import
+# from the standard library.
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+
+def prefer_sources(directory: str) -> None:
+    """Ignore every compiled extension inside the directory so that modules are imported from their sources."""
+    from importlib.machinery import SOURCE_SUFFIXES, FileFinder, SourceFileLoader
+
+    source_path_hook = FileFinder.path_hook((SourceFileLoader, SOURCE_SUFFIXES))
+    directory = os.path.normcase(os.path.realpath(directory))
+
+    def path_hook(path):
+        normalized_path = os.path.normcase(os.path.realpath(path or os.getcwd()))
+        if normalized_path == directory or normalized_path.startswith(f'{directory}{os.sep}'):
+            return source_path_hook(path)
+
+        raise ImportError
+
+    sys.path_hooks.insert(0, path_hook)
+    sys.path_importer_cache.clear()
+
+
+def load_callable(target: str):
+    from importlib import import_module
+
+    module_name, _, attribute_path = target.partition(':')
+    obj = import_module(module_name)
+    for attribute in attribute_path.split('.'):
+        obj = getattr(obj, attribute)
+
+    return module_name, obj
+
+
+def is_compiled(module_name: str) -> bool:
+    from importlib.machinery import EXTENSION_SUFFIXES
+
+    return str(getattr(sys.modules[module_name], '__file__', '')).endswith(tuple(EXTENSION_SUFFIXES))
+
+
+def run_benchmark(target: str, repeat: int) -> dict:
+    from timeit import Timer
+
+    module_name, function = load_callable(target)
+    timer = Timer(function)
+    # Warm up and find the number of calls that take at least 0.2 seconds
+    number, _ = timer.autorange()
+
+    return {
+        'module': module_name,
+        'compiled': is_compiled(module_name),
+        'times': [elapsed / number for elapsed in timer.repeat(repeat, number)],
+    }
+
+
+def measure_startup(module_name: str, preload: list[str], libraries: list[str]) -> dict:
+    import time
+
+    start = time.perf_counter()
+    for library in preload:
+        __import__(library)
+
+    __import__(module_name)
+    elapsed = time.perf_counter() - start
+
+    return {'time': elapsed, 'libraries': [library for library in libraries if library in sys.modules]}
+
+
+def main() -> None:
+    # Running as a script puts the directory of this package first on the search path
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        sys.path.pop(0)
+
+    config_file = sys.argv[1]
+    with open(config_file, encoding='utf-8') as f:
+        config = json.load(f)
+
+    sys.dont_write_bytecode = True
+    sys.path.insert(0, config['path'])
+    if not config['compiled']:
+        prefer_sources(config['path'])
+
+    # The import time of every module is displayed when running with `-X importtime`, which only applies to
+    # the built-in import function
+    for module_name in config.get('imports', []):
+        __import__(module_name)
+
+    if 'startup' in config:
+        results = measure_startup(**config['startup'])
+    else:
+        results = {target: run_benchmark(target, config['repeat']) for target in config['benchmarks']}
+
+    with open(config['output'], 'w', encoding='utf-8') as f:
+        json.dump(results, f)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+from tempfile import mkdtemp, mkstemp
+
+from hatch_mypyc.lock import DEFAULT_LOCK_TIMEOUT, FileLock
+
+DEFAULT_MAX_SIZE = 1024**3
+
+
+class ArtifactCache:
+    """
+    A content-addressed store of compiled artifacts. Every entry is a directory named after its key that
+    contains the artifacts, with paths relative to the project root, and a manifest. The modification time
+    of the manifest records the last access, which is used for least recently used eviction.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+        self.entries_dir = os.path.join(directory, 'entries')
+        self.stats_file = os.path.join(directory, 'stats.json')
+        self.stats_lock_file = os.path.join(directory, 'stats.lock')
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.entries_dir, key)
+
+    def contains(self, key: str) -> bool:
+        return os.path.isfile(os.path.join(self.entry_dir(key), 'manifest.json'))
+
+    def restore(self, key: str, root: str) -> list[str] | None:
+        entry_dir = self.entry_dir(key)
+        manifest_file = os.path.join(entry_dir, 'manifest.json')
+
+        try:
+            with open(manifest_file, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            self.record(misses=1)
+            return None
+
+        artifacts_dir = os.path.join(entry_dir, 'artifacts')
+        relative_paths = manifest['files']
+        try:
+            for relative_path in relative_paths:
+                destination = os.path.join(root, relative_path)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copy2(os.path.join(artifacts_dir, relative_path), destination)
+        # The entry may have been evicted by a concurrent build
+        except OSError:  # no cov
+            self.record(misses=1)
+            return None
+
+        os.utime(manifest_file)
+        self.record(hits=1)
+        return relative_paths
+
+    def store(self, key: str, root: str, relative_paths: list[str]) -> None:
+        entry_dir = self.entry_dir(key)
+        if os.path.isdir(entry_dir):
+            return
+
+        os.makedirs(self.entries_dir, exist_ok=True)
+        temp_dir = mkdtemp(dir=self.entries_dir)
+        try:
+            artifacts_dir = os.path.join(temp_dir, 'artifacts')
+            size = 0
+            for relative_path in relative_paths:
+                destination = os.path.join(artifacts_dir, relative_path)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copy2(os.path.join(root, relative_path), destination)
+                size += os.path.getsize(destination)
+
+            with open(os.path.join(temp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+                json.dump({'files': relative_paths, 'size': size}, f)
+        except BaseException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+        try:
+            os.replace(temp_dir, entry_dir)
+        except OSError:  # no cov
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            # Another build stored the same entry concurrently, in which case either copy is fine
+            if not os.path.isdir(entry_dir):
+                raise
+
+            return
+
+        self.record(stores=1)
+        self.evict()
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        entries: list[tuple[float, int, str]] = []
+        if not os.path.isdir(self.entries_dir):
+            return entries
+
+        for entry in os.scandir(self.entries_dir):
+            manifest_file = os.path.join(entry.path, 'manifest.json')
+            try:
+                last_access = os.path.getmtime(manifest_file)
+                with open(manifest_file, encoding='utf-8') as f:
+                    size = json.load(f)['size']
+            except (OSError, ValueError, KeyError):
+                continue
+
+            entries.append((last_access, size, entry.path))
+
+        return entries
+
+    def evict(self) -> None:
+        entries = sorted(self.entries())
+        total_size = sum(size for _, size, _ in entries)
+
+        evictions = 0
+        for _, size, entry_dir in entries:
+            if total_size <= self.max_size:
+                break
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            evictions += 1
+
+        if evictions:
+            self.record(evictions=evictions)
+
+    def load_stats(self) -> dict[str, int]:
+        try:
+            with open(self.stats_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, **counts: int) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        # Entries are stored by concurrent builds and threads, none of which may lose the counts of another
+        with FileLock(self.stats_lock_file, DEFAULT_LOCK_TIMEOUT):
+            stats = self.load_stats()
+            for name, count in counts.items():
+                stats[name] = stats.get(name, 0) + count
+
+            fd, temp_file = mkstemp(dir=self.directory, prefix='stats.', suffix='.tmp')
+            try:
+                with open(fd, 'w', encoding='utf-8') as f:
+                    json.dump(stats, f)
+
+                os.replace(temp_file, self.stats_file)
+            except BaseException:
+                if os.path.isfile(temp_file):
+                    os.remove(temp_file)
+                raise
+
+    def stats(self) -> dict[str, int]:
+        stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        stats.update(self.load_stats())
+
+        entries = self.entries()
+        stats['entries'] = len(entries)
+        stats['bytes'] = sum(size for _, size, _ in entries)
+        stats['max_bytes'] = self.max_size
+
+        return stats
+
+
+def main() -> None:
+    if len(sys.argv) != 2:
+        print(f'Usage: {sys.executable} -m hatch_mypyc.cache <DIRECTORY>', file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+
+    print(json.dumps(ArtifactCache(sys.argv[1]).stats(), indent=2))  # noqa: T201
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import sysconfig
+
+COMPILER_CACHES = ('ccache', 'sccache')
+
+
+def find_compiler_cache() -> str | None:
+    for name in COMPILER_CACHES:
+        executable = shutil.which(name)
+        if executable is not None:
+            return executable
+
+    return None
+
+
+def parse_ccache_stats(output: str) -> dict[str, int] | None:
+    stats = {}
+    for line in output.splitlines():
+        name, _, value = line.partition('\t')
+        if value.strip().isdigit():
+            stats[name] = int(value)
+
+    if 'cache_miss' not in stats:
+        return None
+
+    return {
+        'hits': stats.get('direct_cache_hit', 0) + stats.get('preprocessed_cache_hit', 0),
+        'misses': stats['cache_miss'],
+    }
+
+
+def parse_sccache_stats(output: str) -> dict[str, int] | None:
+    try:
+        stats = json.loads(output)['stats']
+        return {
+            'hits': sum(stats['cache_hits']['counts'].values()),
+            'misses': sum(stats['cache_misses']['counts'].values()),
+        }
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+class CompilerCache:
+    def __init__(self, executable: str, directory: str = ''):
+        self.executable = executable
+        self.directory = directory
+
+    @property
+    def name(self) -> str:
+        name = os.path.splitext(os.path.basename(self.executable))[0]
+        return 'sccache' if name == 'sccache' else 'ccache'
+
+    def get_environment(self) -> dict[str, str]:
+        env = {}
+        if self.directory:
+            env['SCCACHE_DIR' if self.name == 'sccache' else 'CCACHE_DIR'] = self.directory
+
+        compiler = os.environ.get('CC') or sysconfig.get_config_var('CC')
+        # MSVC is not configured using environment variables
+        if not compiler:  # no cov
+            return env
+
+        if os.path.splitext(os.path.basename(compiler.split()[0]))[0] in COMPILER_CACHES:
+            return env
+
+        executable = f'"{self.executable}"' if ' ' in self.executable else self.executable
+        # Linking goes through the cache as well, which is passed along to the compiler unchanged
+        env['CC'] = f'{executable} {compiler}'
+
+        return env
+
+    def get_stats(self) -> dict[str, int] | None:
+        if self.name == 'sccache':
+            command = [self.executable, '--show-stats', '--stats-format=json']
+            parse_stats = parse_sccache_stats
+        else:
+            command = [self.executable, '--print-stats']
+            parse_stats = parse_ccache_stats
+
+        try:
+            process = subprocess.run(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                env={**os.environ, **self.get_environment()},
+            )
+        except OSError:  # no cov
+            return None
+
+        if process.returncode:  # no cov
+            return None
+
+        return parse_stats(process.stdout.decode('utf-8'))
@@ -0,0 +1,117 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+#
+# This is copied into wheels that contain extensions built for multiple CPU feature levels and is imported at startup
+# by a `.pth` file, so it must only import from the standard library and do as little work as possible until one of
+# the shared libraries built by Mypyc is imported.
+from __future__ import annotations
+
+import os
+import sys
+
+# The names of the CPU features reported by Linux that are required by each level, see:
+# https://gitlab.com/x86-psABIs/x86-64-ABI
+X86_64_V2 = ('cx16', 'lahf_lm', 'popcnt', 'sse4_1', 'sse4_2', 'ssse3')
+X86_64_V3 = (*X86_64_V2, 'abm', 'avx', 'avx2', 'bmi1', 'bmi2', 'f16c', 'fma', 'movbe', 'xsave')
+X86_64_V4 = (*X86_64_V3, 'avx512f', 'avx512bw', 'avx512cd', 'avx512dq', 'avx512vl')
+FEATURE_LEVELS = {'x86-64-v2': X86_64_V2, 'x86-64-v3': X86_64_V3, 'x86-64-v4': X86_64_V4}
+
+# The names used by macOS that differ from those used by Linux
+DARWIN_FEATURES = {'avx1.0': 'avx', 'lahf': 'lahf_lm', 'lzcnt': 'abm', 'sse4.1': 'sse4_1', 'sse4.2': 'sse4_2'}
+
+# Set when generating the loader
+VARIANTS: list[str] = []
+MODULES: list[str] = []
+
+
+def get_variant_tag(variant: str) -> str:
+    return variant.replace('-', '_')
+
+
+def get_cpu_features() -> set[str]:
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/cpuinfo', encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith('flags'):
+                        return set(line.partition(':')[2].split())
+        except OSError:
+            pass
+    elif sys.platform == 'darwin':
+        import subprocess
+
+        try:
+            process = subprocess.run(
+                [
+                    '/usr/sbin/sysctl',
+                    '-n',
+                    'machdep.cpu.features',
+                    'machdep.cpu.leaf7_features',
+                    'machdep.cpu.extfeatures',
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return set()
+
+        features = process.stdout.decode('utf-8', errors='replace').lower().split()
+        return {DARWIN_FEATURES.get(feature, feature) for feature in features}
+
+    return set()
+
+
+def select_variant(variants: list[str], features: set[str]) -> str:
+    """Return the variant with the highest level that the CPU supports, or an empty string for the baseline."""
+    selected = os.environ.get('HATCH_MYPYC_VARIANT')
+    if selected is not None:
+        return selected if selected in variants else ''
+
+    levels = list(FEATURE_LEVELS)
+    for variant in sorted(variants, key=levels.index, reverse=True):
+        if features.issuperset(FEATURE_LEVELS[variant]):
+            return variant
+
+    return ''
+
+
+class VariantFinder:
+    def __init__(self, modules: list[str], variants: list[str]) -> None:
+        self.modules = frozenset(modules)
+        self.variants = variants
+        self.__variant: str | None = None
+
+    @property
+    def variant(self) -> str:
+        if self.__variant is None:
+            self.__variant = select_variant(self.variants, get_cpu_features())
+
+        return self.__variant
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname not in self.modules or not self.variant:
+            return None
+
+        from importlib.machinery import EXTENSION_SUFFIXES, ExtensionFileLoader, PathFinder
+        from importlib.util import spec_from_file_location
+
+        spec = PathFinder.find_spec(fullname, path)
+        if spec is None or not spec.origin:
+            return None
+
+        for suffix in EXTENSION_SUFFIXES:
+            if spec.origin.endswith(suffix):
+                variant_path = f'{spec.origin[: -len(suffix)]}.{get_variant_tag(self.variant)}{suffix}'
+                if os.path.isfile(variant_path):
+                    return spec_from_file_location(
+                        fullname, variant_path, loader=ExtensionFileLoader(fullname, variant_path)
+                    )
+
+                break
+
+        return None
+
+
+def install() -> None:
+    sys.meta_path.insert(0, VariantFinder(MODULES, VARIANTS))
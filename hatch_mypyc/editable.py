@@ -0,0 +1,305 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+#
+# This is copied into editable wheels and is imported at startup by a `.pth` file, so it must only import from the
+# standard library and do as little work as possible until one of the modules of the project is imported. It is also
+# executed as a script in order to recompile the modules whose sources changed since they were built.
+from __future__ import annotations
+
+import os
+import sys
+
+# Set when generating the hook
+MANIFEST = ''
+PACKAGES: list[str] = []
+
+# Recompilations that hold the lock for longer than this were interrupted
+STALE_LOCK_AGE = 3600
+# Running processes keep importing from the generation that was current when they started, so generations are
+# only removed once there are enough newer ones and they were replaced long enough ago
+KEPT_GENERATIONS = 3
+STALE_GENERATION_AGE = 86400
+
+
+def get_file_state(path: str) -> list[int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def hash_file(path: str) -> str:
+    import hashlib
+
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def load_manifest(manifest_file: str) -> dict | None:
+    import json
+
+    try:
+        with open(manifest_file, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    return manifest if isinstance(manifest, dict) else None
+
+
+def save_manifest(manifest_file: str, manifest: dict) -> None:
+    import json
+
+    # Processes that are starting may read the manifest at any time
+    temp_file = f'{manifest_file}.{os.getpid()}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    os.replace(temp_file, manifest_file)
+
+
+def publish(manifest_file: str, manifest: dict, build_root: str) -> None:
+    """
+    Copy the artifacts to a new directory and make it the one that is imported from. Extensions cannot be
+    overwritten while processes have them loaded, and processes may import more modules at any time, so
+    previous directories are kept for running processes.
+    """
+    import shutil
+    import time
+
+    generations_dir = os.path.join(os.path.dirname(manifest_file), 'generations')
+    now = time.time_ns()
+    generation = os.path.join(generations_dir, f'{now:x}')
+    for artifact in manifest['artifacts']:
+        destination = os.path.join(generation, artifact)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copy2(os.path.join(build_root, artifact), destination)
+
+    manifest['generation'] = generation
+    save_manifest(manifest_file, manifest)
+
+    # Directory names are the times at which the generations were published
+    generations = []
+    for entry in os.listdir(generations_dir):
+        try:
+            generations.append((int(entry, 16), entry))
+        except ValueError:
+            continue
+
+    generations.sort()
+    for (_, entry), (replaced, _) in zip(generations[:-KEPT_GENERATIONS], generations[1:]):
+        if now - replaced > STALE_GENERATION_AGE * 1_000_000_000:
+            shutil.rmtree(os.path.join(generations_dir, entry), ignore_errors=True)
+
+
+class PackageExtensionLoader:
+    def __init__(self, fullname: str, path: str) -> None:
+        from importlib.machinery import ExtensionFileLoader
+
+        self.loader = ExtensionFileLoader(fullname, path)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        self.loader.exec_module(module)
+        # Compiled packages set their path to the directory of their extension
+        module.__path__ = list(module.__spec__.submodule_search_locations)
+
+
+class EditableFinder:
+    """
+    Serves the compiled extension of a module as long as neither its source nor the sources of the modules
+    that it imports, whose compiled code it may call directly, changed since it was built. Otherwise, the
+    source is imported as usual and a recompilation may be started in the background.
+    """
+
+    def __init__(self, manifest_file: str, packages: list[str]) -> None:
+        self.manifest_file = manifest_file
+        self.packages = frozenset(packages)
+        self.unchanged_sources: dict[str, bool] = {}
+        self.recompiling = False
+        self.__manifest: dict | None = None
+
+    @property
+    def manifest(self) -> dict:
+        if self.__manifest is None:
+            self.__manifest = load_manifest(self.manifest_file) or {}
+
+        return self.__manifest
+
+    def source_is_unchanged(self, relative_path: str) -> bool:
+        if relative_path not in self.unchanged_sources:
+            path = os.path.join(self.manifest['root'], relative_path)
+            size, mtime, source_hash = self.manifest['sources'][relative_path]
+            state = get_file_state(path)
+            if state is None:
+                unchanged = False
+            elif state == [size, mtime]:
+                unchanged = True
+            # Sources that were only touched are still up to date
+            elif state[0] == size:
+                try:
+                    unchanged = hash_file(path) == source_hash
+                except OSError:
+                    unchanged = False
+            else:
+                unchanged = False
+
+            self.unchanged_sources[relative_path] = unchanged
+
+        return self.unchanged_sources[relative_path]
+
+    def module_is_fresh(self, fullname: str) -> bool:
+        modules = self.manifest['modules']
+        return all(
+            self.source_is_unchanged(modules[name]['source']) for name in (fullname, *modules[fullname]['dependencies'])
+        )
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname.partition('.')[0] not in self.packages or not self.manifest:
+            return None
+
+        from importlib.machinery import ExtensionFileLoader
+        from importlib.util import spec_from_file_location
+
+        manifest = self.manifest
+        if fullname in manifest['libraries']:
+            location = os.path.join(manifest['generation'], manifest['libraries'][fullname])
+            return spec_from_file_location(fullname, location, loader=ExtensionFileLoader(fullname, location))
+
+        module = manifest['modules'].get(fullname)
+        if module is not None:
+            if self.module_is_fresh(fullname):
+                location = os.path.join(manifest['generation'], module['artifact'])
+                if not module['package']:
+                    return spec_from_file_location(fullname, location, loader=ExtensionFileLoader(fullname, location))
+
+                return spec_from_file_location(
+                    fullname,
+                    location,
+                    loader=PackageExtensionLoader(fullname, location),
+                    # Submodules are found next to the sources
+                    submodule_search_locations=[os.path.dirname(os.path.join(manifest['root'], module['source']))],
+                )
+            elif manifest['recompile'] is not None:
+                self.start_recompilation()
+
+        # The path of compiled packages may not be set yet while they are being imported
+        parent_module = manifest['modules'].get(fullname.rpartition('.')[0])
+        if parent_module is not None and parent_module['package']:
+            from importlib.machinery import PathFinder
+
+            return PathFinder.find_spec(
+                fullname, [os.path.dirname(os.path.join(manifest['root'], parent_module['source']))]
+            )
+
+        return None
+
+    def start_recompilation(self) -> None:
+        if self.recompiling:
+            return
+
+        self.recompiling = True
+
+        import subprocess
+
+        # Detach so that recompilation continues after this process exits
+        creationflags = 0
+        start_new_session = False
+        if sys.platform == 'win32':
+            creationflags = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+        else:
+            start_new_session = True
+
+        try:
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), self.manifest_file],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=creationflags,
+                start_new_session=start_new_session,
+            )
+        except OSError:
+            pass
+
+
+def acquire_recompilation_lock(lock_file: str) -> bool:
+    import time
+
+    try:
+        os.close(os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        try:
+            if time.time() - os.stat(lock_file).st_mtime < STALE_LOCK_AGE:
+                return False
+
+            os.remove(lock_file)
+            os.close(os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except OSError:
+            return False
+
+    return True
+
+
+def recompile(manifest_file: str) -> bool:
+    """Recompile the modules whose sources changed and return whether the new artifacts were published."""
+    manifest = load_manifest(manifest_file)
+    if not manifest or manifest['recompile'] is None:
+        return False
+
+    editable_dir = os.path.dirname(manifest_file)
+    lock_file = os.path.join(editable_dir, 'recompile.lock')
+    if not acquire_recompilation_lock(lock_file):
+        return False
+
+    import shutil
+    import subprocess
+
+    try:
+        # Only copy the sources that changed so that the others are not compiled again
+        sources = {}
+        for relative_path, (size, mtime, source_hash) in manifest['sources'].items():
+            path = os.path.join(manifest['root'], relative_path)
+            state = get_file_state(path)
+            if state is None:
+                return False
+            elif state != [size, mtime]:
+                shutil.copy2(path, os.path.join(manifest['staging'], relative_path))
+                source_hash = hash_file(path)
+
+            sources[relative_path] = [*state, source_hash]
+
+        with open(os.path.join(editable_dir, 'recompile.log'), 'w', encoding='utf-8') as log:
+            process = subprocess.run(
+                [sys.executable, *manifest['recompile']['command']],
+                cwd=manifest['staging'],
+                env={**os.environ, **manifest['recompile']['environment']},
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+
+        if process.returncode:
+            return False
+
+        manifest['sources'] = sources
+        publish(manifest_file, manifest, manifest['staging'])
+        return True
+    finally:
+        os.remove(lock_file)
+
+
+def install() -> None:
+    sys.meta_path.insert(0, EditableFinder(MANIFEST, PACKAGES))
+
+
+if __name__ == '__main__':
+    sys.exit(0 if recompile(sys.argv[1] if len(sys.argv) > 1 else MANIFEST) else 1)
@@ -0,0 +1,246 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import ast
+import os
+
+
+def get_module_name(relative_path: str, package_source: str = '') -> str:
+    # Paths must use forward slashes
+    if package_source and relative_path.startswith(f'{package_source}/'):
+        relative_path = relative_path[len(package_source) + 1 :]
+
+    parts = os.path.splitext(relative_path)[0].split('/')
+    if parts[-1] == '__init__':
+        parts.pop()
+
+    return '.'.join(parts)
+
+
+def parse_imports(source: bytes, module_name: str, *, is_package: bool) -> set[str]:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return set()
+
+    package_parts = module_name.split('.') if is_package else module_name.split('.')[:-1]
+
+    imports: set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                if node.level - 1 > len(package_parts):
+                    continue
+
+                base_parts = package_parts[: len(package_parts) - node.level + 1]
+                if node.module:
+                    base_parts = [*base_parts, *node.module.split('.')]
+
+                base = '.'.join(base_parts)
+            else:
+                base = node.module or ''
+
+            if base:
+                imports.add(base)
+
+            # Names may refer to submodules
+            imports.update(f'{base}.{alias.name}' if base else alias.name for alias in node.names)
+
+    # Importing a submodule implicitly imports every parent package
+    for name in list(imports):
+        parts = name.split('.')
+        imports.update('.'.join(parts[:i]) for i in range(1, len(parts)))
+
+    return imports
+
+
+def get_dependencies(
+    root: str,
+    relative_paths: list[str],
+    package_source: str = '',
+    previous: dict[str, list[str]] | None = None,
+    unchanged: set[str] | frozenset[str] = frozenset(),
+) -> dict[str, list[str]]:
+    """
+    Return a mapping of every path to the sorted paths of the project modules that it imports. Entries
+    of the `previous` mapping are reused for `unchanged` paths rather than parsing the sources again.
+    """
+    modules = {get_module_name(relative_path, package_source): relative_path for relative_path in relative_paths}
+    known_paths = set(relative_paths)
+    if previous is None:
+        previous = {}
+
+    dependencies = {}
+    for module_name, relative_path in modules.items():
+        if relative_path in unchanged and relative_path in previous:
+            dependencies[relative_path] = [path for path in previous[relative_path] if path in known_paths]
+            continue
+
+        with open(os.path.join(root, relative_path), 'rb') as f:
+            source = f.read()
+
+        is_package = os.path.basename(relative_path).startswith('__init__.')
+        imports = parse_imports(source, module_name, is_package=is_package)
+        dependencies[relative_path] = sorted(
+            {modules[name] for name in imports if name in modules and name != module_name}
+        )
+
+    return dependencies
+
+
+def get_dependents(dependencies: dict[str, list[str]], relative_paths: set[str]) -> set[str]:
+    """Return the given paths along with every path that transitively depends on them."""
+    dependents: dict[str, list[str]] = {}
+    for relative_path, imported_paths in dependencies.items():
+        for imported_path in imported_paths:
+            dependents.setdefault(imported_path, []).append(relative_path)
+
+    affected = set(relative_paths)
+    pending = list(relative_paths)
+    while pending:
+        for dependent in dependents.get(pending.pop(), []):
+            if dependent not in affected:
+                affected.add(dependent)
+                pending.append(dependent)
+
+    return affected
+
+
+def get_transitive_dependencies(dependencies: dict[str, list[str]], relative_paths: set[str]) -> set[str]:
+    """Return the given paths along with every path that they transitively import."""
+    imported = set(relative_paths)
+    pending = list(relative_paths)
+    while pending:
+        for imported_path in dependencies.get(pending.pop(), []):
+            if imported_path not in imported:
+                imported.add(imported_path)
+                pending.append(imported_path)
+
+    return imported
+
+
+def get_strongly_connected_components(dependencies: dict[str, list[str]]) -> list[list[str]]:
+    """Return the sorted strongly connected components of the graph using an iterative Tarjan's algorithm."""
+    index: dict[str, int] = {}
+    lowlink: dict[str, int] = {}
+    stack: list[str] = []
+    on_stack: set[str] = set()
+    components: list[list[str]] = []
+
+    for start in sorted(dependencies):
+        if start in index:
+            continue
+
+        work = [(start, 0)]
+        while work:
+            node, position = work.pop()
+            if position == 0:
+                index[node] = lowlink[node] = len(index)
+                stack.append(node)
+                on_stack.add(node)
+
+            neighbors = [neighbor for neighbor in dependencies[node] if neighbor in dependencies]
+            for i in range(position, len(neighbors)):
+                neighbor = neighbors[i]
+                if neighbor not in index:
+                    work.append((node, i + 1))
+                    work.append((neighbor, 0))
+                    break
+                elif neighbor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[neighbor])
+            else:
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.remove(member)
+                        component.append(member)
+                        if member == node:
+                            break
+
+                    components.append(sorted(component))
+
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+    return sorted(components)
+
+
+def partition(components: list[list[str]], weights: dict[str, int], count: int) -> list[list[str]]:
+    """
+    Distribute the components into at most `count` groups of similar total weight, without ever splitting
+    a component. The largest components are assigned first, each to the lightest group.
+    """
+    groups: list[tuple[int, list[str]]] = [(0, []) for _ in range(min(count, len(components)))]
+
+    def component_weight(component):
+        return sum(weights[member] for member in component)
+
+    for component in sorted(components, key=lambda c: (-component_weight(c), c)):
+        i = min(range(len(groups)), key=lambda i: (groups[i][0], i))
+        weight, members = groups[i]
+        groups[i] = (weight + component_weight(component), members + component)
+
+    return sorted(sorted(members) for _, members in groups if members)
+
+
+def cluster(dependencies: dict[str, list[str]]) -> list[list[str]]:
+    """
+    Group the paths based on the import graph. Modules that are imported by more than one other module, along
+    with everything that they import, form the first group, and every set of remaining modules that import each
+    other, directly or indirectly, forms another group.
+    """
+    components = get_strongly_connected_components(dependencies)
+    component_indices = {member: i for i, component in enumerate(components) for member in component}
+
+    importers: dict[int, set[int]] = {}
+    for relative_path, imported_paths in dependencies.items():
+        for imported_path in imported_paths:
+            if (
+                imported_path in component_indices
+                and component_indices[imported_path] != component_indices[relative_path]
+            ):
+                importers.setdefault(component_indices[imported_path], set()).add(component_indices[relative_path])
+
+    core: set[int] = set()
+    pending = [i for i, importing in importers.items() if len(importing) > 1]
+    while pending:
+        i = pending.pop()
+        if i in core:
+            continue
+
+        core.add(i)
+        for member in components[i]:
+            pending.extend(component_indices[path] for path in dependencies[member] if path in component_indices)
+
+    parents = {i: i for i in range(len(components)) if i not in core}
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+
+        return i
+
+    for relative_path, imported_paths in dependencies.items():
+        i = component_indices[relative_path]
+        if i in core:
+            continue
+
+        for imported_path in imported_paths:
+            j = component_indices.get(imported_path)
+            if j is not None and j not in core:
+                parents[find(i)] = find(j)
+
+    clusters: dict[int, list[str]] = {}
+    for i in parents:
+        clusters.setdefault(find(i), []).extend(components[i])
+
+    groups = [sorted(member for i in core for member in components[i])] if core else []
+    groups.extend(sorted(sorted(members) for members in clusters.values()))
+    return groups
@@ -0,0 +1,129 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+import time
+from typing import IO, Callable
+
+DEFAULT_LOCK_TIMEOUT = 600
+
+
+class LockTimeoutError(Exception):
+    pass
+
+
+class FileLock:
+    """
+    An exclusive lock that is held by at most one process at a time, using the locking primitives of the
+    operating system so that the lock is released when its process exits for any reason. The holder writes
+    its identity to the lock file so that waiting processes may report what they are waiting for.
+    """
+
+    def __init__(self, path: str, timeout: float, interval: float = 0.1):
+        self.path = path
+        self.timeout = timeout
+        self.interval = interval
+        self.file: IO[str] | None = None
+
+    @property
+    def locked(self) -> bool:
+        return self.file is not None
+
+    def acquire(self, on_wait: Callable[[str], None] | None = None) -> None:
+        if self.locked:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, 'a+', encoding='utf-8')
+        start = time.monotonic()
+        try:
+            while not try_lock(f):
+                if time.monotonic() - start >= self.timeout:
+                    raise LockTimeoutError(
+                        f'Timed out after {self.timeout} seconds waiting for {self.describe_holder()} '
+                        f'to release the lock {self.path}'
+                    )
+                elif on_wait is not None:
+                    on_wait(f'Waiting for {self.describe_holder()} to release the lock {self.path}')
+                    on_wait = None
+
+                time.sleep(self.interval)
+        except BaseException:
+            f.close()
+            raise
+
+        f.seek(0)
+        f.truncate()
+        json.dump({'pid': os.getpid(), 'host': socket.gethostname(), 'time': time.time()}, f)
+        f.flush()
+        self.file = f
+
+    def release(self) -> None:
+        f = self.file
+        if f is None:
+            return
+
+        self.file = None
+        try:
+            f.seek(0)
+            f.truncate()
+            f.flush()
+        finally:
+            unlock(f)
+            f.close()
+
+    def describe_holder(self) -> str:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                holder = json.load(f)
+
+            return (
+                f'process {holder["pid"]} on {holder["host"]}, which started '
+                f'{max(time.time() - holder["time"], 0):.0f} seconds ago,'
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return 'another process'
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+if sys.platform == 'win32':
+    import msvcrt
+
+    def try_lock(f) -> bool:
+        # The first byte is locked, which may be beyond the end of the file
+        f.seek(0)
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+
+        return True
+
+    def unlock(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def try_lock(f) -> bool:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+
+        return True
+
+    def unlock(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
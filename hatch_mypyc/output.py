@@ -0,0 +1,135 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import json
+import re
+import sys
+import threading
+from collections import deque
+from contextlib import redirect_stderr, redirect_stdout
+
+from hatch_mypyc.runner import PROGRESS_PREFIX
+
+# The first word of a line, which may be a quoted path that contains spaces
+COMMAND_PATTERN = re.compile(r'^(?:"(?:[^"]*[\\/])?(?P<quoted>[^"\\/]+)"|(?:\S*[\\/])?(?P<name>\S+))\s')
+# Compilers and linkers along with their target prefixes and version suffixes, e.g. `x86_64-linux-gnu-gcc-12`
+COMPILER_PATTERN = re.compile(
+    r'(?:[\w.]+-)*(?:cc|gcc|clang|c\+\+|g\+\+|clang\+\+|icc|icx|cl|link|ld|ccache|sccache)(?:-[\d.]+)?(?:\.exe)?',
+    re.IGNORECASE,
+)
+
+PROGRESS_UNITS = {
+    'type_checking': 'type checking',
+    'code_generation': 'modules compiled to C',
+    'c_compilation': 'C files compiled',
+    'linking': 'extensions linked',
+}
+
+
+def is_compiler_command(line: str) -> bool:
+    match = COMMAND_PATTERN.match(line)
+    return match is not None and COMPILER_PATTERN.fullmatch(match.group('quoted') or match.group('name')) is not None
+
+
+class BuildOutput:
+    """
+    Handles the output of Mypyc and the compiler one line at a time, so that memory usage does not depend on
+    its size. Every line is displayed as it arrives, except for the commands that invoke the compiler which are
+    only displayed in verbose mode, and written to the log file, if any, while only the last lines are kept in
+    order to be displayed when the build fails.
+    """
+
+    def __init__(self, app, log_file: str = '', max_lines: int = 1000, label: str = ''):
+        self.app = app
+        self.log_file = log_file
+        # Distinguishes the progress of concurrent builds
+        self.prefix = f'Mypyc progress ({label}):' if label else 'Mypyc progress:'
+        self.lines: deque[str] = deque(maxlen=max_lines)
+        self.discarded_lines = 0
+        self.buffer = ''
+        self.displayed_progress: dict[str, int] = {}
+        self.lock = threading.RLock()
+        # Output may be redirected here, in which case messages must still be displayed using the original streams
+        self.streams = (sys.stdout, sys.stderr)
+        self.log = None
+
+    def __enter__(self):
+        if self.log_file:
+            self.log = open(self.log_file, 'a', encoding='utf-8')
+
+        return self
+
+    def __exit__(self, *args):
+        if self.buffer:
+            self.write_line(self.buffer)
+            self.buffer = ''
+
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def write(self, text: str) -> int:
+        with self.lock:
+            self.buffer += text
+            *lines, self.buffer = self.buffer.split('\n')
+            for line in lines:
+                self.write_line(line)
+
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def write_line(self, line: str) -> None:
+        line = line.rstrip('\r\n')
+        with self.lock:
+            if line.startswith(PROGRESS_PREFIX):
+                self.update_progress(*json.loads(line[len(PROGRESS_PREFIX) :]))
+                return
+
+            if len(self.lines) == self.lines.maxlen:
+                self.discarded_lines += 1
+
+            self.lines.append(line)
+            if self.log is not None:
+                self.log.write(f'{line}\n')
+
+            # Compiler commands are long and numerous
+            self.display(self.app.display_debug if is_compiler_command(line) else self.app.display_info, line)
+
+    def update_progress(self, phase: str, done: int, total: int | None) -> None:
+        if phase not in PROGRESS_UNITS:
+            return
+
+        with self.lock:
+            # Display at most every 10% of the total
+            step = done * 10 // total if total else done
+            if self.displayed_progress.get(phase) == step:
+                return
+
+            self.displayed_progress[phase] = step
+            if phase == 'type_checking':
+                message = f'{self.prefix} type checking done'
+            elif total:
+                message = f'{self.prefix} {min(done, total)}/{total} {PROGRESS_UNITS[phase]}'
+            else:
+                message = f'{self.prefix} {done} {PROGRESS_UNITS[phase]}'
+
+            self.display(self.app.display_info, message)
+
+    def display(self, display, message: str) -> None:
+        with redirect_stdout(self.streams[0]), redirect_stderr(self.streams[1]):
+            display(message)
+
+    def get_error_output(self) -> str:
+        lines = list(self.lines)
+        if self.buffer:
+            lines.append(self.buffer)
+
+        if self.discarded_lines:
+            location = f', see {self.log_file} for all of it' if self.log_file else ''
+            lines.insert(0, f'({self.discarded_lines} lines of output were omitted{location})')
+
+        return '\n'.join(lines)
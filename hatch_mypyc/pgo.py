@@ -0,0 +1,94 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+
+from hatch_mypyc.compiler_cache import COMPILER_CACHES
+
+
+def get_compiler_family(compiler: str) -> str:
+    """Return either `gcc` or `clang` based on the version of the compiler, or an empty string if unsupported."""
+    # The compiler may be invoked through a compiler cache
+    arguments = [
+        argument
+        for argument in shlex.split(compiler)
+        if os.path.splitext(os.path.basename(argument))[0] not in COMPILER_CACHES
+    ]
+    if not arguments:
+        return ''
+
+    try:
+        process = subprocess.run([arguments[0], '--version'], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    except OSError:
+        return ''
+
+    output = process.stdout.decode('utf-8', errors='replace').lower()
+    if 'clang' in output:
+        return 'clang'
+    elif 'gcc' in output or 'free software foundation' in output:
+        return 'gcc'
+
+    return ''
+
+
+def get_generate_flags(family: str, profile_dir: str) -> list[str]:
+    flags = [f'-fprofile-generate={profile_dir}']
+    # Extensions may be used by multiple threads during training
+    if family == 'gcc':
+        flags.append('-fprofile-update=prefer-atomic')
+
+    return flags
+
+
+def get_use_flags(family: str, profile_dir: str) -> list[str]:
+    if family == 'clang':
+        return [
+            f'-fprofile-use={os.path.join(profile_dir, "default.profdata")}',
+            '-Wno-profile-instr-unprofiled',
+            '-Wno-profile-instr-out-of-date',
+        ]
+
+    # Code that was never executed during training has no profile, and the Mypyc runtime that is included by every
+    # extension moves whenever the build environment is recreated, in which case only its profile is ignored
+    return [
+        f'-fprofile-use={profile_dir}',
+        '-fprofile-correction',
+        '-Wno-missing-profile',
+        '-Wno-error=coverage-mismatch',
+    ]
+
+
+def merge_profiles(profile_dir: str) -> None:
+    """Clang writes raw profiles that must be merged into a single file before they can be used."""
+    raw_profiles = sorted(
+        os.path.join(profile_dir, entry) for entry in os.listdir(profile_dir) if entry.endswith('.profraw')
+    )
+    if not raw_profiles:
+        raise Exception('The PGO training command did not produce any profiles')
+
+    executable = shutil.which('llvm-profdata')
+    if executable is not None:
+        command = [executable]
+    elif sys.platform == 'darwin':  # no cov
+        command = ['xcrun', 'llvm-profdata']
+    else:  # no cov
+        raise Exception('Unable to find `llvm-profdata`, which is required for PGO with Clang')
+
+    output_file = os.path.join(profile_dir, 'default.profdata')
+    process = subprocess.run(
+        [*command, 'merge', f'-output={output_file}', *raw_profiles],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    if process.returncode:  # no cov
+        raise Exception(f'Error while merging PGO profiles:\n{process.stdout.decode("utf-8")}')
+
+
+def join_flags(*flags: str) -> str:
+    return ' '.join(shlex.quote(flag) for flag in flags)
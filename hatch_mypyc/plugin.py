@@ -3,17 +3,66 @@
 # SPDX-License-Identifier: MIT
 from __future__ import annotations
 
+import hashlib
+import json
 import os
 import platform
+import re
+import shlex
+import shutil
 import subprocess
 import sys
+import sysconfig
 from contextlib import contextmanager
-from tempfile import TemporaryDirectory
+from tempfile import TemporaryDirectory, TemporaryFile
 
 import pathspec
 from hatchling.builders.hooks.plugin.interface import BuildHookInterface
 
-from hatch_mypyc.utils import construct_setup_file, installed_in_prefix
+from hatch_mypyc.cache import DEFAULT_MAX_SIZE, ArtifactCache
+from hatch_mypyc.compiler_cache import CompilerCache, find_compiler_cache
+from hatch_mypyc.lock import DEFAULT_LOCK_TIMEOUT, FileLock
+from hatch_mypyc.output import BuildOutput
+from hatch_mypyc.pgo import join_flags
+from hatch_mypyc.remote import DEFAULT_REMOTE_CACHE_TIMEOUT, RemoteCache, get_backend
+from hatch_mypyc.utils import (
+    format_duration,
+    format_table,
+    get_cpu_count,
+    get_user_cache_dir,
+    hash_data,
+    hash_file,
+    installed_in_prefix,
+)
+
+ENGINES = ('subprocess', 'in-process')
+RUNNER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'runner.py')
+BENCHMARK_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark.py')
+DISPATCH_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dispatch.py')
+EDITABLE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'editable.py')
+EDITABLE_MODES = ('fallback', 'recompile', 'off')
+IMPORT_TIME = re.compile(r'^import time:\s*(?P<self>\d+) \|\s*\d+ \|\s*(?P<module>\S+)$')
+MYPY_CONFIG_FILES = ('mypy.ini', '.mypy.ini', 'pyproject.toml', 'setup.cfg')
+INTERPRETER_INFO_SCRIPT = """\
+import json
+import sys
+import sysconfig
+
+from mypy.version import __version__
+
+print(json.dumps({
+    'python': sys.version,
+    'abi': sysconfig.get_config_var('EXT_SUFFIX'),
+    'platform': sysconfig.get_platform(),
+    'mypy': __version__,
+    'cache_tag': sys.implementation.cache_tag,
+}))
+"""
+BUILD_PROFILES = {
+    'portable': {'cflags': [], 'ldflags': []},
+    'lto': {'cflags': ['-flto'], 'ldflags': ['-flto']},
+    'native': {'cflags': ['-march=native'], 'ldflags': []},
+}
 
 
 class MypycBuildHook(BuildHookInterface):
@@ -28,14 +77,57 @@ class MypycBuildHook(BuildHookInterface):
         self.__config_build_dir = None
         self.__config_include = None
         self.__config_exclude = None
+        self.__config_artifact_cache_dir = None
+        self.__config_artifact_cache_max_size = None
+        self.__config_remote_cache = None
+        self.__config_remote_cache_timeout = None
+        self.__config_incremental = None
+        self.__config_cache_dir = None
+        self.__config_jobs = None
+        self.__config_shards = None
+        self.__config_groups = None
+        self.__config_lazy = None
+        self.__config_engine = None
+        self.__config_compiler_cache = None
+        self.__config_compiler_cache_dir = None
+        self.__config_timing_report = None
+        self.__config_benchmarks = None
+        self.__config_benchmark_repeat = None
+        self.__config_import_report = None
+        self.__config_profile = None
+        self.__config_profile_threshold = None
+        self.__config_profile_top = None
+        self.__config_exclude_slow = None
+        self.__config_min_speedup = None
+        self.__config_pgo = None
+        self.__config_build_profiles = None
+        self.__config_build_profile = None
+        self.__build_profile_flags = None
+        self.__config_variants = None
+        self.__variants = None
+        self.__config_log_file = None
+        self.__config_interpreters = None
+        self.__config_staging = None
+        self.__config_lock_timeout = None
+        self.__config_editable = None
+        self.__editable = False
+        self.__cache_dir = None
+        self.__temp_cache_dir = None
+        self.__build_lock = None
+        self.__remote_cache = None
+        self.__build_root = None
+        self.__generated_dir = None
+        self.__slow_modules = None
         self.__package_source = None
-        self.__include_spec = None
-        self.__exclude_spec = None
+        self.__file_matcher = None
+        self.__file_selection = None
+        self.__candidate_files = None
         self.__included_files = None
         self.__normalized_included_files = None
         self.__artifact_globs = None
         self.__normalized_artifact_globs = None
         self.__artifact_patterns = None
+        self.__source_hashes = None
 
         self._on_windows = platform.system() == 'Windows'
         self.__compiled_extension = '.pyd' if self._on_windows else '.so'
@@ -87,7 +179,7 @@ class MypycBuildHook(BuildHookInterface):
     @property
     def config_build_dir(self):
         if self.__config_build_dir is None:
-            build_dir = os.environ.get('HATCH_MYPYC_BUILD_DIR', self.config_options.get('build-dir', ''))
+            build_dir = os.environ.get('HATCH_MYPYC_BUILD_DIR', self.config.get('build-dir', ''))
             if build_dir and not os.path.isabs(build_dir):
                 build_dir = os.path.join(self.root, build_dir)
 
@@ -139,6 +231,801 @@ class MypycBuildHook(BuildHookInterface):
 
         return self.__config_exclude
 
+    @property
+    def config_artifact_cache_dir(self):
+        if self.__config_artifact_cache_dir is None:
+            cache_dir = os.environ.get('HATCH_MYPYC_ARTIFACT_CACHE_DIR', self.config.get('artifact-cache-dir', ''))
+            if not isinstance(cache_dir, str):
+                raise TypeError(f'Option `artifact-cache-dir` for build hook `{self.PLUGIN_NAME}` must be a string')
+
+            if cache_dir and not os.path.isabs(cache_dir):
+                cache_dir = os.path.join(self.root, cache_dir)
+
+            self.__config_artifact_cache_dir = cache_dir
+
+        return self.__config_artifact_cache_dir
+
+    @property
+    def config_artifact_cache_max_size(self):
+        if self.__config_artifact_cache_max_size is None:
+            max_size = self.config.get('artifact-cache-max-size', DEFAULT_MAX_SIZE)
+            if not isinstance(max_size, int) or isinstance(max_size, bool):
+                raise TypeError(
+                    f'Option `artifact-cache-max-size` for build hook `{self.PLUGIN_NAME}` must be an integer'
+                )
+            elif max_size < 1:
+                raise ValueError(
+                    f'Option `artifact-cache-max-size` for build hook `{self.PLUGIN_NAME}` must be greater than zero'
+                )
+
+            self.__config_artifact_cache_max_size = max_size
+
+        return self.__config_artifact_cache_max_size
+
+    @property
+    def config_remote_cache(self):
+        if self.__config_remote_cache is None:
+            remote_cache = os.environ.get('HATCH_MYPYC_REMOTE_CACHE', self.config.get('remote-cache', ''))
+            if not isinstance(remote_cache, str):
+                raise TypeError(f'Option `remote-cache` for build hook `{self.PLUGIN_NAME}` must be a string')
+
+            # Directories may be relative to the project root
+            if remote_cache and '://' not in remote_cache and not os.path.isabs(remote_cache):
+                remote_cache = os.path.join(self.root, remote_cache)
+
+            self.__config_remote_cache = remote_cache
+
+        return self.__config_remote_cache
+
+    @property
+    def config_remote_cache_timeout(self):
+        if self.__config_remote_cache_timeout is None:
+            timeout = self.config.get('remote-cache-timeout', DEFAULT_REMOTE_CACHE_TIMEOUT)
+            if 'HATCH_MYPYC_REMOTE_CACHE_TIMEOUT' in os.environ:
+                timeout = os.environ['HATCH_MYPYC_REMOTE_CACHE_TIMEOUT']
+                try:
+                    timeout = float(timeout)
+                except ValueError:
+                    pass
+
+            if not isinstance(timeout, (int, float)) or isinstance(timeout, bool):
+                raise TypeError(f'Option `remote-cache-timeout` for build hook `{self.PLUGIN_NAME}` must be a number')
+            elif timeout <= 0:
+                raise ValueError(
+                    f'Option `remote-cache-timeout` for build hook `{self.PLUGIN_NAME}` must be greater than zero'
+                )
+
+            self.__config_remote_cache_timeout = timeout
+
+        return self.__config_remote_cache_timeout
+
+    @property
+    def config_incremental(self):
+        if self.__config_incremental is None:
+            incremental = self.config.get('incremental', False)
+            if not isinstance(incremental, bool):
+                raise TypeError(f'Option `incremental` for build hook `{self.PLUGIN_NAME}` must be a boolean')
+
+            self.__config_incremental = incremental
+
+        return self.__config_incremental
+
+    @property
+    def config_staging(self):
+        if self.__config_staging is None:
+            staging = self.config.get('staging', False)
+            if not isinstance(staging, bool):
+                raise TypeError(f'Option `staging` for build hook `{self.PLUGIN_NAME}` must be a boolean')
+
+            self.__config_staging = staging
+
+        return self.__config_staging
+
+    @property
+    def config_lock_timeout(self):
+        if self.__config_lock_timeout is None:
+            timeout = self.config.get('lock-timeout', DEFAULT_LOCK_TIMEOUT)
+            if 'HATCH_MYPYC_LOCK_TIMEOUT' in os.environ:
+                timeout = os.environ['HATCH_MYPYC_LOCK_TIMEOUT']
+                try:
+                    timeout = float(timeout)
+                except ValueError:
+                    pass
+
+            if not isinstance(timeout, (int, float)) or isinstance(timeout, bool):
+                raise TypeError(f'Option `lock-timeout` for build hook `{self.PLUGIN_NAME}` must be a number')
+            elif timeout < 0:
+                raise ValueError(f'Option `lock-timeout` for build hook `{self.PLUGIN_NAME}` cannot be negative')
+
+            self.__config_lock_timeout = timeout
+
+        return self.__config_lock_timeout
+
+    @property
+    def config_editable(self):
+        if self.__config_editable is None:
+            editable = os.environ.get('HATCH_MYPYC_EDITABLE', self.config.get('editable', 'fallback'))
+            if not isinstance(editable, str):
+                raise TypeError(f'Option `editable` for build hook `{self.PLUGIN_NAME}` must be a string')
+            elif editable not in EDITABLE_MODES:
+                raise ValueError(
+                    f'Option `editable` for build hook `{self.PLUGIN_NAME}` must be one of: {", ".join(EDITABLE_MODES)}'
+                )
+
+            self.__config_editable = editable
+
+        return self.__config_editable
+
+    @property
+    def editable(self):
+        return self.__editable
+
+    @property
+    def staging(self):
+        # Editable installs import the artifacts from outside of the project so that they never shadow the sources
+        return self.config_staging or self.editable
+
+    @property
+    def config_cache_dir(self):
+        if self.__config_cache_dir is None:
+            cache_dir = os.environ.get('HATCH_MYPYC_CACHE_DIR', self.config.get('cache-dir', ''))
+            if not isinstance(cache_dir, str):
+                raise TypeError(f'Option `cache-dir` for build hook `{self.PLUGIN_NAME}` must be a string')
+
+            if not cache_dir:
+                # Default to a location outside of the project that is unique to its path
+                root = os.path.realpath(self.root)
+                project_id = hashlib.sha256(os.path.normcase(root).encode('utf-8')).hexdigest()[:16]
+                cache_dir = os.path.join(get_user_cache_dir(), 'projects', f'{os.path.basename(root)}-{project_id}')
+            elif not os.path.isabs(cache_dir):
+                cache_dir = os.path.join(self.root, cache_dir)
+
+            self.__config_cache_dir = cache_dir
+
+        return self.__config_cache_dir
+
+    @property
+    def cache_dir(self):
+        if self.__cache_dir is None:
+            cache_dir = self.config_cache_dir
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                # Read-only locations may exist, for example the home directory of sandboxed builds
+                with TemporaryFile(dir=cache_dir):
+                    pass
+            except OSError as e:
+                from tempfile import mkdtemp
+
+                self.app.display_warning(f'Mypyc could not use the cache directory, persisting nothing: {e}')
+                cache_dir = os.path.realpath(mkdtemp(prefix='hatch-mypyc-'))
+                self.__temp_cache_dir = cache_dir
+
+            self.__cache_dir = cache_dir
+
+        return self.__cache_dir
+
+    @property
+    def config_jobs(self):
+        if self.__config_jobs is None:
+            jobs = self.config.get('jobs', 0)
+            if 'HATCH_MYPYC_JOBS' in os.environ:
+                jobs = os.environ['HATCH_MYPYC_JOBS']
+                jobs = int(jobs) if jobs.isdigit() else jobs
+
+            if not isinstance(jobs, int) or isinstance(jobs, bool):
+                raise TypeError(f'Option `jobs` for build hook `{self.PLUGIN_NAME}` must be an integer')
+            elif jobs < 0:
+                raise ValueError(f'Option `jobs` for build hook `{self.PLUGIN_NAME}` cannot be negative')
+
+            self.__config_jobs = jobs or get_cpu_count()
+
+        return self.__config_jobs
+
+    @property
+    def config_shards(self):
+        if self.__config_shards is None:
+            shards = self.config.get('shards', 0)
+            if not isinstance(shards, int) or isinstance(shards, bool):
+                raise TypeError(f'Option `shards` for build hook `{self.PLUGIN_NAME}` must be an integer')
+            elif shards < 0:
+                raise ValueError(f'Option `shards` for build hook `{self.PLUGIN_NAME}` cannot be negative')
+            elif shards > 1 and self.config_separation:
+                raise ValueError(
+                    f'Option `shards` for build hook `{self.PLUGIN_NAME}` cannot be used with the `separate` option'
+                )
+
+            self.__config_shards = shards
+
+        return self.__config_shards
+
+    @property
+    def config_groups(self):
+        if self.__config_groups is None:
+            groups = self.config.get('groups', {})
+            if isinstance(groups, str):
+                if groups != 'auto':
+                    raise ValueError(
+                        f'Option `groups` for build hook `{self.PLUGIN_NAME}` must be a table or the string `auto`'
+                    )
+            elif isinstance(groups, dict):
+                for name, patterns in groups.items():
+                    if not re.search(r'^\w+$', name, re.ASCII):
+                        raise ValueError(
+                            f'Group `{name}` of option `groups` for build hook `{self.PLUGIN_NAME}` must only '
+                            f'contain letters, digits and underscores'
+                        )
+                    elif not isinstance(patterns, list) or not all(
+                        isinstance(pattern, str) and pattern for pattern in patterns
+                    ):
+                        raise TypeError(
+                            f'Group `{name}` of option `groups` for build hook `{self.PLUGIN_NAME}` must be an '
+                            f'array of non-empty strings'
+                        )
+            else:
+                raise TypeError(
+                    f'Option `groups` for build hook `{self.PLUGIN_NAME}` must be a table or the string `auto`'
+                )
+
+            if groups and self.config_separation:
+                raise ValueError(
+                    f'Option `groups` for build hook `{self.PLUGIN_NAME}` cannot be used with the `separate` option'
+                )
+            elif groups and self.config_shards > 1:
+                raise ValueError(
+                    f'Option `groups` for build hook `{self.PLUGIN_NAME}` cannot be used with the `shards` option'
+                )
+
+            self.__config_groups = groups
+
+        return self.__config_groups
+
+    @property
+    def config_lazy(self):
+        if self.__config_lazy is None:
+            lazy = self.config.get('lazy', False)
+            if not isinstance(lazy, bool):
+                raise TypeError(f'Option `lazy` for build hook `{self.PLUGIN_NAME}` must be a boolean')
+            elif lazy and self.config_separation:
+                raise ValueError(
+                    f'Option `lazy` for build hook `{self.PLUGIN_NAME}` cannot be used with the `separate` option'
+                )
+            elif lazy and self.config_shards > 1:
+                raise ValueError(
+                    f'Option `lazy` for build hook `{self.PLUGIN_NAME}` cannot be used with the `shards` option'
+                )
+            elif lazy and self.config_groups:
+                raise ValueError(
+                    f'Option `lazy` for build hook `{self.PLUGIN_NAME}` cannot be used with the `groups` option'
+                )
+
+            self.__config_lazy = lazy
+
+        return self.__config_lazy
+
+    @property
+    def config_engine(self):
+        if self.__config_engine is None:
+            engine = os.environ.get('HATCH_MYPYC_ENGINE', self.config.get('engine', 'subprocess'))
+            if not isinstance(engine, str):
+                raise TypeError(f'Option `engine` for build hook `{self.PLUGIN_NAME}` must be a string')
+            elif engine not in ENGINES:
+                raise ValueError(
+                    f'Option `engine` for build hook `{self.PLUGIN_NAME}` must be one of: {", ".join(ENGINES)}'
+                )
+
+            self.__config_engine = engine
+
+        return self.__config_engine
+
+    @property
+    def config_compiler_cache(self):
+        if self.__config_compiler_cache is None:
+            compiler_cache = self.config.get('compiler-cache', False)
+            if isinstance(compiler_cache, bool):
+                executable = (find_compiler_cache() or '') if compiler_cache else ''
+            elif isinstance(compiler_cache, str):
+                if not compiler_cache:
+                    raise ValueError(
+                        f'Option `compiler-cache` for build hook `{self.PLUGIN_NAME}` cannot be an empty string'
+                    )
+
+                executable = shutil.which(compiler_cache)
+                if executable is None:
+                    raise ValueError(
+                        f'Option `compiler-cache` for build hook `{self.PLUGIN_NAME}` refers to an executable '
+                        f'that could not be found: {compiler_cache}'
+                    )
+            else:
+                raise TypeError(
+                    f'Option `compiler-cache` for build hook `{self.PLUGIN_NAME}` must be a boolean or a string'
+                )
+
+            self.__config_compiler_cache = executable
+
+        return self.__config_compiler_cache
+
+    @property
+    def config_compiler_cache_dir(self):
+        if self.__config_compiler_cache_dir is None:
+            cache_dir = self.config.get('compiler-cache-dir', '')
+            if not isinstance(cache_dir, str):
+                raise TypeError(f'Option `compiler-cache-dir` for build hook `{self.PLUGIN_NAME}` must be a string')
+
+            if cache_dir and not os.path.isabs(cache_dir):
+                cache_dir = os.path.join(self.root, cache_dir)
+
+            self.__config_compiler_cache_dir = cache_dir
+
+        return self.__config_compiler_cache_dir
+
+    @property
+    def config_timing_report(self):
+        if self.__config_timing_report is None:
+            report_file = os.environ.get('HATCH_MYPYC_TIMING_REPORT', self.config.get('timing-report', ''))
+            if not isinstance(report_file, str):
+                raise TypeError(f'Option `timing-report` for build hook `{self.PLUGIN_NAME}` must be a string')
+
+            if report_file and not os.path.isabs(report_file):
+                report_file = os.path.join(self.root, report_file)
+
+            self.__config_timing_report = report_file
+
+        return self.__config_timing_report
+
+    @property
+    def config_log_file(self):
+        if self.__config_log_file is None:
+            log_file = os.environ.get('HATCH_MYPYC_LOG_FILE', self.config.get('log-file', ''))
+            if not isinstance(log_file, str):
+                raise TypeError(f'Option `log-file` for build hook `{self.PLUGIN_NAME}` must be a string')
+
+            if log_file and not os.path.isabs(log_file):
+                log_file = os.path.join(self.root, log_file)
+
+            self.__config_log_file = log_file
+
+        return self.__config_log_file
+
+    @property
+    def config_interpreters(self):
+        if self.__config_interpreters is None:
+            if 'HATCH_MYPYC_INTERPRETERS' in os.environ:
+                interpreters = [name.strip() for name in os.environ['HATCH_MYPYC_INTERPRETERS'].split(',')]
+                interpreters = [name for name in interpreters if name]
+            else:
+                interpreters = self.config.get('interpreters', [])
+
+            if not isinstance(interpreters, list):
+                raise TypeError(f'Option `interpreters` for build hook `{self.PLUGIN_NAME}` must be an array')
+
+            for i, interpreter in enumerate(interpreters, 1):
+                if not isinstance(interpreter, str):
+                    raise TypeError(
+                        f'Interpreter #{i} of option `interpreters` for build hook `{self.PLUGIN_NAME}` '
+                        f'must be a string'
+                    )
+                elif not interpreter:
+                    raise ValueError(
+                        f'Interpreter #{i} of option `interpreters` for build hook `{self.PLUGIN_NAME}` '
+                        f'cannot be an empty string'
+                    )
+
+            self.__config_interpreters = list(dict.fromkeys(interpreters))
+
+        return self.__config_interpreters
+
+    @property
+    def config_benchmarks(self):
+        if self.__config_benchmarks is None:
+            benchmarks = self.config.get('benchmarks', [])
+            if isinstance(benchmarks, list):
+                for i, benchmark in enumerate(benchmarks, 1):
+                    if not isinstance(benchmark, str):
+                        raise TypeError(
+                            f'Benchmark #{i} of option `benchmarks` for build hook `{self.PLUGIN_NAME}` '
+                            f'must be a string'
+                        )
+
+                    module_name, _, attribute_path = benchmark.partition(':')
+                    if not module_name or not attribute_path:
+                        raise ValueError(
+                            f'Benchmark #{i} of option `benchmarks` for build hook `{self.PLUGIN_NAME}` '
+                            f'must be in the form `module:callable`'
+                        )
+            else:
+                raise TypeError(f'Option `benchmarks` for build hook `{self.PLUGIN_NAME}` must be an array')
+
+            self.__config_benchmarks = benchmarks
+
+        return self.__config_benchmarks
+
+    @property
+    def config_benchmark_repeat(self):
+        if self.__config_benchmark_repeat is None:
+            repeat = self.config.get('benchmark-repeat', 5)
+            if not isinstance(repeat, int) or isinstance(repeat, bool):
+                raise TypeError(f'Option `benchmark-repeat` for build hook `{self.PLUGIN_NAME}` must be an integer')
+            elif repeat < 2:
+                raise ValueError(f'Option `benchmark-repeat` for build hook `{self.PLUGIN_NAME}` must be at least 2')
+
+            self.__config_benchmark_repeat = repeat
+
+        return self.__config_benchmark_repeat
+
+    @property
+    def config_import_report(self):
+        if self.__config_import_report is None:
+            modules = self.config.get('import-report', [])
+            if isinstance(modules, list):
+                for i, module_name in enumerate(modules, 1):
+                    if not isinstance(module_name, str) or not module_name:
+                        raise TypeError(
+                            f'Module #{i} of option `import-report` for build hook `{self.PLUGIN_NAME}` '
+                            f'must be a non-empty string'
+                        )
+            else:
+                raise TypeError(f'Option `import-report` for build hook `{self.PLUGIN_NAME}` must be an array')
+
+            self.__config_import_report = modules
+
+        return self.__config_import_report
+
+    @property
+    def config_profile(self):
+        if self.__config_profile is None:
+            profile = self.config.get('profile', '')
+            if not isinstance(profile, str):
+                raise TypeError(f'Option `profile` for build hook `{self.PLUGIN_NAME}` must be a string')
+
+            if profile:
+                if not os.path.isabs(profile):
+                    profile = os.path.join(self.root, profile)
+
+                if not os.path.isfile(profile):
+                    raise ValueError(
+                        f'Option `profile` for build hook `{self.PLUGIN_NAME}` refers to a file that does not exist: '
+                        f'{profile}'
+                    )
+
+            self.__config_profile = profile
+
+        return self.__config_profile
+
+    @property
+    def config_profile_threshold(self):
+        if self.__config_profile_threshold is None:
+            threshold = self.config.get('profile-threshold', 0.01)
+            if not isinstance(threshold, (int, float)) or isinstance(threshold, bool):
+                raise TypeError(f'Option `profile-threshold` for build hook `{self.PLUGIN_NAME}` must be a number')
+            elif not 0 <= threshold <= 1:
+                raise ValueError(
+                    f'Option `profile-threshold` for build hook `{self.PLUGIN_NAME}` must be between 0 and 1'
+                )
+
+            self.__config_profile_threshold = threshold
+
+        return self.__config_profile_threshold
+
+    @property
+    def config_profile_top(self):
+        if self.__config_profile_top is None:
+            top = self.config.get('profile-top', 0)
+            if not isinstance(top, int) or isinstance(top, bool):
+                raise TypeError(f'Option `profile-top` for build hook `{self.PLUGIN_NAME}` must be an integer')
+            elif top < 0:
+                raise ValueError(f'Option `profile-top` for build hook `{self.PLUGIN_NAME}` cannot be negative')
+
+            self.__config_profile_top = top
+
+        return self.__config_profile_top
+
+    @property
+    def config_exclude_slow(self):
+        if self.__config_exclude_slow is None:
+            exclude_slow = self.config.get('exclude-slow', False)
+            if not isinstance(exclude_slow, bool):
+                raise TypeError(f'Option `exclude-slow` for build hook `{self.PLUGIN_NAME}` must be a boolean')
+
+            self.__config_exclude_slow = exclude_slow
+
+        return self.__config_exclude_slow
+
+    @property
+    def config_min_speedup(self):
+        if self.__config_min_speedup is None:
+            min_speedup = self.config.get('min-speedup', 1.0)
+            if not isinstance(min_speedup, (int, float)) or isinstance(min_speedup, bool):
+                raise TypeError(f'Option `min-speedup` for build hook `{self.PLUGIN_NAME}` must be a number')
+            elif min_speedup <= 0:
+                raise ValueError(f'Option `min-speedup` for build hook `{self.PLUGIN_NAME}` must be greater than zero')
+
+            self.__config_min_speedup = min_speedup
+
+        return self.__config_min_speedup
+
+    @property
+    def config_pgo(self):
+        if self.__config_pgo is None:
+            command = self.config.get('pgo', [])
+            if isinstance(command, str):
+                command = shlex.split(command, posix=os.name != 'nt')
+            elif isinstance(command, list):
+                for i, argument in enumerate(command, 1):
+                    if not isinstance(argument, str):
+                        raise TypeError(
+                            f'Argument #{i} of option `pgo` for build hook `{self.PLUGIN_NAME}` must be a string'
+                        )
+                    elif not argument:
+                        raise ValueError(
+                            f'Argument #{i} of option `pgo` for build hook `{self.PLUGIN_NAME}` '
+                            f'cannot be an empty string'
+                        )
+            else:
+                raise TypeError(f'Option `pgo` for build hook `{self.PLUGIN_NAME}` must be a string or an array')
+
+            self.__config_pgo = command
+
+        return self.__config_pgo
+
+    @property
+    def config_build_profiles(self):
+        if self.__config_build_profiles is None:
+            build_profiles = self.config.get('build-profiles', {})
+            if not isinstance(build_profiles, dict):
+                raise TypeError(f'Option `build-profiles` for build hook `{self.PLUGIN_NAME}` must be a table')
+
+            profiles = {name: dict(profile) for name, profile in BUILD_PROFILES.items()}
+            for name, profile in build_profiles.items():
+                if not isinstance(profile, dict):
+                    raise TypeError(
+                        f'Profile `{name}` of option `build-profiles` for build hook `{self.PLUGIN_NAME}` '
+                        f'must be a table'
+                    )
+
+                flags = {}
+                for flag_type in ('cflags', 'ldflags'):
+                    profile_flags = profile.get(flag_type, [])
+                    if not isinstance(profile_flags, list) or not all(
+                        isinstance(flag, str) and flag for flag in profile_flags
+                    ):
+                        raise TypeError(
+                            f'Field `{flag_type}` of profile `{name}` of option `build-profiles` for build hook '
+                            f'`{self.PLUGIN_NAME}` must be an array of non-empty strings'
+                        )
+
+                    flags[flag_type] = profile_flags
+
+                profiles[name] = flags
+
+            self.__config_build_profiles = profiles
+
+        return self.__config_build_profiles
+
+    @property
+    def config_build_profile(self):
+        if self.__config_build_profile is None:
+            if 'HATCH_MYPYC_BUILD_PROFILE' in os.environ:
+                build_profile = [name.strip() for name in os.environ['HATCH_MYPYC_BUILD_PROFILE'].split(',')]
+            else:
+                build_profile = self.config.get('build-profile', [])
+
+            if isinstance(build_profile, str):
+                build_profile = [build_profile]
+            elif not isinstance(build_profile, list):
+                raise TypeError(
+                    f'Option `build-profile` for build hook `{self.PLUGIN_NAME}` must be a string or an array'
+                )
+
+            build_profile = [name for name in build_profile if name]
+            for name in build_profile:
+                if name not in self.config_build_profiles:
+                    raise ValueError(
+                        f'Option `build-profile` for build hook `{self.PLUGIN_NAME}` must be one of: '
+                        f'{", ".join(sorted(self.config_build_profiles))}'
+                    )
+
+            self.__config_build_profile = build_profile
+
+        return self.__config_build_profile
+
+    @property
+    def build_profile_flags(self):
+        if self.__build_profile_flags is None:
+            # Profiles are combined in order, e.g. `lto` and `native`
+            flags = {'cflags': [], 'ldflags': []}
+            for name in self.config_build_profile:
+                for flag_type, profile_flags in self.config_build_profiles[name].items():
+                    flags[flag_type].extend(profile_flags)
+
+            self.__build_profile_flags = flags
+
+        return self.__build_profile_flags
+
+    @property
+    def config_variants(self):
+        if self.__config_variants is None:
+            from hatch_mypyc.dispatch import FEATURE_LEVELS
+
+            variants = self.config.get('variants', [])
+            if not isinstance(variants, list):
+                raise TypeError(f'Option `variants` for build hook `{self.PLUGIN_NAME}` must be an array')
+
+            for i, variant in enumerate(variants, 1):
+                if not isinstance(variant, str):
+                    raise TypeError(
+                        f'Variant #{i} of option `variants` for build hook `{self.PLUGIN_NAME}` must be a string'
+                    )
+                elif variant not in FEATURE_LEVELS:
+                    raise ValueError(
+                        f'Variant #{i} of option `variants` for build hook `{self.PLUGIN_NAME}` must be one of: '
+                        f'{", ".join(FEATURE_LEVELS)}'
+                    )
+
+            self.__config_variants = list(dict.fromkeys(variants))
+
+        return self.__config_variants
+
+    @property
+    def variants(self):
+        if self.__variants is None:
+            variants = self.config_variants
+            # Editable installs only import the baseline shared libraries
+            if self.editable:
+                variants = []
+            # The levels are passed to GCC and Clang using `-march`
+            elif variants and (self._on_windows or platform.machine().lower() not in ('x86_64', 'amd64')):
+                self.app.display_warning('Variants are only supported for x86-64 outside of Windows, skipping them')
+                variants = []
+
+            self.__variants = variants
+
+        return self.__variants
+
+    @property
+    def compiler_cache(self):
+        if not self.config_compiler_cache:
+            return None
+
+        return CompilerCache(self.config_compiler_cache, self.config_compiler_cache_dir)
+
+    def get_shards(self):
+        from hatch_mypyc.graph import get_dependencies, get_module_name, get_strongly_connected_components, partition
+
+        included_files = self.normalized_included_files
+        dependencies = get_dependencies(self.root, included_files, self.package_source)
+        weights = {path: os.path.getsize(os.path.join(self.root, path)) for path in included_files}
+        groups = partition(get_strongly_connected_components(dependencies), weights, self.config_shards)
+
+        # Names based on position rather than contents keep the shared libraries stable across builds
+        prefix = get_module_name(included_files[0], self.package_source).split('.')[0]
+        return [(group, f'{prefix}_shard{i}') for i, group in enumerate(groups)]
+
+    def get_groups(self):
+        from hatch_mypyc.graph import cluster, get_dependencies, get_module_name
+        from hatch_mypyc.selection import GitIgnorePattern
+
+        included_files = self.normalized_included_files
+        prefix = get_module_name(included_files[0], self.package_source).split('.')[0]
+        if self.config_groups == 'auto':
+            dependencies = get_dependencies(self.root, included_files, self.package_source)
+            return [(group, f'{prefix}_group{i}') for i, group in enumerate(cluster(dependencies))]
+
+        specs = {
+            name: pathspec.PathSpec.from_lines(GitIgnorePattern, patterns)
+            for name, patterns in self.config_groups.items()
+        }
+        # Modules that do not match any group are compiled together
+        groups = {name: [] for name in specs}
+        groups.setdefault('default', [])
+        for included_file in included_files:
+            name = next((name for name, spec in specs.items() if spec.match_file(included_file)), 'default')
+            groups[name].append(included_file)
+
+        return [(group, f'{prefix}_{name}') for name, group in groups.items() if group]
+
+    def get_lazy_groups(self):
+        from hatch_mypyc.graph import get_dependencies, get_module_name, get_strongly_connected_components
+
+        # Modules that import each other are always initialized together
+        dependencies = get_dependencies(self.root, self.normalized_included_files, self.package_source)
+        package_source = self.package_source.replace('\\', '/')
+        return [
+            (group, get_module_name(group[0], package_source).replace('.', '__'))
+            for group in get_strongly_connected_components(dependencies)
+        ]
+
+    def prepare_mypy_cache_dir(self, cache_tag=None, mypy_version=None):
+        if mypy_version is None:
+            from mypy.version import __version__ as mypy_version
+
+        if cache_tag is None:
+            cache_tag = sys.implementation.cache_tag
+
+        # Mypy's cache is specific to the interpreter because the target Python version is always the current one
+        mypy_cache_dir = os.path.join(self.cache_dir, 'mypy', cache_tag or 'default')
+        version_file = os.path.join(mypy_cache_dir, '.mypy-version')
+
+        # The cache is shared by every build of the project, including those that do not hold the build lock
+        with FileLock(f'{mypy_cache_dir}.lock', self.config_lock_timeout):
+            try:
+                with open(version_file, encoding='utf-8') as f:
+                    cached_version = f.read()
+            except OSError:
+                cached_version = None
+
+            if cached_version != mypy_version:
+                # Prevent any chance of reusing state serialized by a different version of Mypy
+                shutil.rmtree(mypy_cache_dir, ignore_errors=True)
+                os.makedirs(mypy_cache_dir, exist_ok=True)
+
+                temp_file = f'{version_file}.{os.getpid()}.tmp'
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    f.write(mypy_version)
+
+                os.replace(temp_file, version_file)
+
+        return mypy_cache_dir
+
+    @property
+    def persistent_build_dir(self):
+        # Editable installs keep importing the artifacts after the build
+        if self.editable:
+            return os.path.join(self.cache_dir, 'editable')
+        elif self.config_build_dir:
+            return self.config_build_dir
+        # Intermediate artifacts must persist in order for unchanged extensions to be reused, and
+        # compiler caches only get hits when the paths of the generated C files are stable, and GCC
+        # associates profiles with the paths of object files
+        elif self.config_incremental or self.config_compiler_cache or self.config_pgo:
+            return os.path.join(self.cache_dir, 'build')
+        else:
+            return ''
+
+    @property
+    def build_root(self):
+        # Extensions are built next to the sources, which are copied elsewhere when staging
+        if not self.staging:
+            return self.root
+        elif self.__build_root is None:
+            if self.persistent_build_dir:
+                self.__build_root = os.path.join(self.persistent_build_dir, 'staging')
+            else:
+                from tempfile import mkdtemp
+
+                self.__build_root = os.path.realpath(mkdtemp())
+
+        return self.__build_root
+
+    @property
+    def build_lock(self):
+        # Builds of the same project share the artifacts in the project and the persistent build directory
+        if self.__build_lock is None and (not self.staging or self.persistent_build_dir):
+            self.__build_lock = FileLock(os.path.join(self.cache_dir, 'build.lock'), self.config_lock_timeout)
+
+        return self.__build_lock
+
+    @property
+    def artifact_cache(self):
+        if not self.config_artifact_cache_dir:
+            return None
+
+        return ArtifactCache(self.config_artifact_cache_dir, self.config_artifact_cache_max_size)
+
+    @property
+    def remote_cache(self):
+        if self.__remote_cache is None:
+            self.__remote_cache = False
+            if self.config_remote_cache:
+                # The cache is an optimization so it must never prevent builds
+                try:
+                    self.__remote_cache = RemoteCache(
+                        get_backend(self.config_remote_cache, self.config_remote_cache_timeout)
+                    )
+                except Exception as e:
+                    self.app.display_warning(f'Mypyc could not use the remote cache, building locally: {e}')
+
+        return self.__remote_cache or None
+
     @property
     def package_source(self):
         if self.__package_source is None:
@@ -151,52 +1038,160 @@ class MypycBuildHook(BuildHookInterface):
         return self.__package_source
 
     @property
-    def include_spec(self):
-        if self.__config_include is None and self.config_include:
-            self.__include_spec = pathspec.PathSpec.from_lines(
-                pathspec.patterns.GitWildMatchPattern, self.config_include
-            )
+    def file_matcher(self):
+        if self.__file_matcher is None:
+            from hatch_mypyc.selection import FileMatcher
+
+            self.__file_matcher = FileMatcher(self.config_include, self.config_exclude)
+
+        return self.__file_matcher
 
-        return self.__include_spec
+    def include_path(self, relative_path):
+        return self.file_matcher.match_file(relative_path)
 
     @property
-    def exclude_spec(self):
-        if self.__exclude_spec is None and self.config_exclude:
-            self.__exclude_spec = pathspec.PathSpec.from_lines(
-                pathspec.patterns.GitWildMatchPattern, self.config_exclude
-            )
+    def selection_file(self):
+        return os.path.join(self.cache_dir, 'selection.json')
+
+    def get_tree_fingerprint(self):
+        from hatchling.__about__ import __version__ as hatchling_version
+        from hatchling.builders.constants import EXCLUDED_DIRECTORIES
+        from hatchling.builders.utils import get_relative_path, safe_walk
+
+        from hatch_mypyc.__about__ import __version__
+
+        # The selection only depends on the paths of Python files, so listing directories is enough to know
+        # whether it changed and the artifacts of builds in place do not affect the fingerprint
+        entries = []
+        explicit_paths = dict(self.build_config.only_include)
+        if not explicit_paths:
+            for root, dirs, files in safe_walk(self.root):
+                relative_path = get_relative_path(root, self.root)
+                dirs[:] = sorted(d for d in dirs if not self.build_config.directory_is_excluded(d, relative_path))
+                python_files = sorted(f for f in files if f.endswith(('.py', '.pyi')))
+                if python_files:
+                    entries.append((root, python_files))
+
+        explicit_paths.update(self.build_config.get_force_include())
+        for source in sorted(explicit_paths):
+            if os.path.isdir(source):
+                for root, dirs, files in safe_walk(source):
+                    dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_DIRECTORIES)
+                    python_files = sorted(f for f in files if f.endswith(('.py', '.pyi')))
+                    if python_files:
+                        entries.append((root, python_files))
+            elif os.path.exists(source):
+                entries.append((source, []))
+
+        config_files = {}
+        for config_file in ('pyproject.toml', 'hatch.toml', '.gitignore', '.hgignore'):
+            path = os.path.join(self.root, config_file)
+            if os.path.isfile(path):
+                config_files[config_file] = hash_file(path)
+
+        return hash_data(
+            {
+                'hatch-mypyc': __version__,
+                'hatchling': hatchling_version,
+                'include': self.config_include,
+                'exclude': self.config_exclude,
+                'config-files': config_files,
+                'entries': entries,
+            }
+        )
+
+    def select_files(self):
+        # Taken before the files are selected so that files added during the build are selected next time
+        fingerprint = self.get_tree_fingerprint()
+        try:
+            with open(self.selection_file, encoding='utf-8') as f:
+                selection = json.load(f)
+        except (OSError, ValueError):
+            selection = None
 
-        return self.__exclude_spec
+        if isinstance(selection, dict) and selection.get('fingerprint') == fingerprint:
+            return selection
 
-    def include_path(self, relative_path):
-        return self.path_is_included(relative_path) and not self.path_is_excluded(relative_path)
+        # Walk once for both the modules to compile and the hashes of every Python file
+        python_files = []
+        candidate_files = []
+        for included_file in self.build_config.builder.recurse_included_files():
+            if included_file.path.endswith(('.py', '.pyi')):
+                python_files.append([included_file.relative_path, included_file.path])
 
-    def path_is_included(self, relative_path):
-        if self.include_spec is None:  # no cov
-            return True
+            relative_path = included_file.relative_path
+            if relative_path.endswith('.py') and self.include_path(relative_path):
+                candidate_files.append(relative_path)
 
-        return self.include_spec.match_file(relative_path)
+        return {'python_files': python_files, 'candidate_files': candidate_files, 'fingerprint': fingerprint}
 
-    def path_is_excluded(self, relative_path):
-        if self.exclude_spec is None:  # no cov
-            return False
+    def save_file_selection(self):
+        os.makedirs(os.path.dirname(self.selection_file), exist_ok=True)
+        with open(self.selection_file, 'w', encoding='utf-8') as f:
+            json.dump(self.file_selection, f)
+
+    @property
+    def file_selection(self):
+        if self.__file_selection is None:
+            self.__file_selection = self.select_files()
 
-        return self.exclude_spec.match_file(relative_path)
+        return self.__file_selection
+
+    @property
+    def candidate_files(self):
+        if self.__candidate_files is None:
+            candidate_files = self.file_selection['candidate_files']
+            if self.config_profile:
+                candidate_files = self.select_profiled_files(candidate_files)
+
+            self.__candidate_files = candidate_files
+
+        return self.__candidate_files
 
     @property
     def included_files(self):
         if self.__included_files is None:
-            included_files = []
-
-            for included_file in self.build_config.builder.recurse_included_files():
-                relative_path = included_file.relative_path
-                if relative_path.endswith('.py') and self.include_path(relative_path):
-                    included_files.append(relative_path)
+            included_files = self.candidate_files
+            if self.config_exclude_slow:
+                included_files = [f for f in included_files if f.replace('\\', '/') not in self.slow_modules]
 
             self.__included_files = included_files
 
         return self.__included_files
 
+    def reset_included_files(self):
+        self.__included_files = None
+        self.__normalized_included_files = None
+        self.__artifact_globs = None
+        self.__normalized_artifact_globs = None
+        self.__artifact_patterns = None
+        self.__slow_modules = None
+
+    def select_profiled_files(self, included_files):
+        from hatch_mypyc.profiling import load_profile, rank_modules, select_modules
+
+        times = load_profile(self.config_profile)
+        package_source = self.package_source.replace('\\', '/')
+        ranking = rank_modules(times, [f.replace('\\', '/') for f in included_files], package_source)
+        selection = select_modules(ranking, sum(times.values()), self.config_profile_threshold, self.config_profile_top)
+
+        rows = [['Module', 'Time', 'Share', 'Compiled']]
+        rows.extend(
+            [
+                module['path'],
+                f'{module["time"]:.6g}',
+                f'{module["share"]:.2%}',
+                'yes' if module['selected'] else f'no, {module["reason"]}',
+            ]
+            for module in selection
+        )
+        selected = {module['path'] for module in selection if module['selected']}
+        self.app.display_info(
+            f'Mypyc profile-guided selection: {len(selected)} of {len(included_files)} modules\n{format_table(rows)}'
+        )
+
+        return [f for f in included_files if f.replace('\\', '/') in selected]
+
     @property
     def normalized_included_files(self):
         if self.__normalized_included_files is None:
@@ -212,7 +1207,6 @@ class MypycBuildHook(BuildHookInterface):
         if self.__artifact_globs is None:
             artifact_globs = []
 
-            # TODO: investigate using more specific patterns to avoid having to clean everything before each run
             for included_file in self.included_files:
                 root, _ = os.path.splitext(included_file)
                 artifact_globs.append(f'{root}.*{self.compiled_extension}')
@@ -242,103 +1236,1416 @@ class MypycBuildHook(BuildHookInterface):
 
         return self.__artifact_patterns
 
-    def get_forced_inclusion_map(self):
-        inclusion_map = {}
-        if not self.config_separation:
-            from glob import iglob
+    def get_forced_inclusion_map(self, artifacts):
+        # Staged artifacts are not part of the project
+        if self.staging:
+            return {os.path.join(self.build_root, artifact): artifact for artifact in artifacts}
 
-            pattern = f'*__mypyc.*{self.compiled_extension}'
-            if self.package_source:
-                pattern = os.path.join(self.package_source, pattern)
+        # Shared libraries that are not part of a package must be included explicitly
+        return {
+            os.path.join(self.root, artifact): artifact
+            for artifact in artifacts
+            if os.path.normpath(os.path.dirname(artifact)) == os.path.normpath(self.package_source)
+        }
 
-            for path in iglob(os.path.join(self.root, pattern)):
-                inclusion_map[path] = os.path.relpath(path, self.root)
+    def collect_artifacts(self, root=None, ext_suffix=None):
+        from glob import escape, iglob
 
-        return inclusion_map
+        from hatch_mypyc.dispatch import get_variant_tag
+        from hatch_mypyc.graph import get_module_name
 
-    def clean(self, versions):
+        if root is None:
+            root = self.build_root
+
+        if ext_suffix is None:
+            ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+
+        # Every CPU variant has its own copy of the shared libraries
+        shared_library_suffixes = [
+            f'__mypyc{ext_suffix}',
+            *(f'__mypyc.{get_variant_tag(variant)}{ext_suffix}' for variant in self.variants),
+        ]
+        package_source = self.package_source.replace('\\', '/')
+
+        candidates = []
+        for included_file in self.included_files:
+            module_root, _ = os.path.splitext(included_file)
+            candidates.append(f'{module_root}{ext_suffix}')
+
+            # Every module is compiled into a shared library named after it
+            if self.config_separation:
+                module_name = get_module_name(included_file.replace('\\', '/'), package_source)
+                shared_library = os.path.join(self.package_source, *module_name.split('.'))
+                candidates.extend(f'{shared_library}{suffix}' for suffix in shared_library_suffixes)
+
+        artifacts = [candidate for candidate in candidates if os.path.isfile(os.path.join(root, candidate))]
+
+        # Otherwise the names of the shared libraries depend on the modules that they contain
+        if not self.config_separation:
+            package_root = os.path.join(root, self.package_source)
+            for path in sorted(iglob(os.path.join(escape(package_root), '*__mypyc.*'))):
+                if path.endswith(tuple(shared_library_suffixes)):
+                    artifacts.append(os.path.relpath(path, root))
+
+        return artifacts
+
+    def find_artifacts(self):
         from glob import iglob
 
-        for path in self.get_forced_inclusion_map():
-            os.remove(path)
+        # Projects that were built without a manifest may contain the artifacts of any interpreter
+        pattern = f'*__mypyc.*{self.compiled_extension}'
+        if self.package_source:
+            pattern = os.path.join(self.package_source, pattern)
 
+        artifacts = list(iglob(os.path.join(self.root, pattern)))
         for artifact_glob in self.artifact_globs:
-            absolute_glob = os.path.join(self.root, artifact_glob)
-            for artifact in iglob(absolute_glob):
-                os.remove(artifact)
+            artifacts.extend(iglob(os.path.join(self.root, artifact_glob)))
 
-    @contextmanager
-    def hide_project_file(self):
-        # TODO: remove this and bump setuptools when it supports PEP 639
-        project_file = os.path.join(self.root, 'pyproject.toml')
-        project_file_backup = os.path.join(self.root, 'pyproject.toml.bak')
+        return artifacts
 
-        os.replace(project_file, project_file_backup)
+    @property
+    def artifact_manifest_file(self):
+        return os.path.join(self.cache_dir, 'artifacts.json')
+
+    def load_artifact_manifest(self):
         try:
-            yield
-        finally:
-            os.replace(project_file_backup, project_file)
+            with open(self.artifact_manifest_file, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # The cache directory may be shared by multiple projects
+        if not isinstance(manifest, dict) or manifest.get('root') != os.path.realpath(self.root):
+            return None
+
+        return manifest
+
+    def save_artifact_manifest(self, manifest):
+        os.makedirs(os.path.dirname(self.artifact_manifest_file), exist_ok=True)
+        with open(self.artifact_manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+    def record_artifacts(self, artifacts):
+        manifest = self.load_artifact_manifest() or {'root': os.path.realpath(self.root), 'artifacts': {}}
+        # Artifacts are recorded per interpreter so that they may coexist
+        manifest['artifacts'][sysconfig.get_config_var('EXT_SUFFIX')] = {
+            artifact.replace('\\', '/'): hash_file(os.path.join(self.root, artifact)) for artifact in artifacts
+        }
+        self.save_artifact_manifest(manifest)
+
+    def remove_artifacts(self, manifest, tags):
+        for tag in tags:
+            for artifact in manifest['artifacts'].pop(tag, {}):
+                path = os.path.join(self.root, artifact)
+                if os.path.isfile(path):
+                    os.remove(path)
+
+        self.save_artifact_manifest(manifest)
+
+    def artifact_is_shipped(self, artifact):
+        return not self.build_config.path_is_excluded(artifact) or self.build_config.path_is_artifact(artifact)
+
+    def remove_stale_artifacts(self, incremental_state):
+        manifest = self.load_artifact_manifest()
+        if manifest is None:
+            if incremental_state is None:
+                # We don't know the exact naming scheme of the files produced using this interpreter,
+                # so always clean to prevent including files from other runs
+                for artifact in self.find_artifacts():
+                    os.remove(artifact)
+            else:
+                self.remove_foreign_artifacts(incremental_state)
+
+            return
+
+        current_tag = sysconfig.get_config_var('EXT_SUFFIX')
+        stale_tags = []
+        for tag, artifacts in manifest['artifacts'].items():
+            if tag == current_tag:
+                # Incremental builds reuse the artifacts of the last build
+                if incremental_state is None:
+                    stale_tags.append(tag)
+            # The artifacts of other interpreters may stay as long as they would not be shipped
+            elif any(self.artifact_is_shipped(artifact) for artifact in artifacts):
+                stale_tags.append(tag)
+
+        if stale_tags:
+            self.remove_artifacts(manifest, stale_tags)
+
+    @property
+    def source_hashes(self):
+        if self.__source_hashes is None:
+            source_hashes = {}
+            for relative_path, path in self.file_selection['python_files']:
+                source_hashes[relative_path.replace('\\', '/')] = hash_file(path)
+
+            self.__source_hashes = source_hashes
+
+        return self.__source_hashes
+
+    def get_interpreter_info(self, interpreter=None):
+        if interpreter is None:
+            from mypy.version import __version__ as mypy_version
+
+            return {
+                'python': sys.version,
+                'abi': sysconfig.get_config_var('EXT_SUFFIX'),
+                'platform': sysconfig.get_platform(),
+                'mypy': mypy_version,
+                'cache_tag': sys.implementation.cache_tag,
+            }
+
+        executable = shutil.which(interpreter)
+        if executable is None:
+            executable = interpreter if os.path.isabs(interpreter) else os.path.join(self.root, interpreter)
+
+        try:
+            process = subprocess.run(
+                [executable, '-c', INTERPRETER_INFO_SCRIPT],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+        except OSError as e:
+            raise Exception(f'Unable to run the interpreter: {e}') from None
+
+        output = process.stdout.decode('utf-8', errors='replace')
+        if process.returncode:
+            raise Exception(f'Unable to inspect the interpreter, Mypy must be installed:\n{output}')
+
+        info = json.loads(output)
+        info['executable'] = executable
+        return info
+
+    def get_build_settings(self, interpreter=None):
+        from hatch_mypyc.__about__ import __version__
+
+        if interpreter is None:
+            interpreter = self.get_interpreter_info()
+
+        config_files = {}
+        for config_file in MYPY_CONFIG_FILES:
+            path = os.path.join(self.root, config_file)
+            if os.path.isfile(path):
+                config_files[config_file] = hash_file(path)
+
+        return {
+            'hatch-mypyc': __version__,
+            'mypy': interpreter['mypy'],
+            'python': interpreter['python'],
+            'abi': interpreter['abi'],
+            'platform': interpreter['platform'],
+            'options': self.config_options,
+            'shards': self.config_shards,
+            'groups': self.config_groups,
+            'lazy': self.config_lazy,
+            'mypy-args': self.config_mypy_args,
+            'package-source': self.package_source,
+            'compiled-files': self.normalized_included_files,
+            'config-files': config_files,
+            'pgo': self.config_pgo,
+            'build-profile': self.build_profile_flags,
+            'variants': self.config_variants,
+            # Compiler settings are inherited by the build
+            'environment': {name: os.environ.get(name) for name in ('CC', 'CFLAGS', 'CPPFLAGS', 'LDFLAGS', 'LDSHARED')},
+        }
+
+    def get_artifact_cache_key(self, interpreter=None):
+        key_data = self.get_build_settings(interpreter)
+        key_data['sources'] = self.source_hashes
+
+        return hash_data(key_data)
+
+    @property
+    def incremental_state_file(self):
+        return os.path.join(self.persistent_build_dir, 'incremental.json')
+
+    def load_incremental_state(self):
+        try:
+            with open(self.incremental_state_file, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if state.get('settings') != hash_data(self.get_build_settings()):
+            return None
+
+        # The artifacts of the last build may have been built in or out of the project
+        if state.get('root') != os.path.realpath(self.build_root):
+            return None
+
+        # Renamed or deleted modules change the name of the shared library so start over
+        if not all(os.path.isfile(os.path.join(self.build_root, artifact)) for artifact in state['artifacts']):
+            return None
+
+        # As do artifacts that were modified since they were built
+        manifest = None if self.staging else self.load_artifact_manifest()
+        if manifest is not None:
+            recorded_artifacts = manifest['artifacts'].get(sysconfig.get_config_var('EXT_SUFFIX'), {})
+            for artifact in state['artifacts']:
+                if recorded_artifacts.get(artifact) != hash_file(os.path.join(self.root, artifact)):
+                    return None
+
+        return state
+
+    def save_incremental_state(self, dependencies):
+        state = {
+            'settings': hash_data(self.get_build_settings()),
+            'root': os.path.realpath(self.build_root),
+            'sources': self.source_hashes,
+            'dependencies': dependencies,
+            'artifacts': [artifact.replace('\\', '/') for artifact in self.collect_artifacts()],
+        }
+        with open(self.incremental_state_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+    def remove_incremental_state(self):
+        if os.path.isfile(self.incremental_state_file):
+            os.remove(self.incremental_state_file)
+
+    def get_source_dependencies(self, state):
+        from hatch_mypyc.graph import get_dependencies
+
+        modules = sorted(path for path in self.source_hashes if path.endswith('.py'))
+        if state is None or set(state['sources']) != set(self.source_hashes):
+            return get_dependencies(self.root, modules, self.package_source)
+
+        unchanged = {path for path, source_hash in self.source_hashes.items() if state['sources'][path] == source_hash}
+        return get_dependencies(self.root, modules, self.package_source, state['dependencies'], unchanged)
+
+    def get_outdated_modules(self, state, dependencies):
+        from hatch_mypyc.graph import get_dependents
+
+        if set(state['sources']) != set(self.source_hashes):
+            return set(self.normalized_included_files)
+
+        changed = {path for path, source_hash in self.source_hashes.items() if state['sources'][path] != source_hash}
+        # Stubs are not part of the import graph
+        if any(path.endswith('.pyi') for path in changed):
+            return set(self.normalized_included_files)
+
+        affected = get_dependents(state['dependencies'], changed) | get_dependents(dependencies, changed)
+        return affected.intersection(self.normalized_included_files)
+
+    def remove_foreign_artifacts(self, state):
+        # Only remove what the last build did not produce, such as artifacts from other interpreters
+        known_artifacts = {os.path.normpath(os.path.join(self.root, artifact)) for artifact in state['artifacts']}
+        for artifact in self.find_artifacts():
+            if os.path.normpath(artifact) not in known_artifacts:
+                os.remove(artifact)
+
+    def clean(self, versions):
+        manifest = self.load_artifact_manifest()
+        if manifest is None:
+            for artifact in self.find_artifacts():
+                os.remove(artifact)
+        else:
+            self.remove_artifacts(manifest, list(manifest['artifacts']))
+
+        if self.__temp_cache_dir is not None:
+            shutil.rmtree(self.__temp_cache_dir, ignore_errors=True)
 
     @contextmanager
     def get_build_dirs(self):
         with TemporaryDirectory() as temp_dir:
             temp_dir = os.path.realpath(temp_dir)
-            if self.config_build_dir:
-                yield self.config_build_dir, temp_dir
+            if self.persistent_build_dir:
+                os.makedirs(self.persistent_build_dir, exist_ok=True)
+                yield self.persistent_build_dir, temp_dir
             # Prevent temporary files from being written inside the project by both Mypy and setuptools
             else:
                 yield temp_dir, temp_dir
 
-    def initialize(self, version, build_data):
-        if self.target_name != 'wheel':
+    def run_mypyc(self, stats):
+        if not self.normalized_included_files:
+            self.app.display_info('Mypyc was skipped because no modules are selected for compilation')
             return
 
+        if self.config_pgo:
+            self.run_mypyc_with_pgo(stats)
+        else:
+            self.invoke_mypyc(stats)
+
+        for variant in self.variants:
+            self.build_variant(variant, stats)
+
+    def get_mypyc_options(self, target_dir):
+        options = self.config_options.copy()
+        options['target_dir'] = target_dir
+        if self.config_shards > 1 and self.normalized_included_files:
+            options['separate'] = self.get_shards()
+        elif self.config_groups and self.normalized_included_files:
+            options['separate'] = self.get_groups()
+        elif self.config_lazy and self.normalized_included_files:
+            options['separate'] = self.get_lazy_groups()
+
+        return options
+
+    def get_mypy_args(self, mypy_cache_dir):
+        mypy_args = list(self.config_mypy_args)
+        # Prevent horribly breaking users' global environments
+        if installed_in_prefix() and '--install-types' in mypy_args:  # no cov
+            mypy_args.remove('--install-types')
+
+        # Persist Mypy's serialized type state outside of the project, unless configured otherwise
+        if not any(argument.startswith('--cache-dir') for argument in mypy_args):
+            mypy_args.append(f'--cache-dir={mypy_cache_dir}')
+
+        return mypy_args
+
+    def get_build_ext_arguments(self, build_lib, build_temp):
+        arguments = ['build_ext', '--inplace', '--build-lib', build_lib, '--build-temp', build_temp]
+        # Also build extensions concurrently, which is where linking happens
+        if self.config_jobs > 1:
+            arguments.extend(('--parallel', str(self.config_jobs)))
+
+        return arguments
+
+    def get_build_environment(self, flags=()):
+        compiler_cache = self.compiler_cache
+        environment = compiler_cache.get_environment() if compiler_cache is not None else {}
+        # Only set for the build, and compilation flags are also passed to the linker
+        cflags = [*self.build_profile_flags['cflags'], *flags]
+        if cflags:
+            environment['CFLAGS'] = ' '.join(filter(None, (os.environ.get('CFLAGS'), join_flags(*cflags))))
+        if self.build_profile_flags['ldflags']:
+            environment['LDFLAGS'] = ' '.join(
+                filter(None, (os.environ.get('LDFLAGS'), join_flags(*self.build_profile_flags['ldflags'])))
+            )
+
+        return environment
+
+    def invoke_mypyc(self, stats, flags=(), *, force=False):
         # Hopefully there will be an API for this soon:
         # https://github.com/python/mypy/blob/v0.961/mypyc/__main__.py
         with self.get_build_dirs() as (intermediate_build_dir, temp_dir):
             shared_temp_build_dir = os.path.join(intermediate_build_dir, 'build')
             temp_build_dir = os.path.join(intermediate_build_dir, 'tmp')
-            os.mkdir(shared_temp_build_dir)
-            os.mkdir(temp_build_dir)
+            os.makedirs(shared_temp_build_dir, exist_ok=True)
+            os.makedirs(temp_build_dir, exist_ok=True)
+            # Generated C files and extensions are reported relative to this directory
+            stats.source_root = shared_temp_build_dir
+
+            options = self.get_mypyc_options(shared_temp_build_dir)
+            paths = [*self.get_mypy_args(self.prepare_mypy_cache_dir()), *self.normalized_included_files]
+            arguments = self.get_build_ext_arguments(shared_temp_build_dir, temp_build_dir)
+            # Extensions that appear to be up to date were built with different flags
+            if force:
+                arguments.append('--force')
+
+            compiler_cache = self.compiler_cache
+            environment = self.get_build_environment(flags)
+            compiler_cache_stats = compiler_cache.get_stats() if compiler_cache is not None else None
+
+            if self.config_engine == 'in-process':
+                self.run_mypyc_in_process(paths, options, arguments, environment, stats)
+            elif self.staging:
+                self.run_mypyc_in_subprocess(
+                    paths, options, arguments, environment, temp_dir, stats, cwd=self.build_root
+                )
+            else:
+                self.run_mypyc_in_subprocess(paths, options, arguments, environment, temp_dir, stats)
+
+            compilation = stats.as_dict()
+            if compilation['compiled_files']:
+                throughput = compilation['compiled_files'] / max(compilation['compile_time'], 1e-9)
+                self.app.display_info(
+                    f'Mypyc compiled {compilation["compiled_files"]} C files in '
+                    f'{compilation["compile_time"]:.2f} seconds ({throughput:.2f} files/s) '
+                    f'using {self.config_jobs} jobs'
+                )
+
+            if compiler_cache_stats is not None:
+                new_compiler_cache_stats = compiler_cache.get_stats()
+                if new_compiler_cache_stats is not None:
+                    self.app.display_info(
+                        f'Compiler cache ({compiler_cache.name}): '
+                        f'{new_compiler_cache_stats["hits"] - compiler_cache_stats["hits"]} hits, '
+                        f'{new_compiler_cache_stats["misses"] - compiler_cache_stats["misses"]} misses'
+                    )
+
+    def run_mypyc_with_pgo(self, stats):
+        from hatch_mypyc.pgo import get_compiler_family, get_generate_flags, get_use_flags, merge_profiles
+
+        family = get_compiler_family(os.environ.get('CC') or sysconfig.get_config_var('CC') or '')
+        if not family:
+            self.app.display_warning('Profile-guided optimization requires GCC or Clang, building without it')
+            self.invoke_mypyc(stats)
+            return
+
+        pgo_dir = os.path.join(self.cache_dir, 'pgo')
+        key = hash_data({'build': self.get_artifact_cache_key(), 'compiler': family, 'command': self.config_pgo})
+        profile_dir = os.path.join(pgo_dir, key)
+        marker_file = os.path.join(profile_dir, '.complete')
+        if os.path.isfile(marker_file):
+            self.app.display_info('Mypyc is reusing PGO profiles of the unchanged sources')
+        else:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            os.makedirs(profile_dir)
+
+            self.app.display_info('Mypyc is building instrumented extensions for PGO')
+            self.invoke_mypyc(stats, get_generate_flags(family, profile_dir), force=True)
+            with stats.measure('training'):
+                self.run_pgo_training()
+
+            if family == 'clang':
+                merge_profiles(profile_dir)
+
+            with open(marker_file, 'w', encoding='utf-8'):
+                pass
+
+            # Only the profiles of the current sources are useful
+            for entry in os.listdir(pgo_dir):
+                if entry != key:
+                    shutil.rmtree(os.path.join(pgo_dir, entry), ignore_errors=True)
+
+        self.app.display_info('Mypyc is building optimized extensions using PGO profiles')
+        self.invoke_mypyc(stats, get_use_flags(family, profile_dir), force=True)
+
+    def get_shared_libraries(self):
+        # Every compiled module is a small extension that imports its code from a shared library
+        ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+        return [
+            os.path.join(self.build_root, artifact)
+            for artifact in self.collect_artifacts()
+            if artifact.endswith(ext_suffix) and artifact[: -len(ext_suffix)].endswith('__mypyc')
+        ]
+
+    def build_variant(self, variant, stats):
+        from hatch_mypyc.dispatch import get_variant_tag
+
+        self.app.display_info(f'Mypyc is building extensions for {variant}')
+        with TemporaryDirectory() as backup_dir:
+            backups = {}
+            for i, artifact in enumerate(self.collect_artifacts()):
+                backups[os.path.join(self.build_root, artifact)] = os.path.join(backup_dir, str(i))
+
+            for artifact, backup in backups.items():
+                shutil.move(artifact, backup)
+
+            self.invoke_mypyc(stats, [f'-march={variant}'], force=True)
+
+            # The variant of `pkg/foo__mypyc.<ext_suffix>` is `pkg/foo__mypyc.<tag>.<ext_suffix>`
+            ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+            for shared_library in self.get_shared_libraries():
+                os.replace(
+                    shared_library, f'{shared_library[: -len(ext_suffix)]}.{get_variant_tag(variant)}{ext_suffix}'
+                )
+
+            # The extensions that import the shared libraries are the same for every variant
+            for artifact, backup in backups.items():
+                if os.path.exists(artifact):
+                    os.remove(artifact)
+
+                shutil.move(backup, artifact)
+
+    def stage_sources(self, staging_dir):
+        # Mypy reads its configuration from the current directory
+        paths = [*self.source_hashes, *MYPY_CONFIG_FILES]
+        staged_paths = set()
+        for relative_path in paths:
+            path = os.path.join(self.root, relative_path)
+            if not os.path.isfile(path):
+                continue
+
+            staged_path = os.path.join(staging_dir, relative_path)
+            staged_paths.add(os.path.normpath(staged_path))
+            # Copies preserve the modification time so unchanged files are only copied once
+            try:
+                source_stat = os.stat(path)
+                staged_stat = os.stat(staged_path)
+            except OSError:
+                pass
+            else:
+                if (source_stat.st_size, source_stat.st_mtime_ns) == (staged_stat.st_size, staged_stat.st_mtime_ns):
+                    continue
+
+            os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+            shutil.copy2(path, staged_path)
+
+        # Sources that were deleted since they were staged must not be compiled
+        for root, _, files in os.walk(staging_dir):
+            for f in files:
+                staged_path = os.path.normpath(os.path.join(root, f))
+                if f.endswith(('.py', '.pyi')) and staged_path not in staged_paths:
+                    os.remove(staged_path)
+
+    def prebuild_artifacts(self, interpreter, info):
+        from hatch_mypyc.runner import BuildStats
 
-            options = self.config_options.copy()
-            options['target_dir'] = shared_temp_build_dir
+        with TemporaryDirectory() as temp_dir:
+            staging_dir = os.path.join(temp_dir, 'project')
+            shared_temp_build_dir = os.path.join(temp_dir, 'build')
+            temp_build_dir = os.path.join(temp_dir, 'tmp')
+            os.makedirs(shared_temp_build_dir)
+            os.makedirs(temp_build_dir)
+            self.stage_sources(staging_dir)
+
+            stats = BuildStats(shared_temp_build_dir)
+            self.run_mypyc_in_subprocess(
+                [
+                    *self.get_mypy_args(self.prepare_mypy_cache_dir(info['cache_tag'], info['mypy'])),
+                    *self.normalized_included_files,
+                ],
+                self.get_mypyc_options(shared_temp_build_dir),
+                self.get_build_ext_arguments(shared_temp_build_dir, temp_build_dir),
+                self.get_build_environment(),
+                temp_dir,
+                stats,
+                interpreter=info['executable'],
+                cwd=staging_dir,
+                label=interpreter,
+            )
+            self.artifact_cache.store(
+                self.get_artifact_cache_key(info), staging_dir, self.collect_artifacts(staging_dir, info['abi'])
+            )
+
+    def prebuild_interpreters(self):
+        if self.artifact_cache is None:
+            self.app.display_warning('Prebuilding for other interpreters requires the artifact cache, skipping them')
+            return
+        elif self.config_pgo or self.variants:
+            self.app.display_warning(
+                'Prebuilding for other interpreters is not supported with PGO or variants, skipping them'
+            )
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        artifact_cache = self.artifact_cache
+        keys = {self.get_artifact_cache_key()}
+        pending = {}
+        for interpreter in self.config_interpreters:
+            try:
+                info = self.get_interpreter_info(interpreter)
+            except Exception as e:
+                self.app.display_warning(f'Mypyc could not prebuild artifacts for `{interpreter}`: {e}')
+                continue
+
+            # The interpreter performing the build or another one with the same settings
+            key = self.get_artifact_cache_key(info)
+            if key in keys:
+                continue
+
+            keys.add(key)
+            if artifact_cache.contains(key):
+                self.app.display_info(f'Mypyc artifacts for `{interpreter}` are already cached')
+            else:
+                pending[interpreter] = info
+
+        if not pending:
+            return
+
+        self.app.display_info(f'Mypyc is prebuilding artifacts for {len(pending)} other interpreters')
+        # Each build mostly waits on its own processes
+        with ThreadPoolExecutor(len(pending)) as executor:
+            futures = {
+                interpreter: executor.submit(self.prebuild_artifacts, interpreter, info)
+                for interpreter, info in pending.items()
+            }
+            for interpreter, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    self.app.display_warning(f'Mypyc could not prebuild artifacts for `{interpreter}`: {e}')
+                else:
+                    self.app.display_info(f'Mypyc prebuilt and cached artifacts for `{interpreter}`')
+
+    def run_pgo_training(self):
+        # The instrumented extensions are built next to the sources
+        python_path = [os.path.join(self.build_root, self.package_source)]
+        if os.environ.get('PYTHONPATH'):
+            python_path.append(os.environ['PYTHONPATH'])
+
+        command = list(self.config_pgo)
+        # Train using the interpreter that is building the extensions, whose path may differ between builds
+        if command[0] == 'python':
+            command[0] = sys.executable
+
+        process = subprocess.run(
+            command,
+            # The current directory comes first on the search path when running modules or code, so the sources of
+            # flat layouts in the project would otherwise be imported rather than the staged extensions
+            cwd=self.build_root if self.staging else self.root,
+            env={**os.environ, 'PYTHONPATH': os.pathsep.join(python_path)},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        if process.returncode:
+            raise Exception(f'Error while running the PGO training command:\n{process.stdout.decode("utf-8")}')
+
+    def write_runner_config(self, config_file, paths, options, stats_file, source_root):
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump(
+                {
+                    'jobs': self.config_jobs,
+                    'stats_file': stats_file,
+                    'source_root': source_root,
+                    'package_source': self.package_source,
+                    'paths': paths,
+                    'options': options,
+                },
+                f,
+            )
+
+    def run_mypyc_in_subprocess(
+        self, paths, options, arguments, environment, temp_dir, stats, *, interpreter=None, cwd=None, label=''
+    ):
+        stats_file = os.path.join(temp_dir, 'stats.json')
+        runner_config_file = os.path.join(temp_dir, 'runner.json')
+        self.write_runner_config(runner_config_file, paths, options, stats_file, stats.source_root)
+
+        with BuildOutput(self.app, self.config_log_file, label=label) as output:
+            # Display output as soon as it is written
+            with subprocess.Popen(
+                [interpreter or sys.executable, RUNNER_SCRIPT, runner_config_file, *arguments],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                cwd=cwd or self.root,
+                env={**os.environ, **environment, 'PYTHONUNBUFFERED': '1'},
+                encoding='utf-8',
+                errors='replace',
+            ) as process:
+                for line in process.stdout:
+                    output.write_line(line)
+
+        if process.returncode:
+            raise Exception(f'Error while invoking Mypyc:\n{output.get_error_output()}')
+
+        with open(stats_file, encoding='utf-8') as f:
+            stats.merge(json.load(f))
+
+    def run_mypyc_in_process(self, paths, options, arguments, environment, stats):
+        from contextlib import redirect_stderr, redirect_stdout
+
+        from hatch_mypyc.runner import build_extensions, instrument_build
+
+        # Paths are relative to the project root and are used to determine where extensions are placed
+        origin = os.getcwd()
+        original_environment = {name: os.environ.get(name) for name in environment}
+        os.chdir(self.build_root)
+        os.environ.update(environment)
+        try:
+            with BuildOutput(self.app, self.config_log_file) as output:
+                stats.on_progress = output.update_progress
+                try:
+                    with instrument_build(self.config_jobs, stats), redirect_stdout(output), redirect_stderr(output):
+                        build_extensions(self.package_source, paths, options, arguments)
+                # Mypyc exits after displaying errors
+                except (Exception, SystemExit) as e:  # no cov
+                    raise Exception(f'Error while invoking Mypyc:\n{output.get_error_output()}\n{e}') from None
+        finally:
+            stats.on_progress = None
+            os.chdir(origin)
+            for name, value in original_environment.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+    def build_extensions(self, incremental_state, stats):
+        if not self.config_incremental:
+            self.run_mypyc(stats)
+            return
+
+        dependencies = self.get_source_dependencies(incremental_state)
+        if incremental_state is None:
+            self.run_mypyc(stats)
+        else:
+            outdated_modules = self.get_outdated_modules(incremental_state, dependencies)
+            self.app.display_info(
+                f'Mypyc incremental build: {len(outdated_modules)} of '
+                f'{len(self.normalized_included_files)} modules are outdated'
+            )
+            # Mypyc only rewrites the C files that changed and setuptools skips extensions that are up-to-date
+            if outdated_modules:
+                self.run_mypyc(stats)
+
+        self.save_incremental_state(dependencies)
+
+    def report_timings(self, stats):
+        report = stats.as_dict()
+        summary = ', '.join(
+            f'{phase.replace("_", " ")} {timing["wall_time"]:.2f}s' for phase, timing in report['phases'].items()
+        )
+        self.app.display_info(f'Mypyc build phases: {summary}')
+
+        if self.config_timing_report:
+            report = {
+                'python': platform.python_version(),
+                'platform': sysconfig.get_platform(),
+                'engine': self.config_engine,
+                'jobs': self.config_jobs,
+                **report,
+            }
+            os.makedirs(os.path.dirname(self.config_timing_report), exist_ok=True)
+            with open(self.config_timing_report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+                f.write('\n')
+
+    def run_benchmarks(self, compiled, benchmarks, imports=(), pycache_prefix=''):
+        """
+        Return the results of the benchmarks and the time spent executing every imported module, excluding
+        the modules that it imports.
+        """
+        environment = dict(os.environ)
+        if pycache_prefix:
+            environment['PYTHONPYCACHEPREFIX'] = pycache_prefix
+
+        with TemporaryDirectory() as temp_dir:
+            config_file = os.path.join(temp_dir, 'benchmark.json')
+            output_file = os.path.join(temp_dir, 'results.json')
+            with open(config_file, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {
+                        'path': os.path.join(self.build_root, self.package_source),
+                        'compiled': compiled,
+                        'benchmarks': benchmarks,
+                        'imports': list(imports),
+                        'repeat': self.config_benchmark_repeat,
+                        'output': output_file,
+                    },
+                    f,
+                )
+
+            # Use a fresh interpreter so that compiled and pure Python modules are never mixed
+            process = subprocess.run(
+                [sys.executable, '-X', 'importtime', BENCHMARK_SCRIPT, config_file],
+                capture_output=True,
+                cwd=temp_dir,
+                env=environment,
+            )
+            if process.returncode:
+                raise Exception(
+                    f'Error while running benchmarks:\n{process.stdout.decode("utf-8")}{process.stderr.decode("utf-8")}'
+                )
 
-            mypy_args = list(self.config_mypy_args)
-            # Prevent horribly breaking users' global environments
-            if installed_in_prefix() and '--install-types' in mypy_args:  # no cov
-                mypy_args.remove('--install-types')
+            import_times = {}
+            for line in process.stderr.decode('utf-8').splitlines():
+                match = IMPORT_TIME.match(line)
+                if match is not None:
+                    import_times[match.group('module')] = int(match.group('self')) / 1_000_000
+
+            with open(output_file, encoding='utf-8') as f:
+                return json.load(f), import_times
+
+    def compile_bytecode(self, pycache_prefix):
+        # Compiling every source is not part of importing it once it is installed
+        sources = [
+            os.path.join(self.build_root, relative_path)
+            for relative_path in self.source_hashes
+            if relative_path.endswith('.py')
+        ]
+        process = subprocess.run(
+            [sys.executable, '-m', 'compileall', '-q', '-i', '-'],
+            input='\n'.join(sources).encode('utf-8'),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env={**os.environ, 'PYTHONPYCACHEPREFIX': pycache_prefix},
+        )
+        if process.returncode:
+            raise Exception(f'Error while compiling bytecode:\n{process.stdout.decode("utf-8")}')
+
+    def get_module_libraries(self, artifacts):
+        """Return the shared library that initializes every compiled module, for those that have one."""
+        from hatch_mypyc.graph import get_module_name
+
+        package_source = self.package_source.replace('\\', '/')
+        libraries = self.get_shared_library_names(artifacts)
+        separate = self.get_mypyc_options('').get('separate', False)
+
+        module_libraries = {}
+        for relative_path in self.normalized_included_files:
+            module_name = get_module_name(relative_path, package_source)
+            if isinstance(separate, list):
+                library = next((f'{name}__mypyc' for files, name in separate if relative_path in files), '')
+            elif separate:
+                library = f'{module_name}__mypyc'
+            # Every module is in the only shared library
+            elif len(libraries) == 1:
+                library = next(iter(libraries))
+            else:
+                continue
+
+            if library in libraries:
+                module_libraries[module_name] = library
 
-            setup_file = os.path.join(temp_dir, 'setup.py')
-            with open(setup_file, 'w', encoding='utf-8') as f:
-                f.write(
-                    construct_setup_file(self.package_source, *mypy_args, *self.normalized_included_files, **options)
+        return module_libraries
+
+    def measure_startup(self, module_name, preload, libraries):
+        """Return the time it takes to import the module in a fresh interpreter and the shared libraries it loads."""
+        with TemporaryDirectory() as temp_dir:
+            config_file = os.path.join(temp_dir, 'benchmark.json')
+            output_file = os.path.join(temp_dir, 'results.json')
+            with open(config_file, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {
+                        'path': os.path.join(self.build_root, self.package_source),
+                        'compiled': True,
+                        'startup': {'module_name': module_name, 'preload': preload, 'libraries': libraries},
+                        'output': output_file,
+                    },
+                    f,
                 )
 
-            # We don't know the exact naming scheme of the files produced using this interpreter,
-            # so always clean to prevent including files from other runs
-            self.clean([version])
+            process = subprocess.run(
+                [sys.executable, BENCHMARK_SCRIPT, config_file],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                cwd=temp_dir,
+            )
+            if process.returncode:
+                raise Exception(f'Error while importing `{module_name}`:\n{process.stdout.decode("utf-8")}')
+
+            with open(output_file, encoding='utf-8') as f:
+                return json.load(f)
+
+    def report_import_times(self, artifacts):
+        libraries = sorted(self.get_shared_library_names(artifacts))
 
-            with self.hide_project_file():
-                process = subprocess.run(
+        rows = [['Module', 'Libraries', 'Eager', 'Lazy', 'Speedup']]
+        for module_name in self.config_import_report:
+            # Loading every shared library first is what happens when all modules share a single one
+            eager = min(
+                self.measure_startup(module_name, libraries, libraries)['time']
+                for _ in range(self.config_benchmark_repeat)
+            )
+            lazy_results = [
+                self.measure_startup(module_name, [], libraries) for _ in range(self.config_benchmark_repeat)
+            ]
+            lazy = min(result['time'] for result in lazy_results)
+
+            rows.append(
+                [
+                    module_name,
+                    f'{len(lazy_results[0]["libraries"])} of {len(libraries)}',
+                    format_duration(eager),
+                    format_duration(lazy),
+                    f'{eager / max(lazy, 1e-9):.2f}x',
+                ]
+            )
+
+        self.app.display_info(f'Mypyc import times:\n{format_table(rows)}')
+
+    @property
+    def speedups_file(self):
+        return os.path.join(self.cache_dir, 'speedups.json')
+
+    def get_speedup_settings(self):
+        from mypy.version import __version__ as mypy_version
+
+        return {
+            'mypy': mypy_version,
+            'python': sys.version,
+            'abi': sysconfig.get_config_var('EXT_SUFFIX'),
+            'options': self.config_options,
+            'mypy-args': self.config_mypy_args,
+            'benchmarks': self.config_benchmarks,
+            'min-speedup': self.config_min_speedup,
+        }
+
+    def load_speedups(self):
+        try:
+            with open(self.speedups_file, encoding='utf-8') as f:
+                speedups = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if speedups.get('settings') != hash_data(self.get_speedup_settings()):
+            return {}
+
+        return speedups['modules']
+
+    @property
+    def slow_modules(self):
+        if self.__slow_modules is None:
+            self.__slow_modules = {
+                relative_path
+                for relative_path, decision in self.load_speedups().items()
+                if not decision['compile'] and decision['hash'] == self.source_hashes.get(relative_path)
+            }
+
+        return self.__slow_modules
+
+    def measure_speedups(self, artifacts):
+        """
+        Time every compiled module that changed since it was last measured, both compiled and interpreted, and
+        return whether any of them should no longer be compiled. Modules are measured using the benchmarks that
+        they define or, if there are none, the time it takes to import them.
+        """
+        from statistics import geometric_mean, mean
+
+        from hatch_mypyc.graph import get_module_name
+
+        speedups = self.load_speedups()
+        package_source = self.package_source.replace('\\', '/')
+        pending = {
+            get_module_name(relative_path, package_source): relative_path
+            for relative_path in self.normalized_included_files
+            if speedups.get(relative_path, {}).get('hash') != self.source_hashes.get(relative_path)
+        }
+        if not pending:
+            return False
+
+        entry_points = {}
+        for benchmark in self.config_benchmarks:
+            module_name = benchmark.partition(':')[0]
+            if module_name in pending:
+                entry_points.setdefault(module_name, []).append(benchmark)
+
+        benchmarks = [benchmark for module_benchmarks in entry_points.values() for benchmark in module_benchmarks]
+        results = {}
+        import_times = {}
+        with TemporaryDirectory() as pycache_prefix:
+            # Modules are imported from bytecode once installed, which is kept outside of the project
+            self.compile_bytecode(pycache_prefix)
+            for compiled in (False, True):
+                results[compiled], import_times[compiled] = self.run_benchmarks(
+                    compiled, benchmarks, pending, pycache_prefix
+                )
+                # Importing happens once per interpreter so use the fastest of several
+                for _ in range(self.config_benchmark_repeat - 1):
+                    for module_name, seconds in self.run_benchmarks(compiled, [], pending, pycache_prefix)[1].items():
+                        import_times[compiled][module_name] = min(
+                            import_times[compiled].get(module_name, seconds), seconds
+                        )
+
+        # Shared libraries are imported by the first module that needs them, so their time is split between
+        # all of the modules that they initialize
+        module_libraries = self.get_module_libraries(artifacts)
+        library_sizes = {}
+        for library in module_libraries.values():
+            library_sizes[library] = library_sizes.get(library, 0) + 1
+
+        for module_name in pending:
+            library = module_libraries.get(module_name)
+            if library in import_times[True] and module_name in import_times[True]:
+                import_times[True][module_name] += import_times[True][library] / library_sizes[library]
+
+        rows = [['Module', 'Measured by', 'Speedup', 'Compiled']]
+        for module_name, relative_path in sorted(pending.items()):
+            if module_name in entry_points:
+                method = f'{len(entry_points[module_name])} benchmark(s)'
+                speedup = geometric_mean(
                     [
-                        sys.executable,
-                        setup_file,
-                        'build_ext',
-                        '--inplace',
-                        '--build-lib',
-                        shared_temp_build_dir,
-                        '--build-temp',
-                        temp_build_dir,
-                    ],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
+                        mean(results[False][benchmark]['times']) / mean(results[True][benchmark]['times'])
+                        for benchmark in entry_points[module_name]
+                    ]
+                )
+            elif module_name in import_times[False] and module_name in import_times[True]:
+                method = 'import'
+                speedup = max(import_times[False][module_name], 1e-6) / max(import_times[True][module_name], 1e-6)
+            else:
+                method = 'nothing'
+                speedup = None
+
+            compile_module = speedup is None or speedup >= self.config_min_speedup
+            speedups[relative_path] = {
+                'hash': self.source_hashes.get(relative_path),
+                'speedup': speedup,
+                'compile': compile_module,
+            }
+            rows.append(
+                [
+                    relative_path,
+                    method,
+                    '-' if speedup is None else f'{speedup:.2f}x',
+                    'yes' if compile_module else 'no',
+                ]
+            )
+
+        self.app.display_info(f'Mypyc module speedups (minimum {self.config_min_speedup:.2f}x):\n{format_table(rows)}')
+
+        os.makedirs(os.path.dirname(self.speedups_file), exist_ok=True)
+        with open(self.speedups_file, 'w', encoding='utf-8') as f:
+            json.dump(
+                {
+                    'settings': hash_data(self.get_speedup_settings()),
+                    # Forget about files that no longer exist
+                    'modules': {path: speedups[path] for path in sorted(speedups) if path in self.source_hashes},
+                },
+                f,
+                indent=2,
+            )
+
+        return not all(speedups[relative_path]['compile'] for relative_path in pending.values())
+
+    def report_speedups(self):
+        from statistics import mean, stdev
+
+        from hatch_mypyc.graph import get_module_name
+
+        modules = {
+            get_module_name(relative_path, self.package_source.replace(os.sep, '/')): relative_path
+            for relative_path in self.normalized_included_files
+        }
+        interpreted_results, _ = self.run_benchmarks(False, self.config_benchmarks)
+        compiled_results, _ = self.run_benchmarks(True, self.config_benchmarks)
+
+        rows = [['Benchmark', 'Module', 'Interpreted', 'Compiled', 'Speedup']]
+        for benchmark in self.config_benchmarks:
+            interpreted = interpreted_results[benchmark]
+            compiled = compiled_results[benchmark]
+            interpreted_mean, interpreted_stdev = mean(interpreted['times']), stdev(interpreted['times'])
+            compiled_mean, compiled_stdev = mean(compiled['times']), stdev(compiled['times'])
+
+            # Propagate the relative standard deviation of both measurements to their ratio
+            speedup = interpreted_mean / compiled_mean
+            speedup_stdev = (
+                speedup * ((interpreted_stdev / interpreted_mean) ** 2 + (compiled_stdev / compiled_mean) ** 2) ** 0.5
+            )
+
+            module = modules.get(compiled['module'], compiled['module'])
+            if not compiled['compiled']:
+                module = f'{module} (not compiled)'
+
+            rows.append(
+                [
+                    benchmark,
+                    module,
+                    f'{format_duration(interpreted_mean)} ± {format_duration(interpreted_stdev)}',
+                    f'{format_duration(compiled_mean)} ± {format_duration(compiled_stdev)}',
+                    f'{speedup:.2f}x ± {speedup_stdev:.2f}',
+                ]
+            )
+
+        self.app.display_info(f'Mypyc speedups:\n{format_table(rows)}')
+
+    def build(self, version, stats):
+        with stats.measure('artifact_collection'):
+            incremental_state = self.load_incremental_state() if self.config_incremental else None
+            if self.staging:
+                self.stage_build_root(incremental_state)
+            else:
+                self.remove_stale_artifacts(incremental_state)
+
+        artifact_cache = self.artifact_cache
+        remote_cache = self.remote_cache
+        if artifact_cache is None and remote_cache is None:
+            self.build_extensions(incremental_state, stats)
+        else:
+            with stats.measure('artifact_collection'):
+                artifact_cache_key = self.get_artifact_cache_key()
+                cache_hit = (
+                    artifact_cache is not None
+                    and artifact_cache.restore(artifact_cache_key, self.build_root) is not None
+                )
+                remote_cache_hit = (
+                    not cache_hit and remote_cache is not None and self.restore_remote_artifacts(artifact_cache_key)
+                )
+
+            if not cache_hit and not remote_cache_hit:
+                self.build_extensions(incremental_state, stats)
+                if remote_cache is not None:
+                    with stats.measure('artifact_collection'):
+                        self.store_remote_artifacts(artifact_cache_key)
+            elif self.config_incremental:
+                # The restored artifacts were not built from the sources that the state describes
+                self.remove_incremental_state()
+
+            if artifact_cache is not None:
+                if not cache_hit:
+                    with stats.measure('artifact_collection'):
+                        artifact_cache.store(artifact_cache_key, self.build_root, self.collect_artifacts())
+
+                cache_stats = artifact_cache.stats()
+                self.app.display_info(
+                    f'Mypyc artifact cache {"hit" if cache_hit else "miss"}: '
+                    f'{cache_stats["hits"]} hits, {cache_stats["misses"]} misses, '
+                    f'{cache_stats["entries"]} entries totaling {cache_stats["bytes"]} bytes'
                 )
-            if process.returncode:  # no cov
-                raise Exception(f'Error while invoking Mypyc:\n{process.stdout.decode("utf-8")}')
+
+        with stats.measure('artifact_collection'):
+            artifacts = self.collect_artifacts()
+            # The project is never modified when staging
+            if not self.staging:
+                self.record_artifacts(artifacts)
+
+        return artifacts
+
+    def restore_remote_artifacts(self, key):
+        try:
+            restored = self.remote_cache.restore(key, self.build_root) is not None
+        except Exception as e:
+            self.app.display_warning(f'Mypyc could not read from the remote cache, building locally: {e}')
+            return False
+
+        self.app.display_info(f'Mypyc remote cache {"hit" if restored else "miss"}')
+        return restored
+
+    def store_remote_artifacts(self, key):
+        try:
+            self.remote_cache.store_async(key, self.build_root, self.collect_artifacts())
+        except Exception as e:
+            self.app.display_warning(f'Mypyc could not write to the remote cache: {e}')
+
+    def wait_for_remote_uploads(self):
+        timeout = self.config_remote_cache_timeout
+        pending = self.remote_cache.wait(timeout)
+        for error in self.remote_cache.errors:
+            self.app.display_warning(f'Mypyc could not write to the remote cache: {error}')
+
+        if pending:
+            self.app.display_warning(
+                f'Mypyc stopped waiting for {pending} remote cache upload(s) after {timeout} seconds'
+            )
+
+    def stage_build_root(self, incremental_state):
+        # Only incremental builds reuse the artifacts of the last build
+        if incremental_state is None:
+            shutil.rmtree(self.build_root, ignore_errors=True)
+
+        os.makedirs(self.build_root, exist_ok=True)
+        self.stage_sources(self.build_root)
+
+    def get_generated_dir(self):
+        # Generated files must exist until the wheel is written
+        if self.__generated_dir is None:
+            from tempfile import mkdtemp
+
+            self.__generated_dir = mkdtemp()
+
+        return self.__generated_dir
+
+    def get_build_profile_metadata(self):
+        metadata_file = os.path.join(self.get_generated_dir(), 'mypyc.json')
+        with open(metadata_file, 'w', encoding='utf-8') as f:
+            json.dump({'build-profile': self.config_build_profile, **self.build_profile_flags}, f, indent=2)
+            f.write('\n')
+
+        return {metadata_file: 'mypyc.json'}
+
+    def get_variant_loader(self):
+        package_root = os.path.join(self.build_root, self.package_source)
+        ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+        modules = sorted(
+            os.path.relpath(shared_library, package_root)[: -len(ext_suffix)].replace(os.sep, '.')
+            for shared_library in self.get_shared_libraries()
+        )
+
+        with open(DISPATCH_SCRIPT, encoding='utf-8') as f:
+            source = f.read()
+
+        source = source.replace('VARIANTS: list[str] = []', f'VARIANTS: list[str] = {self.variants!r}', 1)
+        source = source.replace('MODULES: list[str] = []', f'MODULES: list[str] = {modules!r}', 1)
+        source += '\n\ninstall()\n'
+
+        # Files ending with `.pth` in site-packages are processed at startup, which is the only opportunity to
+        # select the shared libraries before any compiled module imports them
+        loader_name = f'_{re.sub(r"[^a-z0-9]+", "_", self.metadata.name.lower())}_mypyc_variants'
+        loader_file = os.path.join(self.get_generated_dir(), f'{loader_name}.py')
+        with open(loader_file, 'w', encoding='utf-8') as f:
+            f.write(source)
+
+        path_file = os.path.join(self.get_generated_dir(), f'{loader_name}.pth')
+        with open(path_file, 'w', encoding='utf-8') as f:
+            f.write(f'import {loader_name}\n')
+
+        return {loader_file: f'{loader_name}.py', path_file: f'{loader_name}.pth'}
+
+    def get_recompile_command(self):
+        # The runner is copied so that recompiling does not require this package
+        runner_script = os.path.join(self.persistent_build_dir, 'runner.py')
+        shutil.copy2(RUNNER_SCRIPT, runner_script)
+
+        shared_temp_build_dir = os.path.join(self.persistent_build_dir, 'build')
+        temp_build_dir = os.path.join(self.persistent_build_dir, 'tmp')
+        runner_config_file = os.path.join(self.persistent_build_dir, 'runner.json')
+        self.write_runner_config(
+            runner_config_file,
+            [*self.get_mypy_args(self.prepare_mypy_cache_dir()), *self.normalized_included_files],
+            self.get_mypyc_options(shared_temp_build_dir),
+            os.path.join(self.persistent_build_dir, 'stats.json'),
+            shared_temp_build_dir,
+        )
+
+        return {
+            'command': [
+                runner_script,
+                runner_config_file,
+                *self.get_build_ext_arguments(shared_temp_build_dir, temp_build_dir),
+            ],
+            'environment': self.get_build_environment(),
+        }
+
+    def get_shared_library_names(self, artifacts):
+        """Return the module names of the shared libraries among the artifacts mapped to their paths."""
+        suffix = f'__mypyc{sysconfig.get_config_var("EXT_SUFFIX")}'
+        package_source = self.package_source.replace('\\', '/')
+        package_root = f'{package_source}/' if package_source else ''
+
+        libraries = {}
+        for artifact in artifacts:
+            artifact = artifact.replace('\\', '/')
+            if artifact.endswith(suffix):
+                libraries[artifact[len(package_root) : -len(suffix)].replace('/', '.') + '__mypyc'] = artifact
+
+        return libraries
+
+    def get_editable_hook(self, artifacts):
+        from hatch_mypyc.editable import publish
+        from hatch_mypyc.graph import get_dependencies, get_module_name, get_transitive_dependencies
+
+        ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+        package_source = self.package_source.replace('\\', '/')
+        artifacts = [artifact.replace('\\', '/') for artifact in artifacts]
+        sources = [path for path in self.normalized_included_files if path.endswith('.py')]
+        dependencies = get_dependencies(self.root, sources, self.package_source)
+
+        modules = {}
+        for source in sources:
+            artifact = f'{os.path.splitext(source)[0]}{ext_suffix}'
+            if artifact not in artifacts:
+                continue
+
+            modules[get_module_name(source, package_source)] = {
+                'source': source,
+                'artifact': artifact,
+                'package': os.path.basename(source).startswith('__init__.'),
+                'dependencies': sorted(
+                    get_module_name(path, package_source)
+                    for path in get_transitive_dependencies(dependencies, {source})
+                    if path != source
+                ),
+            }
+
+        # The shared libraries that the compiled modules import
+        libraries = self.get_shared_library_names(artifacts)
+
+        source_states = {}
+        for module in modules.values():
+            stat = os.stat(os.path.join(self.root, module['source']))
+            source_states[module['source']] = [stat.st_size, stat.st_mtime_ns, self.source_hashes[module['source']]]
+
+        manifest_file = os.path.join(self.persistent_build_dir, 'editable.json')
+        manifest = {
+            'root': self.root,
+            'staging': self.build_root,
+            'artifacts': artifacts,
+            'modules': modules,
+            'libraries': libraries,
+            'sources': source_states,
+            'recompile': self.get_recompile_command() if self.config_editable == 'recompile' else None,
+        }
+        publish(manifest_file, manifest, self.build_root)
+
+        packages = sorted({name.partition('.')[0] for name in [*modules, *libraries]})
+        with open(EDITABLE_SCRIPT, encoding='utf-8') as f:
+            source = f.read()
+
+        source = source.replace("MANIFEST = ''", f'MANIFEST = {manifest_file!r}', 1)
+        source = source.replace('PACKAGES: list[str] = []', f'PACKAGES: list[str] = {packages!r}', 1)
+
+        # The hook must be installed at startup before any module of the project is imported
+        hook_name = f'_{re.sub(r"[^a-z0-9]+", "_", self.metadata.name.lower())}_mypyc_editable'
+        hook_file = os.path.join(self.get_generated_dir(), f'{hook_name}.py')
+        with open(hook_file, 'w', encoding='utf-8') as f:
+            f.write(source)
+
+        path_file = os.path.join(self.get_generated_dir(), f'{hook_name}.pth')
+        with open(path_file, 'w', encoding='utf-8') as f:
+            f.write(f'import {hook_name}; {hook_name}.install()\n')
+
+        return {hook_file: f'{hook_name}.py', path_file: f'{hook_name}.pth'}
+
+    def initialize(self, version, build_data):
+        if self.target_name != 'wheel':
+            return
+        elif version == 'editable':
+            if self.config_editable == 'off':
+                return
+
+            self.__editable = True
+
+        # Held until the wheel that contains the artifacts is written
+        build_lock = self.build_lock
+        if build_lock is not None:
+            build_lock.acquire(self.app.display_info)
+
+        try:
+            self.initialize_wheel(version, build_data)
+        except BaseException:
+            if build_lock is not None:
+                build_lock.release()
+            raise
+
+    def initialize_wheel(self, version, build_data):
+        from hatch_mypyc.runner import BuildStats
+
+        if self.config_log_file:
+            # Every invocation of Mypyc during this build appends to the log
+            os.makedirs(os.path.dirname(self.config_log_file), exist_ok=True)
+            with open(self.config_log_file, 'w', encoding='utf-8'):
+                pass
+
+        stats = BuildStats()
+        with stats.measure('file_selection'):
+            _ = self.normalized_included_files
+
+        artifacts = self.build(version, stats)
+        if self.config_exclude_slow and self.measure_speedups(artifacts):
+            # Remove the artifacts of the modules that will no longer be compiled before building again
+            if self.staging:
+                for artifact in artifacts:
+                    os.remove(os.path.join(self.build_root, artifact))
+            else:
+                self.remove_artifacts(self.load_artifact_manifest(), [sysconfig.get_config_var('EXT_SUFFIX')])
+            self.reset_included_files()
+            artifacts = self.build(version, stats)
 
         # Success, now finalize build data
-        build_data['infer_tag'] = True
-        build_data['pure_python'] = False
-        build_data['artifacts'].extend(self.artifact_patterns)
-        build_data['force_include'].update(self.get_forced_inclusion_map())
+        if self.editable:
+            with stats.measure('artifact_collection'):
+                force_include = build_data.setdefault('force_include_editable', {})
+                # Files that are included explicitly would otherwise be replaced
+                if not force_include:
+                    force_include.update(self.build_config.force_include)
+
+                force_include.update(self.get_editable_hook(artifacts))
+
+            self.report_timings(stats)
+            return
+
+        with stats.measure('artifact_collection'):
+            build_data['infer_tag'] = True
+            build_data['pure_python'] = False
+            # Match the exact paths starting at the project root
+            if not self.config_staging:
+                build_data['artifacts'].extend(f'/{artifact}'.replace('\\', '/') for artifact in artifacts)
+            build_data['force_include'].update(self.get_forced_inclusion_map(artifacts))
+            if self.config_build_profile:
+                build_data.setdefault('extra_metadata', {}).update(self.get_build_profile_metadata())
+            if self.variants:
+                build_data['force_include'].update(self.get_variant_loader())
+
+        if self.config_interpreters:
+            self.prebuild_interpreters()
+
+        self.report_timings(stats)
+
+        if self.config_benchmarks:
+            self.report_speedups()
+
+        if self.config_import_report:
+            self.report_import_times(artifacts)
+
+    def finalize(self, version, build_data, artifact_path):
+        if self.__file_selection is not None:
+            self.save_file_selection()
+
+        if self.__generated_dir is not None:
+            shutil.rmtree(self.__generated_dir, ignore_errors=True)
+
+        # Staged sources and artifacts only persist along with the intermediate build directory
+        if self.__build_root is not None and not self.persistent_build_dir:
+            shutil.rmtree(self.__build_root, ignore_errors=True)
+
+        # Uploads run while the wheel is written
+        if self.__remote_cache:
+            self.wait_for_remote_uploads()
+
+        if self.__build_lock is not None:
+            self.__build_lock.release()
+
+        # Editable installs keep importing the artifacts after the build
+        if self.__temp_cache_dir is not None and not self.editable:
+            shutil.rmtree(self.__temp_cache_dir, ignore_errors=True)
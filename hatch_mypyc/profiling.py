@@ -0,0 +1,98 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import re
+
+# A frame in the raw output of py-spy looks like: function (path/to/file.py:42)
+PY_SPY_FRAME = re.compile(r'^.* \((?P<path>.+?)(?::\d+)?\)$')
+
+
+def load_pstats(path: str) -> dict[str, float]:
+    import pstats
+
+    times: dict[str, float] = {}
+    # The statistics map every (file, line, function) to (calls, primitive calls, own time, cumulative time, callers)
+    for (filename, _, _), (_, _, own_time, _, _) in pstats.Stats(path).stats.items():  # type: ignore[attr-defined]
+        times[filename] = times.get(filename, 0.0) + own_time
+
+    return times
+
+
+def load_collapsed_stacks(path: str) -> dict[str, float]:
+    times: dict[str, float] = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            stack, _, count = line.rstrip().rpartition(' ')
+            if not stack or not count.isdigit():
+                continue
+
+            # Samples are attributed to the frame that was executing
+            match = PY_SPY_FRAME.match(stack.rsplit(';', 1)[-1])
+            if match is not None:
+                filename = match.group('path')
+                times[filename] = times.get(filename, 0.0) + int(count)
+
+    return times
+
+
+def load_profile(path: str) -> dict[str, float]:
+    """
+    Return the time spent executing the code of every file in a profile, excluding the functions that it calls.
+    Profiles produced by cProfile are measured in seconds while those produced by `py-spy record --format raw`
+    are measured in samples.
+    """
+    try:
+        return load_pstats(path)
+    # Not serialized by the marshal module
+    except (AttributeError, EOFError, TypeError, ValueError):
+        return load_collapsed_stacks(path)
+
+
+def rank_modules(times: dict[str, float], relative_paths: list[str], package_source: str = '') -> list[list]:
+    """
+    Return every path along with the time spent in it, from the most to the least time. Profiles are usually
+    recorded where the project is installed, so paths are matched by the longest suffix that refers to a module.
+    """
+    modules = {}
+    for relative_path in relative_paths:
+        # Paths must use forward slashes
+        module_path = relative_path
+        if package_source and module_path.startswith(f'{package_source}/'):
+            module_path = module_path[len(package_source) + 1 :]
+
+        modules[module_path] = relative_path
+
+    module_times = dict.fromkeys(relative_paths, 0.0)
+    for filename, seconds in times.items():
+        parts = filename.replace('\\', '/').split('/')
+        for i in range(len(parts)):
+            matched_path = modules.get('/'.join(parts[i:]))
+            if matched_path is not None:
+                module_times[matched_path] += seconds
+                break
+
+    return sorted(([path, time] for path, time in module_times.items()), key=lambda item: (-item[1], item[0]))
+
+
+def select_modules(ranking: list[list], total: float, threshold: float, top: int) -> list[dict]:
+    selection = []
+    selected = 0
+    for relative_path, time in ranking:
+        share = time / total if total else 0.0
+        if not time:
+            reason = 'not in profile'
+        elif share < threshold:
+            reason = f'below threshold of {threshold:.2%}'
+        elif top and selected >= top:
+            reason = f'not in top {top}'
+        else:
+            reason = ''
+            selected += 1
+
+        selection.append(
+            {'path': relative_path, 'time': time, 'share': share, 'selected': not reason, 'reason': reason}
+        )
+
+    return selection
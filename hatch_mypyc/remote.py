@@ -0,0 +1,245 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import io
+import json
+import os
+import shutil
+import socket
+import sys
+import threading
+import time
+import zipfile
+from tempfile import mkdtemp
+
+DEFAULT_REMOTE_CACHE_TIMEOUT = 30
+ENTRY_POINT_GROUP = 'hatch_mypyc.remote_cache'
+
+
+class RemoteCacheError(Exception):
+    pass
+
+
+class RemoteCacheBackend:
+    """
+    Stores archives of compiled artifacts by key on behalf of many machines. Backends are constructed with the
+    configured URL and timeout, and may raise any exception when the cache cannot be used, which builds treat
+    as a miss.
+    """
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+
+    def get(self, key: str) -> bytes | None:
+        """Return the archive stored under the key, or `None` if there is none."""
+        raise NotImplementedError
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store the archive under the key, replacing any existing one."""
+        raise NotImplementedError
+
+
+class FileSystemBackend(RemoteCacheBackend):
+    """Archives are files in a directory that may be shared by many machines, for example over NFS."""
+
+    def __init__(self, url: str, timeout: float):
+        super().__init__(url, timeout)
+
+        if url.startswith('file://'):
+            from urllib.parse import urlsplit
+            from urllib.request import url2pathname
+
+            self.directory = url2pathname(urlsplit(url).path)
+        else:
+            self.directory = url
+
+    def path(self, key: str) -> str:
+        # Avoid directories with too many entries, which are slow on network file systems
+        return os.path.join(self.directory, key[:2], f'{key}.zip')
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Machines that read the archive must never see it partially written
+        temp_file = f'{path}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(data)
+
+            os.replace(temp_file, path)
+        except BaseException:
+            if os.path.isfile(temp_file):
+                os.remove(temp_file)
+            raise
+
+
+class HTTPBackend(RemoteCacheBackend):
+    """
+    Archives are resources under a base URL that are read with `GET` and written with `PUT`, which most
+    object stores and build cache servers support. The `HATCH_MYPYC_REMOTE_CACHE_TOKEN` environment variable,
+    if set, is sent as a bearer token.
+    """
+
+    def request(self, method: str, key: str, data: bytes | None = None):
+        from urllib.request import Request, urlopen
+
+        headers = {}
+        token = os.environ.get('HATCH_MYPYC_REMOTE_CACHE_TOKEN')
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        if data is not None:
+            headers['Content-Type'] = 'application/zip'
+
+        # Only the schemes of this backend are ever used
+        request = Request(f'{self.url.rstrip("/")}/{key}.zip', data=data, headers=headers, method=method)  # noqa: S310
+        return urlopen(request, timeout=self.timeout)  # noqa: S310
+
+    def get(self, key: str) -> bytes | None:
+        from urllib.error import HTTPError
+
+        try:
+            with self.request('GET', key) as response:
+                return response.read()
+        except HTTPError as e:
+            if e.code == 404:
+                return None
+
+            raise RemoteCacheError(f'Reading `{key}` from {self.url} failed with HTTP status {e.code}') from None
+
+    def put(self, key: str, data: bytes) -> None:
+        from urllib.error import HTTPError
+
+        try:
+            with self.request('PUT', key, data):
+                pass
+        except HTTPError as e:
+            raise RemoteCacheError(f'Writing `{key}` to {self.url} failed with HTTP status {e.code}') from None
+
+
+BACKENDS: dict[str, type[RemoteCacheBackend]] = {
+    'file': FileSystemBackend,
+    'http': HTTPBackend,
+    'https': HTTPBackend,
+}
+
+
+def get_backend_class(scheme: str) -> type[RemoteCacheBackend]:
+    if scheme in BACKENDS:
+        return BACKENDS[scheme]
+
+    # Other schemes are provided by plugins
+    from importlib.metadata import entry_points
+
+    if sys.version_info >= (3, 10):
+        plugins = entry_points(group=ENTRY_POINT_GROUP)
+    else:
+        plugins = entry_points().get(ENTRY_POINT_GROUP, [])
+
+    for plugin in plugins:
+        if plugin.name == scheme:
+            return plugin.load()
+
+    raise RemoteCacheError(f'Unknown remote cache scheme: {scheme}')
+
+
+def get_backend(url: str, timeout: float = DEFAULT_REMOTE_CACHE_TIMEOUT) -> RemoteCacheBackend:
+    scheme, separator, _ = url.partition('://')
+    # Paths, including those of Windows that start with a drive letter
+    if not separator:
+        scheme = 'file'
+
+    return get_backend_class(scheme.lower())(url, timeout)
+
+
+class RemoteCache:
+    """
+    Shares compiled artifacts between machines. Every entry is a ZIP archive with the artifacts, at their
+    paths relative to the project root, and a manifest. Archives are uploaded by background threads so that
+    builds do not wait for the network, and `wait` must be called before exiting for uploads to complete.
+    """
+
+    def __init__(self, backend: RemoteCacheBackend):
+        self.backend = backend
+        self.uploads: list[threading.Thread] = []
+        self.errors: list[str] = []
+
+    def restore(self, key: str, root: str) -> list[str] | None:
+        data = self.backend.get(key)
+        if data is None:
+            return None
+
+        # Nothing is written to the root until the entire archive is known to be valid
+        temp_dir = mkdtemp()
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                relative_paths = json.loads(archive.read('manifest.json'))['files']
+                for relative_path in relative_paths:
+                    # Archives come from other machines so they must never write outside of the root
+                    if os.path.isabs(relative_path) or '..' in relative_path.replace('\\', '/').split('/'):
+                        raise RemoteCacheError(f'Invalid artifact path in remote cache entry `{key}`: {relative_path}')
+
+                    member = archive.getinfo(f'artifacts/{relative_path}')
+                    destination = os.path.join(temp_dir, relative_path)
+                    os.makedirs(os.path.dirname(destination), exist_ok=True)
+                    with archive.open(member) as source, open(destination, 'wb') as target:
+                        shutil.copyfileobj(source, target)
+
+                    mode = member.external_attr >> 16
+                    if mode:
+                        os.chmod(destination, mode & 0o777)
+
+            for relative_path in relative_paths:
+                destination = os.path.join(root, relative_path)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copy2(os.path.join(temp_dir, relative_path), destination)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        return relative_paths
+
+    @staticmethod
+    def pack(root: str, relative_paths: list[str]) -> bytes:
+        relative_paths = [relative_path.replace('\\', '/') for relative_path in relative_paths]
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('manifest.json', json.dumps({'files': relative_paths}))
+            for relative_path in relative_paths:
+                archive.write(os.path.join(root, relative_path), f'artifacts/{relative_path}')
+
+        return buffer.getvalue()
+
+    def store_async(self, key: str, root: str, relative_paths: list[str]) -> None:
+        # The artifacts are read right away since they may be modified once the build moves on
+        data = self.pack(root, relative_paths)
+
+        # Uploads that are still running when the build exits are abandoned rather than waited for
+        upload = threading.Thread(target=self.upload, args=(key, data), daemon=True)
+        upload.start()
+        self.uploads.append(upload)
+
+    def upload(self, key: str, data: bytes) -> None:
+        try:
+            self.backend.put(key, data)
+        except Exception as e:
+            self.errors.append(f'{type(e).__name__}: {e}')
+
+    def wait(self, timeout: float) -> int:
+        """Wait for the uploads to complete for at most the timeout and return how many are still running."""
+        deadline = time.monotonic() + timeout
+        for upload in self.uploads:
+            upload.join(max(deadline - time.monotonic(), 0))
+
+        self.uploads = [upload for upload in self.uploads if upload.is_alive()]
+        return len(self.uploads)
@@ -0,0 +1,449 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+#
+# This is executed as a script by the build hook to build the extensions, so it must only import from the
+# standard library and the build dependencies of the extensions, which are Mypyc and setuptools.
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable
+
+PHASES = (
+    'file_selection',
+    'type_checking',
+    'code_generation',
+    'c_compilation',
+    'linking',
+    'training',
+    'artifact_collection',
+)
+# Progress is reported to the build hook using lines that start with this
+PROGRESS_PREFIX = '##hatch-mypyc:progress '
+# The lines displayed by Mypyc in verbose mode that indicate progress
+PROGRESS_LINES = ('Parsed and typechecked', 'Compiling ', 'Compiled to C')
+
+
+def get_resource_usage(*, children: bool = False) -> tuple[float | None, int | None]:
+    """Return the CPU time in seconds and the peak RSS in bytes of this process or of its waited-for children."""
+    try:
+        import resource
+    except ImportError:  # no cov
+        return (None if children else time.process_time()), None
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # The maximum resident set size is reported in bytes on macOS and in kibibytes everywhere else
+    peak_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    return (usage.ru_utime + usage.ru_stime if children else time.process_time()), peak_rss
+
+
+def get_wall_time(intervals: list[tuple[float, float]]) -> float:
+    # Phases may run concurrently with themselves so only count overlapping intervals once
+    merged: list[list[float]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    return sum((end - start for start, end in merged), 0.0)
+
+
+def add_optional(a, b):
+    if a is None:
+        return b
+    elif b is None:
+        return a
+
+    return a + b
+
+
+def subtract_optional(a, b):
+    if a is None or b is None:
+        return None
+
+    return a - b
+
+
+def max_optional(a, b):
+    if a is None:
+        return b
+    elif b is None:
+        return a
+
+    return max(a, b)
+
+
+class BuildStats:
+    """
+    Records the wall time, CPU time and peak RSS of every build phase along with the time spent on every module.
+    Work done by compiler processes is attributed to a phase by sampling the resource usage of children after
+    each one exits, so the numbers are approximate when compilation and linking overlap.
+    """
+
+    def __init__(self, source_root: str = ''):
+        self.source_root = source_root
+        self.intervals: dict[str, list[tuple[float, float]]] = {}
+        self.cpu_times: dict[str, float | None] = {}
+        self.peak_rss: dict[str, int | None] = {}
+        self.modules: dict[str, dict[str, float]] = {}
+        self.merged: dict = {}
+        self.lock = threading.Lock()
+        self.children_cpu_time = get_resource_usage(children=True)[0]
+        self.progress: dict[str, int] = {}
+        self.progress_totals: dict[str, int] = {}
+        self.on_progress: Callable[[str, int, int | None], None] | None = None
+
+    def get_name(self, path: str) -> str:
+        if self.source_root:
+            relative_path = os.path.relpath(path, self.source_root)
+            if not relative_path.startswith(os.pardir):
+                path = relative_path
+
+        return path.replace(os.sep, '/')
+
+    def record(
+        self,
+        phase: str,
+        start: float,
+        end: float,
+        cpu_time: float | None,
+        peak_rss: int | None,
+        *,
+        name: str | None = None,
+    ) -> None:
+        with self.lock:
+            self.intervals.setdefault(phase, []).append((start, end))
+            self.cpu_times[phase] = add_optional(self.cpu_times.get(phase), cpu_time)
+            self.peak_rss[phase] = max_optional(self.peak_rss.get(phase), peak_rss)
+            if name is not None:
+                self.add_module_time(phase, name, end - start)
+
+    def add_module_time(self, phase: str, name: str, seconds: float) -> None:
+        modules = self.modules.setdefault(phase, {})
+        modules[name] = modules.get(name, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, phase: str):
+        start = time.perf_counter()
+        start_cpu_time = get_resource_usage()[0]
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            cpu_time, peak_rss = get_resource_usage()
+            self.record(phase, start, end, subtract_optional(cpu_time, start_cpu_time), peak_rss)
+
+    @contextmanager
+    def measure_children(self, phase: str, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            cpu_time, peak_rss = get_resource_usage(children=True)
+            with self.lock:
+                elapsed_cpu_time = subtract_optional(cpu_time, self.children_cpu_time)
+                self.children_cpu_time = cpu_time
+
+            self.record(phase, start, end, elapsed_cpu_time, peak_rss, name=self.get_name(name))
+
+    def reset_progress(self) -> None:
+        with self.lock:
+            self.progress.clear()
+            self.progress_totals.clear()
+
+    def advance(self, phase: str, count: int = 1) -> None:
+        with self.lock:
+            done = self.progress[phase] = self.progress.get(phase, 0) + count
+            total = self.progress_totals.get(phase)
+
+        if self.on_progress is not None:
+            self.on_progress(phase, done, total)
+
+    def track_line(self, line: str) -> None:
+        if line.startswith('Parsed and typechecked'):
+            self.advance('type_checking')
+        elif line.startswith('Compiling '):
+            # Every import cycle is displayed as a comma-separated list of module names
+            self.advance('code_generation', len(line[len('Compiling ') :].split(', ')))
+
+    def record_progress(self, start: float, start_cpu_time: float | None, end: float, events: list[tuple]) -> None:
+        """
+        Split a call to `mypycify` into type checking and code generation based on the progress that
+        Mypyc displays in verbose mode. Every import cycle is announced before its IR is built, so the time
+        of the last one also includes emitting the C code.
+        """
+        checked = None
+        compiling = None
+        for timestamp, cpu_time, peak_rss, line in events:
+            if line.startswith('Parsed and typechecked'):
+                checked = (timestamp, cpu_time, peak_rss)
+            elif line.startswith(('Compiling ', 'Compiled to C')):
+                with self.lock:
+                    if compiling is not None:
+                        self.add_module_time('code_generation', compiling[1], timestamp - compiling[0])
+
+                    compiling = (timestamp, line[len('Compiling ') :]) if line.startswith('Compiling ') else None
+
+        end_cpu_time, end_peak_rss = get_resource_usage()
+        if compiling is not None:
+            with self.lock:
+                self.add_module_time('code_generation', compiling[1], end - compiling[0])
+
+        # Older versions may not display progress, in which case all of the work is considered type checking
+        if checked is None:
+            self.record('type_checking', start, end, subtract_optional(end_cpu_time, start_cpu_time), end_peak_rss)
+            return
+
+        checked_time, checked_cpu_time, checked_peak_rss = checked
+        self.record(
+            'type_checking', start, checked_time, subtract_optional(checked_cpu_time, start_cpu_time), checked_peak_rss
+        )
+        self.record(
+            'code_generation', checked_time, end, subtract_optional(end_cpu_time, checked_cpu_time), end_peak_rss
+        )
+
+    def merge(self, data: dict) -> None:
+        self.merged = data
+
+    @property
+    def compiled_files(self) -> int:
+        return len(self.intervals.get('c_compilation', ())) + self.merged.get('compiled_files', 0)
+
+    def as_dict(self) -> dict:
+        phases = {}
+        for phase in PHASES:
+            merged_phase = self.merged.get('phases', {}).get(phase)
+            if phase not in self.intervals and merged_phase is None:
+                continue
+
+            summary = {
+                'wall_time': get_wall_time(self.intervals.get(phase, [])),
+                'cpu_time': self.cpu_times.get(phase),
+                'peak_rss': self.peak_rss.get(phase),
+            }
+            if merged_phase is not None:
+                summary['wall_time'] += merged_phase['wall_time']
+                summary['cpu_time'] = add_optional(summary['cpu_time'], merged_phase['cpu_time'])
+                summary['peak_rss'] = max_optional(summary['peak_rss'], merged_phase['peak_rss'])
+
+            phases[phase] = summary
+
+        modules = {phase: dict(times) for phase, times in self.merged.get('modules', {}).items()}
+        for phase, times in self.modules.items():
+            for name, seconds in times.items():
+                modules.setdefault(phase, {})[name] = modules.get(phase, {}).get(name, 0.0) + seconds
+
+        return {
+            'compiled_files': self.compiled_files,
+            'compile_time': phases.get('c_compilation', {}).get('wall_time', 0.0),
+            'phases': phases,
+            'modules': {phase: dict(sorted(times.items())) for phase, times in sorted(modules.items())},
+        }
+
+
+class ProgressStream:
+    """Forwards everything written to the stream while recording when every line indicating progress was written."""
+
+    def __init__(self, stream, callback: Callable[[str], None] | None = None):
+        self.stream = stream
+        self.callback = callback
+        self.buffer = ''
+        self.events: list[tuple[float, float, int | None, str]] = []
+
+    def write(self, text):
+        self.stream.write(text)
+        self.buffer += text
+        *lines, self.buffer = self.buffer.split('\n')
+        # Only keep what is needed so that memory usage does not depend on the size of the output
+        lines = [line for line in lines if line.startswith(PROGRESS_LINES)]
+        if lines:
+            timestamp = time.perf_counter()
+            cpu_time, peak_rss = get_resource_usage()
+            self.events.extend((timestamp, cpu_time, peak_rss, line) for line in lines)
+            if self.callback is not None:
+                for line in lines:
+                    self.callback(line)
+
+        return len(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+@contextmanager
+def instrument_build(jobs: int, stats: BuildStats):
+    """
+    Compile the C files of every extension concurrently and record the duration of each build phase. Everything
+    that is replaced is restored on exit so that other builds in the same process are unaffected.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from contextlib import redirect_stdout
+    from functools import wraps
+
+    # Ensure that setuptools is imported first
+    import setuptools  # noqa: F401, isort: skip
+    from distutils.ccompiler import CCompiler
+
+    import mypyc.build
+
+    # Limits the total number of compiler processes when extensions are also built in parallel
+    semaphore = threading.BoundedSemaphore(jobs)
+
+    # This mirrors the default implementation, which compiles every source file sequentially. Compilers that
+    # override this method, like MSVC, are unaffected.
+    def compile(  # noqa: A001
+        self,
+        sources,
+        output_dir=None,
+        macros=None,
+        include_dirs=None,
+        debug=0,
+        extra_preargs=None,
+        extra_postargs=None,
+        depends=None,
+    ):
+        macros, objects, extra_postargs, pp_opts, build = self._setup_compile(
+            output_dir, macros, include_dirs, sources, depends, extra_postargs
+        )
+        cc_args = self._get_cc_args(pp_opts, debug, extra_preargs)
+
+        def compile_object(obj):
+            try:
+                src, ext = build[obj]
+            except KeyError:
+                return
+
+            with semaphore, stats.measure_children('c_compilation', src):
+                self._compile(obj, src, ext, cc_args, extra_postargs, pp_opts)
+
+            stats.advance('c_compilation')
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            # Consume the results to propagate errors
+            for _ in executor.map(compile_object, objects):
+                pass
+
+        return objects
+
+    original_methods = {name: CCompiler.__dict__[name] for name in ('compile', 'link_shared_object')}
+    link_shared_object = original_methods['link_shared_object']
+
+    @wraps(link_shared_object)
+    def link_shared_object_wrapper(self, objects, output_filename, output_dir=None, *args, **kwargs):
+        name = output_filename if output_dir is None else os.path.join(output_dir, output_filename)
+        try:
+            with stats.measure_children('linking', name):
+                return link_shared_object(self, objects, output_filename, output_dir, *args, **kwargs)
+        finally:
+            stats.advance('linking')
+
+    mypycify = mypyc.build.mypycify
+
+    @wraps(mypycify)
+    def mypycify_wrapper(*args, **kwargs):
+        # Progress is only displayed in verbose mode
+        kwargs['verbose'] = True
+        stream = ProgressStream(sys.stdout, stats.track_line)
+        stats.reset_progress()
+        paths = args[0] if args else kwargs.get('paths', [])
+        stats.progress_totals['type_checking'] = 1
+        stats.progress_totals['code_generation'] = sum(1 for path in paths if not path.startswith('-'))
+        start = time.perf_counter()
+        start_cpu_time = get_resource_usage()[0]
+        try:
+            with redirect_stdout(stream):
+                extensions = mypycify(*args, **kwargs)
+        finally:
+            stats.record_progress(start, start_cpu_time, time.perf_counter(), stream.events)
+
+        stats.progress_totals['c_compilation'] = sum(len(extension.sources) for extension in extensions)
+        stats.progress_totals['linking'] = len(extensions)
+        return extensions
+
+    # Methods are replaced on the class so that every compiler instance that setuptools creates is affected
+    replacements = {'compile': compile, 'link_shared_object': link_shared_object_wrapper}
+    for name, method in replacements.items():
+        setattr(CCompiler, name, method)
+
+    mypyc.build.mypycify = mypycify_wrapper
+    try:
+        yield
+    finally:
+        for name, method in original_methods.items():
+            setattr(CCompiler, name, method)
+
+        mypyc.build.mypycify = mypycify
+
+
+def build_extensions(package_source: str, paths: list[str], options: dict, arguments: list[str]) -> None:
+    """
+    The equivalent of running a setup file, except that no project configuration is loaded from the current
+    directory so the project file never needs to be hidden.
+    """
+    # Ensure that setuptools is imported first
+    from setuptools import Distribution  # isort: skip
+    from mypyc.build import mypycify
+
+    attrs: dict[str, Any] = {'name': 'mypyc_output', 'ext_modules': mypycify(paths, **options)}
+    if package_source:
+        attrs['package_dir'] = {'': package_source.replace(os.path.sep, '/')}
+
+    distribution = Distribution(attrs)
+    distribution.script_name = 'setup.py'
+    distribution.script_args = arguments
+    distribution.parse_command_line()
+    distribution.run_commands()
+
+
+def main() -> None:
+    # Running as a script puts the directory of this package first on the search path
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        sys.path.pop(0)
+
+    config_file, *arguments = sys.argv[1:]
+    with open(config_file, encoding='utf-8') as f:
+        config = json.load(f)
+
+    stats = BuildStats(config['source_root'])
+    lock = threading.Lock()
+    # Mypyc's output is redirected while it runs, so progress is written to the original stream if there is one
+    progress_stream = sys.__stdout__
+
+    def write_progress(phase: str, done: int, total: int | None) -> None:
+        if progress_stream is None:  # no cov
+            return
+
+        # Compilation happens in multiple threads
+        with lock:
+            progress_stream.write(f'{PROGRESS_PREFIX}{json.dumps([phase, done, total])}\n')
+            progress_stream.flush()
+
+    stats.on_progress = write_progress
+
+    # Display the commands that setuptools runs like a setup file would
+    from setuptools.logging import configure
+
+    configure()
+
+    # Groups of modules must be tuples, which JSON does not have
+    options = config['options']
+    if isinstance(options.get('separate'), list):
+        options['separate'] = [(files, name) for files, name in options['separate']]
+
+    try:
+        with instrument_build(config['jobs'], stats):
+            build_extensions(config['package_source'], config['paths'], options, arguments)
+    finally:
+        with open(config['stats_file'], 'w', encoding='utf-8') as f:
+            json.dump(stats.as_dict(), f)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import os
+import re
+
+import pathspec
+
+try:
+    from pathspec.patterns.gitignore.spec import GitIgnoreSpecPattern as GitIgnorePattern
+# The pattern class was renamed, and its old name deprecated, in pathspec 1.0
+except ImportError:  # no cov
+    from pathspec.patterns import GitWildMatchPattern as GitIgnorePattern
+
+
+class PatternMatcher:
+    """
+    Matches paths against a list of patterns using a single regular expression. Patterns that negate others must
+    be evaluated in order, in which case matching falls back to pathspec and directories are never matched as a
+    whole.
+    """
+
+    def __init__(self, patterns: list[str]):
+        compiled_patterns = [GitIgnorePattern(pattern) for pattern in patterns]
+        compiled_patterns = [pattern for pattern in compiled_patterns if pattern.include is not None]
+
+        self.spec: pathspec.PathSpec | None = None
+        self.regex: re.Pattern | None = None
+        if any(not pattern.include for pattern in compiled_patterns):
+            self.spec = pathspec.PathSpec(compiled_patterns)
+        elif compiled_patterns:
+            # Named groups cannot be repeated
+            self.regex = re.compile(
+                '|'.join(
+                    f'(?:{re.sub(r"[(][?]P<[^>]+>", "(?:", pattern.regex.pattern)})'
+                    for pattern in compiled_patterns
+                    if pattern.regex is not None
+                )
+            )
+
+    def match_file(self, relative_path: str) -> bool:
+        if self.regex is not None:
+            return self.regex.match(relative_path) is not None
+        elif self.spec is not None:
+            return self.spec.match_file(relative_path)
+
+        return False
+
+    def match_directory(self, relative_directory: str) -> bool:
+        """Return whether every path beneath the directory matches."""
+        if self.regex is None:
+            return False
+
+        # Patterns that match a directory match everything beneath it
+        return self.regex.match(f'{relative_directory}/') is not None
+
+
+class FileMatcher:
+    """
+    Selects the files that match any of the include patterns, or every file when there are none, and none of the
+    exclude patterns. Directories whose files are all excluded, or all included before exclusion, are remembered
+    so that the files beneath them are not matched against every pattern.
+    """
+
+    def __init__(self, include: list[str], exclude: list[str]):
+        self.include = PatternMatcher(include) if include else None
+        self.exclude = PatternMatcher(exclude)
+        self.directories: dict[str, tuple[bool, bool]] = {}
+
+    def match_directory(self, relative_directory: str) -> tuple[bool, bool]:
+        if relative_directory not in self.directories:
+            parent, _, _ = relative_directory.rpartition('/')
+            all_included, all_excluded = self.match_directory(parent) if relative_directory else (False, False)
+            if not all_excluded and relative_directory:
+                all_excluded = self.exclude.match_directory(relative_directory)
+            if not all_included:
+                all_included = self.include is None or (
+                    bool(relative_directory) and self.include.match_directory(relative_directory)
+                )
+
+            self.directories[relative_directory] = (all_included, all_excluded)
+
+        return self.directories[relative_directory]
+
+    def match_file(self, relative_path: str) -> bool:
+        relative_path = relative_path.replace(os.sep, '/')
+        all_included, all_excluded = self.match_directory(relative_path.rpartition('/')[0])
+        if all_excluded:
+            return False
+        elif not all_included and self.include is not None and not self.include.match_file(relative_path):
+            return False
+
+        return not self.exclude.match_file(relative_path)
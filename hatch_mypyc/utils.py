@@ -3,34 +3,92 @@
 # SPDX-License-Identifier: MIT
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import sys
 
 
-def construct_setup_file(package_source, *args, **kwargs):
-    # Ensure that setuptools is imported first
-    contents = """\
-from setuptools import setup
-from mypyc.build import mypycify
-
-setup(
-    name='mypyc_output',
-    ext_modules=mypycify(
-        [{}
-        ],{}
-    ),{}
-)
-"""
-
-    package_dir_data = ''
-    if package_source:
-        package_source = package_source.replace(os.path.sep, '/')
-        package_dir_data = f"\n    package_dir={{'': '{package_source}'}},"
-
-    return contents.format(
-        ''.join(f'\n            {arg!r},' for arg in args),
-        ''.join(f'\n        {key}={value!r},' for key, value in kwargs.items()),
-        package_dir_data,
-    )
+def hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def hash_data(data) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def get_user_cache_dir() -> str:
+    if sys.platform == 'win32':
+        cache_dir = os.environ.get('LOCALAPPDATA') or os.path.expanduser(os.path.join('~', 'AppData', 'Local'))
+    elif sys.platform == 'darwin':
+        cache_dir = os.path.expanduser(os.path.join('~', 'Library', 'Caches'))
+    else:
+        cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache'))
+
+    return os.path.join(cache_dir, 'hatch-mypyc')
+
+
+def get_cpu_count() -> int:
+    # Only some platforms expose the CPUs that this process may run on
+    if hasattr(os, 'sched_getaffinity'):
+        cpu_count = len(os.sched_getaffinity(0))
+    else:  # no cov
+        cpu_count = os.cpu_count() or 1
+
+    cpu_quota = get_cgroup_cpu_quota()
+    if cpu_quota is not None:
+        cpu_count = min(cpu_count, cpu_quota)
+
+    return max(cpu_count, 1)
+
+
+def get_cgroup_cpu_quota(cgroup_root: str = '/sys/fs/cgroup') -> int | None:
+    # cgroup v2
+    try:
+        with open(os.path.join(cgroup_root, 'cpu.max'), encoding='utf-8') as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        pass
+    else:
+        if quota == 'max':
+            return None
+
+        return max(1, -(-int(quota) // int(period)))
+
+    # cgroup v1
+    for controller in ('cpu', 'cpu,cpuacct'):
+        try:
+            with open(os.path.join(cgroup_root, controller, 'cpu.cfs_quota_us'), encoding='utf-8') as f:
+                quota = f.read().strip()
+            with open(os.path.join(cgroup_root, controller, 'cpu.cfs_period_us'), encoding='utf-8') as f:
+                period = f.read().strip()
+        except OSError:
+            continue
+
+        if int(quota) <= 0:
+            return None
+
+        return max(1, -(-int(quota) // int(period)))
+
+    return None
+
+
+def format_duration(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.3g} {unit}'
+
+    return f'{seconds / 1e-9:.3g} ns'
+
+
+def format_table(rows: list[list[str]]) -> str:
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
 
 
 def installed_in_prefix() -> bool:  # no cov
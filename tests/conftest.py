@@ -4,6 +4,8 @@
 import os
 import shutil
 import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Generator
@@ -25,6 +27,12 @@ def plugin_dir() -> Generator[Path, None, None]:
         yield directory.resolve()
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch) -> None:
+    # Never write to the user's cache directory
+    monkeypatch.setenv('HATCH_MYPYC_CACHE_DIR', str(tmp_path / 'cache'))
+
+
 @pytest.fixture
 def new_project(plugin_dir, compiled_extension, tmp_path) -> Generator[Path, None, None]:
     project_dir = tmp_path / 'my-app'
@@ -83,3 +91,54 @@ def fib(n: int) -> int:
         yield project_dir
     finally:
         os.chdir(origin)
+
+
+# A stand-in for an HTTP remote cache that keeps entries in memory
+class RemoteCacheHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path, self.headers.get('Authorization')))
+        data = self.server.entries.get(self.path)
+        if self.server.status != 200:
+            self.send_response(self.server.status)
+            self.end_headers()
+        elif data is None:
+            self.send_response(404)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    def do_PUT(self):
+        self.server.requests.append(('PUT', self.path, self.headers.get('Authorization')))
+        data = self.rfile.read(int(self.headers['Content-Length']))
+        if self.server.status == 200:
+            self.server.entries[self.path] = data
+
+        self.send_response(self.server.status if self.server.status != 200 else 201)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class RemoteCacheServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), RemoteCacheHandler)
+        self.entries: dict[str, bytes] = {}
+        self.requests: list[tuple[str, str, str | None]] = []
+        self.status = 200
+        self.url = f'http://127.0.0.1:{self.server_address[1]}/cache'
+
+
+@pytest.fixture
+def remote_cache_server() -> Generator[RemoteCacheServer, None, None]:
+    server = RemoteCacheServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,29 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+import pytest
+
+from benchmarks.scaling import PACKAGE_NAME, SHAPES, generate_project
+from hatch_mypyc.graph import get_dependencies
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_generate_project(tmp_path, shape):
+    generate_project(str(tmp_path), 7, 2, shape, {'opt_level': '0', 'separate': True})
+
+    relative_paths = sorted(f'{PACKAGE_NAME}/{path.name}' for path in (tmp_path / PACKAGE_NAME).glob('module_*.py'))
+    assert len(relative_paths) == 7
+
+    dependencies = get_dependencies(str(tmp_path), relative_paths)
+    assert dependencies[relative_paths[0]] == []
+    if shape == 'chain':
+        assert dependencies[relative_paths[6]] == [relative_paths[5]]
+    elif shape == 'tree':
+        assert dependencies[relative_paths[6]] == [relative_paths[2]]
+    elif shape == 'star':
+        assert all(dependencies[path] == [relative_paths[0]] for path in relative_paths[1:])
+    else:
+        assert len(dependencies[relative_paths[6]]) == 3
+
+    compile(((tmp_path / PACKAGE_NAME) / 'module_0006.py').read_text(encoding='utf-8'), 'module_0006.py', 'exec')
+    assert 'separate = true' in (tmp_path / 'pyproject.toml').read_text(encoding='utf-8')
@@ -1,9 +1,19 @@
 # SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
 #
 # SPDX-License-Identifier: MIT
+import hashlib
+import json
 import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import sysconfig
+import time
 import zipfile
 
+import pytest
 from packaging.tags import sys_tags
 
 from .utils import build_project
@@ -162,9 +172,11 @@ def test_separation(new_project):
     with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
         zip_archive.extractall(str(extraction_directory))
 
+    # The shared library of the package itself is named after it
     root_paths = list(extraction_directory.iterdir())
-    assert len(root_paths) == 2
-    assert len([root_path for root_path in root_paths if root_path.name.startswith('my_app')]) == 2
+    assert len(root_paths) == 3
+    assert len([root_path for root_path in root_paths if root_path.name.startswith('my_app')]) == 3
+    assert (extraction_directory / f'my_app__mypyc{sysconfig.get_config_var("EXT_SUFFIX")}').is_file()
 
     metadata_directory = extraction_directory / 'my_app-1.2.3.dist-info'
     assert metadata_directory.is_dir()
@@ -177,7 +189,7 @@ def test_separation(new_project):
     assert extracted_package_dir.is_dir()
 
     distributed_files = list(extracted_package_dir.iterdir())
-    assert len(distributed_files) == 5
+    assert len(distributed_files) == 6
 
     root_files = 0
     fibonacci_files = 0
@@ -187,9 +199,19 @@ def test_separation(new_project):
         elif distributed_file.name.startswith('fib'):
             fibonacci_files += 1
 
-    assert root_files == 1
+    assert root_files == 2
     assert fibonacci_files == 3
 
+    process = subprocess.run(
+        [sys.executable, '-c', 'import my_app.fib; print(my_app.fib.fib(10), my_app.fib.__file__)'],
+        cwd=str(extraction_directory),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    output = process.stdout.decode('utf-8')
+    assert output.startswith('55 ')
+    assert output.strip().endswith(sysconfig.get_config_var('EXT_SUFFIX'))
+
 
 def test_src_layout(new_project, compiled_extension):
     project_file = new_project / 'pyproject.toml'
@@ -370,3 +392,1134 @@ def test_build_dir(new_project, compiled_extension):
 
     intermediate_build_dir = new_project / build_dir
     assert intermediate_build_dir.is_dir()
+
+
+def test_artifact_cache(new_project, compiled_extension):
+    cache_dir = new_project.parent / 'cache'
+
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += f'\nartifact-cache-dir = "{cache_dir.as_posix()}"'
+    project_file.write_text(contents, encoding='utf-8')
+
+    build_project()
+
+    stats = json.loads((cache_dir / 'stats.json').read_text(encoding='utf-8'))
+    assert stats == {'misses': 1, 'stores': 1}
+
+    shutil.rmtree(new_project / 'dist')
+    build_project()
+
+    stats = json.loads((cache_dir / 'stats.json').read_text(encoding='utf-8'))
+    assert stats == {'misses': 1, 'stores': 1, 'hits': 1}
+
+    build_dir = new_project / 'dist'
+    artifacts = list(build_dir.iterdir())
+    assert len(artifacts) == 1
+    wheel_file = artifacts[0]
+
+    assert wheel_file.name == f'my_app-1.2.3-{best_matching_tag}.whl'
+
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        names = zip_archive.namelist()
+
+    assert len([name for name in names if name.endswith(compiled_extension)]) == 3
+
+    # Changing any source invalidates the cache
+    core_logic_file = new_project / 'my_app' / 'fib.py'
+    core_logic_file.write_text(f'{core_logic_file.read_text()}\nFOO = 1\n', encoding='utf-8')
+
+    shutil.rmtree(new_project / 'dist')
+    build_project()
+
+    stats = json.loads((cache_dir / 'stats.json').read_text(encoding='utf-8'))
+    assert stats == {'misses': 2, 'stores': 2, 'hits': 1}
+
+
+@pytest.mark.parametrize('backend', ['filesystem', 'http'])
+def test_remote_cache(new_project, compiled_extension, remote_cache_server, monkeypatch, backend):
+    remote_dir = new_project.parent / 'remote'
+    monkeypatch.setenv(
+        'HATCH_MYPYC_REMOTE_CACHE', remote_cache_server.url if backend == 'http' else remote_dir.as_uri()
+    )
+
+    output = build_project()
+    assert 'Mypyc remote cache miss' in output
+
+    if backend == 'http':
+        assert len(remote_cache_server.entries) == 1
+    else:
+        assert len(list(remote_dir.glob('*/*.zip'))) == 1
+
+    # Another machine has none of the state of the first one
+    monkeypatch.setenv('HATCH_MYPYC_CACHE_DIR', str(new_project.parent / 'other-cache'))
+    shutil.rmtree(new_project / 'dist')
+    output = build_project()
+    assert 'Mypyc remote cache hit' in output
+
+    build_dir = new_project / 'dist'
+    artifacts = list(build_dir.iterdir())
+    assert len(artifacts) == 1
+    wheel_file = artifacts[0]
+
+    extraction_directory = new_project.parent / '_archive'
+    extraction_directory.mkdir()
+
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        zip_archive.extractall(str(extraction_directory))
+
+    assert len(list(extraction_directory.rglob(f'*{compiled_extension}'))) == 3
+
+    process = subprocess.run(
+        [sys.executable, '-c', 'from my_app.fib import fib; print(fib(10))'],
+        cwd=str(extraction_directory),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    assert process.stdout.decode('utf-8').strip() == '55'
+
+
+def test_remote_cache_incremental(new_project, compiled_extension, monkeypatch):
+    monkeypatch.setenv('HATCH_MYPYC_REMOTE_CACHE', (new_project.parent / 'remote').as_uri())
+
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\nincremental = true\noptions = { separate = true }'
+    project_file.write_text(contents, encoding='utf-8')
+
+    core_logic_file = new_project / 'my_app' / 'fib.py'
+    core_logic = core_logic_file.read_text(encoding='utf-8')
+
+    def build_revision(revision):
+        core_logic_file.write_text(f'{core_logic}\ndef revision() -> str:\n    return "{revision}"\n', encoding='utf-8')
+        shutil.rmtree(new_project / 'dist', ignore_errors=True)
+        return build_project()
+
+    assert 'Mypyc remote cache miss' in build_revision('b')
+    assert 'Mypyc remote cache miss' in build_revision('a')
+    # The restored artifacts were not built from the sources that the incremental state describes
+    assert 'Mypyc remote cache hit' in build_revision('b')
+
+    init_file = new_project / 'my_app' / '__init__.py'
+    init_file.write_text(f'{init_file.read_text(encoding="utf-8")}\nFOO = 1\n', encoding='utf-8')
+    assert 'Mypyc remote cache miss' in build_revision('a')
+
+    extraction_directory = new_project.parent / '_archive'
+    extraction_directory.mkdir()
+
+    wheel_file = next((new_project / 'dist').iterdir())
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        zip_archive.extractall(str(extraction_directory))
+
+    process = subprocess.run(
+        [sys.executable, '-c', 'import my_app.fib; print(my_app.fib.__file__); print(my_app.fib.revision())'],
+        cwd=str(extraction_directory),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    module_file, revision = process.stdout.decode('utf-8').splitlines()
+    assert module_file.endswith(compiled_extension)
+    assert revision == 'a'
+
+
+def test_remote_cache_error(new_project, compiled_extension, remote_cache_server, monkeypatch):
+    remote_cache_server.status = 503
+    monkeypatch.setenv('HATCH_MYPYC_REMOTE_CACHE', remote_cache_server.url)
+
+    output = build_project()
+    assert 'Mypyc could not read from the remote cache, building locally' in output
+    assert 'Mypyc could not write to the remote cache' in output
+
+    wheel_file = next((new_project / 'dist').iterdir())
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        names = zip_archive.namelist()
+
+    assert len([name for name in names if name.endswith(compiled_extension)]) == 3
+
+
+def test_artifact_manifest(new_project, compiled_extension):
+    build_project()
+
+    ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+    manifest_file = new_project.parent / 'cache' / 'artifacts.json'
+    manifest = json.loads(manifest_file.read_text(encoding='utf-8'))
+    assert manifest['root'] == os.path.realpath(new_project)
+
+    artifacts = manifest['artifacts'][ext_suffix]
+    shared_libraries = [artifact for artifact in artifacts if '__mypyc' in artifact]
+    assert sorted(artifacts) == sorted([f'my_app/__init__{ext_suffix}', f'my_app/fib{ext_suffix}', *shared_libraries])
+    assert len(shared_libraries) == 1
+    assert (
+        artifacts[f'my_app/fib{ext_suffix}']
+        == hashlib.sha256((new_project / 'my_app' / f'fib{ext_suffix}').read_bytes()).hexdigest()
+    )
+
+    # Artifacts of other interpreters that are not shipped may coexist
+    foreign_artifact = f'my_app/fib.cpython-30-x86_64-linux-gnu{compiled_extension}'
+    (new_project / foreign_artifact).write_bytes(b'')
+    manifest['artifacts']['.cpython-30-x86_64-linux-gnu.so'] = {foreign_artifact: ''}
+    manifest_file.write_text(json.dumps(manifest), encoding='utf-8')
+
+    shutil.rmtree(new_project / 'dist')
+    build_project()
+    assert (new_project / foreign_artifact).is_file()
+
+    wheel_file = next((new_project / 'dist').iterdir())
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        names = zip_archive.namelist()
+
+    assert foreign_artifact not in names
+    assert f'my_app/fib{ext_suffix}' in names
+
+    # Cleaning removes exactly the recorded artifacts
+    unknown_file = new_project / 'my_app' / f'unknown{compiled_extension}'
+    unknown_file.write_bytes(b'')
+    process = subprocess.run(
+        [sys.executable, '-m', 'hatchling', 'build', '-t', 'wheel', '--clean-only'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    if process.returncode:  # no cov
+        raise Exception(process.stdout.decode('utf-8'))
+
+    assert not (new_project / foreign_artifact).exists()
+    assert not list((new_project / 'my_app').glob(f'fib*{compiled_extension}'))
+    assert not list(new_project.glob(f'*{compiled_extension}'))
+    assert unknown_file.is_file()
+    assert json.loads(manifest_file.read_text(encoding='utf-8'))['artifacts'] == {}
+
+
+def test_incremental(new_project, compiled_extension):
+    build_dir = os.urandom(8).hex()
+
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += f'\nincremental = true\nbuild-dir = "{build_dir}"\noptions = {{ separate = true }}'
+    project_file.write_text(contents, encoding='utf-8')
+
+    build_project()
+    assert (new_project / build_dir / 'incremental.json').is_file()
+
+    shutil.rmtree(new_project / 'dist')
+    output = build_project()
+    assert 'Mypyc incremental build: 0 of 2 modules are outdated' in output
+
+    core_logic_file = new_project / 'my_app' / 'fib.py'
+    core_logic_file.write_text(f'{core_logic_file.read_text()}\nFOO = 1\n', encoding='utf-8')
+
+    shutil.rmtree(new_project / 'dist')
+    output = build_project()
+    assert 'Mypyc incremental build: 1 of 2 modules are outdated' in output
+
+    build_dir = new_project / 'dist'
+    artifacts = list(build_dir.iterdir())
+    assert len(artifacts) == 1
+    wheel_file = artifacts[0]
+
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        names = zip_archive.namelist()
+
+    assert f'my_app/fib{compiled_extension}' not in names
+    assert len([name for name in names if name.startswith('my_app/fib') and name.endswith(compiled_extension)]) >= 1
+
+
+@pytest.mark.parametrize('engine', ['subprocess', 'in-process'])
+def test_staging(new_project, compiled_extension, engine):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += f'\nstaging = true\nincremental = true\nengine = "{engine}"\noptions = {{ separate = true }}'
+    project_file.write_text(contents, encoding='utf-8')
+    project_files = sorted(path for path in new_project.rglob('*') if 'dist' not in path.parts)
+
+    build_project()
+    assert sorted(path for path in new_project.rglob('*') if 'dist' not in path.parts) == project_files
+
+    shutil.rmtree(new_project / 'dist')
+    output = build_project()
+    assert 'Mypyc incremental build: 0 of 2 modules are outdated' in output
+
+    core_logic_file = new_project / 'my_app' / 'fib.py'
+    core_logic_file.write_text(f'{core_logic_file.read_text()}\nFOO = 1\n', encoding='utf-8')
+
+    shutil.rmtree(new_project / 'dist')
+    output = build_project()
+    assert 'Mypyc incremental build: 1 of 2 modules are outdated' in output
+    assert not list(new_project.rglob(f'*{compiled_extension}'))
+
+    build_dir = new_project / 'dist'
+    artifacts = list(build_dir.iterdir())
+    assert len(artifacts) == 1
+    wheel_file = artifacts[0]
+
+    extraction_directory = new_project.parent / '_archive'
+    extraction_directory.mkdir()
+
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        zip_archive.extractall(str(extraction_directory))
+
+    ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+    assert (extraction_directory / f'my_app__mypyc{ext_suffix}').is_file()
+    assert (extraction_directory / 'my_app' / f'__init__{ext_suffix}').is_file()
+    assert (extraction_directory / 'my_app' / f'fib{ext_suffix}').is_file()
+    assert (extraction_directory / 'my_app' / f'fib__mypyc{ext_suffix}').is_file()
+
+    process = subprocess.run(
+        [sys.executable, '-c', 'from my_app.fib import fib; print(fib(10))'],
+        cwd=str(extraction_directory),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    assert process.stdout.decode('utf-8').strip() == '55'
+
+
+@pytest.mark.parametrize('staging', [False, True])
+def test_concurrent_builds(new_project, staging):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    if staging:
+        contents += '\nstaging = true'
+    project_file.write_text(contents, encoding='utf-8')
+
+    processes = [
+        subprocess.Popen(
+            [sys.executable, '-m', 'build', '-w', '-o', f'dist{i}'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        for i in range(3)
+    ]
+    outputs = [process.communicate()[0].decode('utf-8') for process in processes]
+    assert [process.returncode for process in processes] == [0, 0, 0], '\n'.join(outputs)
+
+    assert project_file.read_text(encoding='utf-8') == contents
+    assert not (new_project / 'pyproject.toml.bak').exists()
+    if staging:
+        assert not any('to release the lock' in output for output in outputs)
+
+    for i in range(3):
+        wheels = list((new_project / f'dist{i}').iterdir())
+        assert len(wheels) == 1
+
+        with zipfile.ZipFile(str(wheels[0]), 'r') as zip_archive:
+            names = zip_archive.namelist()
+
+        ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+        assert f'my_app/fib{ext_suffix}' in names
+        assert len([name for name in names if name.endswith(ext_suffix)]) == 3
+
+
+@pytest.mark.parametrize('mode', ['fallback', 'recompile'])
+def test_editable(new_project, tmp_path, mode):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents = contents.replace('macos-max-compat = false', 'macos-max-compat = false\ndev-mode-dirs = ["."]')
+    contents += f'\neditable = "{mode}"'
+    project_file.write_text(contents, encoding='utf-8')
+
+    process = subprocess.run(
+        [sys.executable, '-m', 'hatchling', 'build', '-t', 'wheel:editable'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    assert not process.returncode, process.stdout.decode('utf-8')
+
+    ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+    assert not list(new_project.rglob(f'*{ext_suffix}'))
+
+    site_dir = tmp_path / 'site'
+    wheel_file = next((new_project / 'dist').iterdir())
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        zip_archive.extractall(str(site_dir))
+
+    def import_fib():
+        process = subprocess.run(
+            [
+                sys.executable,
+                '-c',
+                f'import site; site.addsitedir({str(site_dir)!r}); '
+                'from my_app import fib; print(fib.__file__); print(fib.fib(10))',
+            ],
+            cwd=str(tmp_path),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        assert not process.returncode, process.stdout.decode('utf-8')
+        return process.stdout.decode('utf-8').split()
+
+    location, result = import_fib()
+    assert location.endswith(ext_suffix)
+    assert not location.startswith(str(new_project))
+    assert result == '55'
+
+    core_logic_file = new_project / 'my_app' / 'fib.py'
+    core_logic_file.write_text(core_logic_file.read_text().replace('return n\n', 'return n + 1\n'), encoding='utf-8')
+
+    location, result = import_fib()
+    assert location == str(core_logic_file)
+    assert result == '144'
+
+    if mode == 'recompile':
+        manifest_file = tmp_path / 'cache' / 'editable' / 'editable.json'
+        generation = json.loads(manifest_file.read_text())['generation']
+        for _ in range(600):
+            if json.loads(manifest_file.read_text())['generation'] != generation:
+                break
+
+            time.sleep(0.5)
+
+        location, result = import_fib()
+        assert location.endswith(ext_suffix)
+        assert result == '144'
+
+
+def test_mypy_cache(new_project):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\noptions = { separate = true }'
+    project_file.write_text(contents, encoding='utf-8')
+
+    build_project()
+
+    mypy_cache_dir = new_project.parent / 'cache' / 'mypy' / sys.implementation.cache_tag
+    assert (mypy_cache_dir / '.mypy-version').is_file()
+    assert len(list(mypy_cache_dir.iterdir())) > 1
+    assert not (new_project / '.mypy_cache').exists()
+
+
+def test_unusable_cache_dir(new_project, compiled_extension, tmp_path, monkeypatch):
+    # A file is in the way, which prevents the directory from being created even by privileged users
+    blocking_file = tmp_path / 'blocking-file'
+    blocking_file.touch()
+    monkeypatch.setenv('HATCH_MYPYC_CACHE_DIR', str(blocking_file / 'cache'))
+
+    temp_dir = tmp_path / 'temp'
+    temp_dir.mkdir()
+    monkeypatch.setenv('TMPDIR', str(temp_dir))
+
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\nincremental = true'
+    project_file.write_text(contents, encoding='utf-8')
+
+    output = build_project()
+    assert 'Mypyc could not use the cache directory, persisting nothing' in output
+    assert not list(temp_dir.glob('hatch-mypyc-*'))
+
+    wheel_file = next((new_project / 'dist').iterdir())
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        names = zip_archive.namelist()
+
+    assert len([name for name in names if name.endswith(compiled_extension)]) == 3
+
+
+def test_jobs(new_project, compiled_extension):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\njobs = 2\noptions = { multi_file = true }'
+    project_file.write_text(contents, encoding='utf-8')
+
+    output = build_project()
+    assert 'files/s) using 2 jobs' in output
+
+    build_dir = new_project / 'dist'
+    artifacts = list(build_dir.iterdir())
+    assert len(artifacts) == 1
+    wheel_file = artifacts[0]
+
+    assert wheel_file.name == f'my_app-1.2.3-{best_matching_tag}.whl'
+
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        names = zip_archive.namelist()
+
+    assert len([name for name in names if name.endswith(compiled_extension)]) == 3
+
+
+@pytest.mark.parametrize('engine', ['subprocess', 'in-process'])
+def test_timing_report(new_project, engine):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += f'\ntiming-report = "reports/timings.json"\nengine = "{engine}"'
+    project_file.write_text(contents, encoding='utf-8')
+
+    output = build_project()
+    assert 'Mypyc build phases: file selection' in output
+
+    report = json.loads((new_project / 'reports' / 'timings.json').read_text(encoding='utf-8'))
+    assert report['engine'] == engine
+    assert list(report['phases']) == [
+        'file_selection',
+        'type_checking',
+        'code_generation',
+        'c_compilation',
+        'linking',
+        'artifact_collection',
+    ]
+    for timing in report['phases'].values():
+        assert timing['wall_time'] >= 0
+        assert timing['cpu_time'] >= 0
+
+    assert report['compiled_files'] == len(report['modules']['c_compilation'])
+    assert 'fib' in ', '.join(report['modules']['code_generation'])
+    assert report['modules']['linking']
+
+
+@pytest.mark.parametrize('engine', ['subprocess', 'in-process'])
+def test_log_file(new_project, engine):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += f'\nlog-file = "logs/mypyc.log"\nengine = "{engine}"'
+    project_file.write_text(contents, encoding='utf-8')
+
+    output = build_project()
+    assert 'Mypyc progress: type checking done' in output
+    assert 'Mypyc progress: 2/2 modules compiled to C' in output
+    assert re.search(r'Mypyc progress: (\d+)/\1 C files compiled', output) is not None
+    assert re.search(r'Mypyc progress: (\d+)/\1 extensions linked', output) is not None
+
+    log = (new_project / 'logs' / 'mypyc.log').read_text(encoding='utf-8')
+    assert log.count('Parsed and typechecked') == 1
+    assert 'hatch-mypyc:progress' not in log
+    # Setuptools logs to the original streams of the build process
+    if engine == 'subprocess':
+        assert 'running build_ext' in log
+
+    # The log only contains the output of the last build
+    shutil.rmtree(new_project / 'dist')
+    build_project()
+    assert (new_project / 'logs' / 'mypyc.log').read_text(encoding='utf-8').count('Parsed and typechecked') == 1
+
+
+def test_benchmarks(new_project):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\nbenchmarks = ["my_app.bench:fib_15"]\nbenchmark-repeat = 2'
+    project_file.write_text(contents, encoding='utf-8')
+
+    (new_project / 'my_app' / 'bench.py').write_text(
+        """\
+from .fib import fib
+
+
+def fib_15() -> None:
+    fib(15)
+""",
+        encoding='utf-8',
+    )
+
+    output = build_project()
+    assert 'Mypyc speedups:' in output
+
+    row = next(line for line in output.splitlines() if line.startswith('my_app.bench:fib_15'))
+    assert 'my_app/bench.py' in row
+    assert 'not compiled' not in row
+
+
+def test_profile(new_project, compiled_extension):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\nprofile = "profile.txt"'
+    project_file.write_text(contents, encoding='utf-8')
+
+    (new_project / 'my_app' / 'cli.py').write_text('def main() -> None:\n    pass\n', encoding='utf-8')
+    (new_project / 'profile.txt').write_text(
+        """\
+process 1:"python -m my_app";main (/site-packages/my_app/cli.py:2) 1
+process 1:"python -m my_app";main (/site-packages/my_app/cli.py:2);fib (/site-packages/my_app/fib.py:2) 999
+""",
+        encoding='utf-8',
+    )
+
+    output = build_project()
+    assert 'Mypyc profile-guided selection: 1 of 3 modules' in output
+    assert 'no, below threshold of 1.00%' in output
+    assert 'no, not in profile' in output
+
+    build_dir = new_project / 'dist'
+    wheel_file = next(build_dir.iterdir())
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        names = zip_archive.namelist()
+
+    compiled_files = [name for name in names if name.endswith(compiled_extension)]
+    assert len(compiled_files) == 1
+    assert compiled_files[0].startswith('my_app/fib.')
+
+
+def test_exclude_slow(new_project, compiled_extension):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\nexclude-slow = true\nmin-speedup = 1000\nbenchmark-repeat = 2\nbenchmarks = ["my_app.fib:fib_15"]'
+    project_file.write_text(contents, encoding='utf-8')
+
+    with (new_project / 'my_app' / 'fib.py').open('a', encoding='utf-8') as f:
+        f.write('\n\ndef fib_15() -> None:\n    fib(15)\n')
+
+    output = build_project()
+    assert 'Mypyc module speedups (minimum 1000.00x):' in output
+    assert re.search(r'my_app/fib\.py\s+1 benchmark\(s\)\s+\S+x\s+no', output) is not None
+    assert 'no modules are selected for compilation' in output
+
+    build_dir = new_project / 'dist'
+    wheel_file = next(build_dir.iterdir())
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        assert not [name for name in zip_archive.namelist() if name.endswith(compiled_extension)]
+
+    # Decisions are only made again for modules that changed
+    shutil.rmtree(build_dir)
+    output = build_project()
+    assert 'Mypyc module speedups' not in output
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='MSVC does not support the same PGO workflow')
+def test_pgo(new_project, tmp_path, compiled_extension):
+    from hatch_mypyc.pgo import get_compiler_family
+
+    if not get_compiler_family(os.environ.get('CC') or sysconfig.get_config_var('CC') or ''):
+        pytest.skip('GCC or Clang is required')
+
+    training_log = tmp_path / 'training.log'
+    (new_project / 'train.py').write_text(
+        f"""\
+from my_app.fib import fib
+
+with open({str(training_log)!r}, 'a', encoding='utf-8') as f:
+    f.write(f'{{fib.__module__}}\\n')
+
+fib(20)
+""",
+        encoding='utf-8',
+    )
+
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\npgo = "python train.py"'
+    project_file.write_text(contents, encoding='utf-8')
+
+    output = build_project()
+    assert 'Mypyc is building instrumented extensions for PGO' in output
+    assert 'Mypyc is building optimized extensions using PGO profiles' in output
+    assert training_log.read_text(encoding='utf-8').splitlines() == ['my_app.fib']
+
+    profile_dirs = list((tmp_path / 'cache' / 'pgo').iterdir())
+    assert len(profile_dirs) == 1
+    assert (profile_dirs[0] / '.complete').is_file()
+
+    build_dir = new_project / 'dist'
+    wheel_file = next(build_dir.iterdir())
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        assert [name for name in zip_archive.namelist() if name.endswith(compiled_extension)]
+
+    # Training only runs again when the sources change
+    shutil.rmtree(build_dir)
+    output = build_project()
+    assert 'Mypyc is reusing PGO profiles of the unchanged sources' in output
+    assert len(training_log.read_text(encoding='utf-8').splitlines()) == 1
+
+    with (new_project / 'my_app' / 'fib.py').open('a', encoding='utf-8') as f:
+        f.write('\n\ndef fib_15() -> int:\n    return fib(15)\n')
+
+    shutil.rmtree(build_dir)
+    output = build_project()
+    assert 'Mypyc is building instrumented extensions for PGO' in output
+    assert len(training_log.read_text(encoding='utf-8').splitlines()) == 2
+    assert [path.name for path in (tmp_path / 'cache' / 'pgo').iterdir()] != [profile_dirs[0].name]
+
+
+def test_pgo_staging(new_project, tmp_path):
+    from hatch_mypyc.pgo import get_compiler_family
+
+    if not get_compiler_family(os.environ.get('CC') or sysconfig.get_config_var('CC') or ''):
+        pytest.skip('GCC or Clang is required')
+
+    training_log = tmp_path / 'training.log'
+    (new_project / 'my_app' / 'train.py').write_text(
+        f"""\
+from my_app import fib
+
+with open({str(training_log)!r}, 'a', encoding='utf-8') as f:
+    f.write(f'{{fib.__file__}}\\n')
+
+fib.fib(20)
+""",
+        encoding='utf-8',
+    )
+
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\nstaging = true\npgo = "python -m my_app.train"\nexclude = ["my_app/train.py"]'
+    project_file.write_text(contents, encoding='utf-8')
+
+    output = build_project()
+    assert 'Mypyc is building optimized extensions using PGO profiles' in output
+
+    # The instrumented extensions were imported rather than the sources in the project
+    trained_files = training_log.read_text(encoding='utf-8').splitlines()
+    assert len(trained_files) == 1
+    assert trained_files[0].endswith(sysconfig.get_config_var('EXT_SUFFIX'))
+    assert not trained_files[0].startswith(str(new_project))
+
+    profile_dirs = list((tmp_path / 'cache' / 'pgo').iterdir())
+    assert len(profile_dirs) == 1
+    assert [path for path in profile_dirs[0].rglob('*') if path.suffix in {'.gcda', '.profdata'}]
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='MSVC is not configured using environment variables')
+def test_build_profile(new_project, tmp_path, monkeypatch):
+    log_file = tmp_path / 'compiler.log'
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    compiler = bin_dir / 'cc'
+    compiler.write_text(
+        f"""\
+#!{sys.executable}
+import subprocess
+import sys
+
+with open({str(log_file)!r}, 'a', encoding='utf-8') as f:
+    f.write(' '.join(sys.argv[1:]) + '\\n')
+
+sys.exit(subprocess.call(sys.argv[1:]))
+""",
+        encoding='utf-8',
+    )
+    compiler.chmod(0o755)
+    monkeypatch.setenv('CC', f'{compiler} {sysconfig.get_config_var("CC")}')
+    monkeypatch.setenv('LDSHARED', f'{compiler} {sysconfig.get_config_var("LDSHARED")}')
+    monkeypatch.setenv('CFLAGS', '-DFOO')
+
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\nbuild-profile = "custom"\nbuild-profiles = { custom = { cflags = ["-DBAR"], ldflags = ["-DBAZ"] } }'
+    project_file.write_text(contents, encoding='utf-8')
+
+    build_project()
+
+    commands = log_file.read_text(encoding='utf-8').splitlines()
+    assert all('-DFOO' in command and '-DBAR' in command for command in commands)
+    assert any('-DBAZ' in command for command in commands)
+
+    build_dir = new_project / 'dist'
+    wheel_file = next(build_dir.iterdir())
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        metadata = json.loads(zip_archive.read('my_app-1.2.3.dist-info/extra_metadata/mypyc.json'))
+
+    assert metadata == {'build-profile': ['custom'], 'cflags': ['-DBAR'], 'ldflags': ['-DBAZ']}
+
+
+@pytest.mark.skipif(
+    sys.platform == 'win32' or platform.machine().lower() not in ('x86_64', 'amd64'),
+    reason='Variants are only supported for x86-64 outside of Windows',
+)
+def test_variants(new_project):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\nvariants = ["x86-64-v2"]'
+    project_file.write_text(contents, encoding='utf-8')
+
+    output = build_project()
+    assert 'Mypyc is building extensions for x86-64-v2' in output
+
+    build_dir = new_project / 'dist'
+    wheel_file = next(build_dir.iterdir())
+    extraction_directory = new_project.parent / '_archive'
+    extraction_directory.mkdir()
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        zip_archive.extractall(str(extraction_directory))
+
+    ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+    shared_libraries = sorted(
+        str(path.relative_to(extraction_directory)) for path in extraction_directory.rglob(f'*__mypyc{ext_suffix}')
+    )
+    assert shared_libraries
+    for shared_library in shared_libraries:
+        assert (extraction_directory / f'{shared_library[: -len(ext_suffix)]}.x86_64_v2{ext_suffix}').is_file()
+
+    assert (extraction_directory / '_my_app_mypyc_variants.pth').is_file()
+    assert (extraction_directory / '_my_app_mypyc_variants.py').is_file()
+
+    # Directories added as site directories process `.pth` files
+    code = f"""\
+import site, sys
+site.addsitedir({str(extraction_directory)!r})
+from my_app.fib import fib
+assert fib(10) == 55
+print(sorted(m.__file__ for name, m in sys.modules.items() if name.endswith('__mypyc')))
+"""
+    for variant, suffix in (('x86-64-v2', f'.x86_64_v2{ext_suffix}'), ('baseline', f'__mypyc{ext_suffix}')):
+        process = subprocess.run(
+            [sys.executable, '-c', code],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=str(extraction_directory),
+            env={**os.environ, 'HATCH_MYPYC_VARIANT': variant},
+        )
+        assert process.returncode == 0, process.stdout.decode('utf-8')
+        loaded_files = eval(process.stdout.decode('utf-8'))  # noqa: S307
+        assert loaded_files
+        assert all(loaded_file.endswith(suffix) for loaded_file in loaded_files)
+
+
+def test_interpreters(new_project, monkeypatch, capsys):
+    from hatchling.builders.wheel import WheelBuilder
+
+    from hatch_mypyc.cache import ArtifactCache
+    from hatch_mypyc.plugin import MypycBuildHook
+
+    cache_dir = new_project.parent / 'artifacts'
+    config = {
+        'project': {'name': 'my-app', 'version': '1.2.3'},
+        'tool': {
+            'hatch': {
+                'build': {
+                    'targets': {
+                        'wheel': {
+                            'hooks': {
+                                'mypyc': {
+                                    'artifact-cache-dir': str(cache_dir),
+                                    'interpreters': [sys.executable, 'missing-python'],
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    }
+    builder = WheelBuilder(str(new_project), config=config)
+    build_hook = MypycBuildHook(
+        str(new_project),
+        builder.config.hook_config['mypyc'],
+        builder.config,
+        builder.metadata,
+        str(new_project / 'dist'),
+        builder.PLUGIN_NAME,
+    )
+
+    # Pretend that the current interpreter is a different one
+    get_interpreter_info = build_hook.get_interpreter_info
+
+    def get_other_interpreter_info(interpreter=None):
+        info = get_interpreter_info(interpreter)
+        if interpreter is not None:
+            info['python'] = 'other'
+
+        return info
+
+    monkeypatch.setattr(build_hook, 'get_interpreter_info', get_other_interpreter_info)
+    build_hook.prebuild_interpreters()
+
+    output = capsys.readouterr().err
+    assert 'Mypyc could not prebuild artifacts for `missing-python`' in output
+    assert f'Mypyc prebuilt and cached artifacts for `{sys.executable}`' in output
+    assert f'Mypyc progress ({sys.executable}): type checking done' in output
+    # The build happens outside of the project
+    ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+    assert not list(new_project.rglob(f'*{ext_suffix}'))
+
+    key = build_hook.get_artifact_cache_key(get_other_interpreter_info(sys.executable))
+    artifact_cache = ArtifactCache(str(cache_dir))
+    assert artifact_cache.contains(key)
+
+    restored = artifact_cache.restore(key, str(new_project))
+    assert f'my_app/fib{ext_suffix}' in restored
+    assert f'my_app/__init__{ext_suffix}' in restored
+
+    # Artifacts are only built once
+    build_hook.prebuild_interpreters()
+    assert f'Mypyc artifacts for `{sys.executable}` are already cached' in capsys.readouterr().err
+
+
+def test_shards(new_project, compiled_extension):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\nshards = 2'
+    project_file.write_text(contents, encoding='utf-8')
+
+    (new_project / 'my_app' / 'utils.py').write_text(
+        """\
+from .fib import fib
+
+
+def fib_sum(n: int) -> int:
+    return sum(fib(i) for i in range(n))
+""",
+        encoding='utf-8',
+    )
+
+    build_project()
+
+    build_dir = new_project / 'dist'
+    artifacts = list(build_dir.iterdir())
+    assert len(artifacts) == 1
+    wheel_file = artifacts[0]
+
+    assert wheel_file.name == f'my_app-1.2.3-{best_matching_tag}.whl'
+
+    extraction_directory = new_project.parent / '_archive'
+    extraction_directory.mkdir()
+
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        zip_archive.extractall(str(extraction_directory))
+
+    shared_libraries = sorted(path.name.split('.')[0] for path in extraction_directory.glob(f'*{compiled_extension}'))
+    assert shared_libraries == ['my_app_shard0__mypyc', 'my_app_shard1__mypyc']
+
+    extracted_package_dir = extraction_directory / 'my_app'
+    assert len(list(extracted_package_dir.glob(f'*{compiled_extension}'))) == 3
+
+    process = subprocess.run(
+        [sys.executable, '-c', 'from my_app.utils import fib_sum; print(fib_sum(10))'],
+        cwd=str(extraction_directory),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    assert process.stdout.decode('utf-8').strip() == '88'
+
+
+@pytest.mark.parametrize(
+    'groups, expected',
+    [
+        pytest.param('{ utils = ["my_app/utils.py"] }', ['my_app_default__mypyc', 'my_app_utils__mypyc'], id='table'),
+        # The package and the module that both others import are the core
+        pytest.param('"auto"', ['my_app_group0__mypyc', 'my_app_group1__mypyc', 'my_app_group2__mypyc'], id='auto'),
+    ],
+)
+def test_groups(new_project, compiled_extension, groups, expected):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += f'\ngroups = {groups}'
+    project_file.write_text(contents, encoding='utf-8')
+
+    (new_project / 'my_app' / 'utils.py').write_text(
+        """\
+from .fib import fib
+
+
+def fib_sum(n: int) -> int:
+    return sum(fib(i) for i in range(n))
+""",
+        encoding='utf-8',
+    )
+    (new_project / 'my_app' / 'cli.py').write_text(
+        """\
+from .fib import fib
+
+
+def main() -> None:
+    print(fib(10))
+""",
+        encoding='utf-8',
+    )
+
+    build_project()
+
+    build_dir = new_project / 'dist'
+    artifacts = list(build_dir.iterdir())
+    assert len(artifacts) == 1
+    wheel_file = artifacts[0]
+
+    extraction_directory = new_project.parent / '_archive'
+    extraction_directory.mkdir()
+
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        zip_archive.extractall(str(extraction_directory))
+
+    shared_libraries = sorted(path.name.split('.')[0] for path in extraction_directory.glob(f'*{compiled_extension}'))
+    assert shared_libraries == expected
+
+    extracted_package_dir = extraction_directory / 'my_app'
+    assert len(list(extracted_package_dir.glob(f'*{compiled_extension}'))) == 4
+
+    process = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            'from my_app.utils import fib_sum; from my_app.cli import main; print(fib_sum(10)); main()',
+        ],
+        cwd=str(extraction_directory),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    assert process.stdout.decode('utf-8').split() == ['88', '55']
+
+
+def test_lazy(new_project, compiled_extension):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\nlazy = true\nimport-report = ["my_app.cli"]\nbenchmark-repeat = 2'
+    project_file.write_text(contents, encoding='utf-8')
+
+    (new_project / 'my_app' / 'cli.py').write_text(
+        """\
+from .fib import fib
+
+
+def main() -> None:
+    print(fib(10))
+""",
+        encoding='utf-8',
+    )
+    (new_project / 'my_app' / 'plugin.py').write_text('def run() -> int:\n    return 1\n', encoding='utf-8')
+
+    output = build_project()
+    assert 'Mypyc import times:' in output
+
+    # Only the libraries of the package, the command and the module it imports are loaded
+    row = next(line for line in output.splitlines() if line.startswith('my_app.cli'))
+    assert '3 of 4' in row
+
+    build_dir = new_project / 'dist'
+    artifacts = list(build_dir.iterdir())
+    assert len(artifacts) == 1
+    wheel_file = artifacts[0]
+
+    extraction_directory = new_project.parent / '_archive'
+    extraction_directory.mkdir()
+
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        zip_archive.extractall(str(extraction_directory))
+
+    # Every module that is not part of an import cycle has its own shared library
+    shared_libraries = sorted(path.name.split('.')[0] for path in extraction_directory.glob(f'*{compiled_extension}'))
+    assert shared_libraries == [
+        'my_app__cli__mypyc',
+        'my_app__fib__mypyc',
+        'my_app__mypyc',
+        'my_app__plugin__mypyc',
+    ]
+
+    process = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            'import sys; from my_app.cli import main; main(); '
+            'print(sorted(name for name in sys.modules if name.endswith("__mypyc")))',
+        ],
+        cwd=str(extraction_directory),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    lines = process.stdout.decode('utf-8').splitlines()
+    assert lines[0] == '55'
+    assert lines[1] == "['my_app__cli__mypyc', 'my_app__fib__mypyc', 'my_app__mypyc']"
+
+
+@pytest.mark.parametrize('layout', ['flat', 'src'])
+def test_in_process_engine(new_project, compiled_extension, layout):
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\nengine = "in-process"'
+    if layout == 'src':
+        contents = contents.replace('my_app', 'src/my_app')
+        src_dir = new_project / 'src'
+        src_dir.mkdir()
+        (new_project / 'my_app').replace(src_dir / 'my_app')
+
+    project_file.write_text(contents, encoding='utf-8')
+    project_file_contents = project_file.read_text(encoding='utf-8')
+
+    build_project()
+
+    assert project_file.read_text(encoding='utf-8') == project_file_contents
+    assert not (new_project / 'pyproject.toml.bak').exists()
+
+    build_dir = new_project / 'dist'
+    artifacts = list(build_dir.iterdir())
+    assert len(artifacts) == 1
+    wheel_file = artifacts[0]
+
+    assert wheel_file.name == f'my_app-1.2.3-{best_matching_tag}.whl'
+
+    extraction_directory = new_project.parent / '_archive'
+    extraction_directory.mkdir()
+
+    with zipfile.ZipFile(str(wheel_file), 'r') as zip_archive:
+        zip_archive.extractall(str(extraction_directory))
+
+    root_paths = list(extraction_directory.iterdir())
+    assert len([root_path for root_path in root_paths if root_path.name.endswith(compiled_extension)]) == 1
+    assert len(list((extraction_directory / 'my_app').glob(f'*{compiled_extension}'))) == 2
+
+    process = subprocess.run(
+        [sys.executable, '-c', 'from my_app.fib import fib; print(fib(10))'],
+        cwd=str(extraction_directory),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    assert process.stdout.decode('utf-8').strip() == '55'
+
+
+def test_in_process_engine_restores_patches(new_project, compiled_extension):
+    import setuptools  # noqa: F401, isort: skip
+    from distutils.ccompiler import CCompiler
+
+    import mypyc.build
+    from hatchling.builders.wheel import WheelBuilder
+
+    from hatch_mypyc.plugin import MypycBuildHook
+
+    originals = (CCompiler.compile, CCompiler.link_shared_object, mypyc.build.mypycify)
+    config = {
+        'project': {'name': 'my-app', 'version': '1.2.3'},
+        'tool': {'hatch': {'build': {'targets': {'wheel': {'hooks': {'mypyc': {'engine': 'in-process'}}}}}}},
+    }
+    builder = WheelBuilder(str(new_project), config=config)
+    build_hook = MypycBuildHook(
+        str(new_project),
+        builder.config.hook_config['mypyc'],
+        builder.config,
+        builder.metadata,
+        str(new_project / 'dist'),
+        builder.PLUGIN_NAME,
+    )
+    build_data = {'artifacts': [], 'force_include': {}}
+    build_hook.initialize('standard', build_data)
+    build_hook.finalize('standard', build_data, str(new_project / 'dist' / 'my_app.whl'))
+
+    assert len(list((new_project / 'my_app').glob(f'*{compiled_extension}'))) == 2
+    assert (CCompiler.compile, CCompiler.link_shared_object, mypyc.build.mypycify) == originals
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='MSVC is not configured using environment variables')
+def test_compiler_cache(new_project, tmp_path, monkeypatch):
+    log_file = tmp_path / 'ccache.log'
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    fake_compiler_cache = bin_dir / 'ccache'
+    fake_compiler_cache.write_text(
+        f"""\
+#!{sys.executable}
+import subprocess
+import sys
+
+if sys.argv[1:] == ['--print-stats']:
+    try:
+        with open({str(log_file)!r}, encoding='utf-8') as f:
+            count = len(f.readlines())
+    except OSError:
+        count = 0
+
+    print(f'direct_cache_hit\\t0\\npreprocessed_cache_hit\\t0\\ncache_miss\\t{{count}}')
+    sys.exit(0)
+
+with open({str(log_file)!r}, 'a', encoding='utf-8') as f:
+    f.write(' '.join(sys.argv[1:]) + '\\n')
+
+sys.exit(subprocess.call(sys.argv[1:]))
+""",
+        encoding='utf-8',
+    )
+    fake_compiler_cache.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bin_dir}{os.pathsep}{os.environ["PATH"]}')
+    monkeypatch.delenv('CC', raising=False)
+
+    project_file = new_project / 'pyproject.toml'
+    contents = project_file.read_text(encoding='utf-8')
+    contents += '\ncompiler-cache = true'
+    project_file.write_text(contents, encoding='utf-8')
+
+    output = build_project()
+
+    invocations = log_file.read_text(encoding='utf-8').splitlines()
+    compilations = [invocation for invocation in invocations if ' -c ' in f' {invocation} ']
+    assert compilations
+    assert f'Compiler cache (ccache): 0 hits, {len(invocations)} misses' in output
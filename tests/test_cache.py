@@ -0,0 +1,92 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from hatch_mypyc.cache import ArtifactCache
+
+
+def create_artifacts(root, *relative_paths, size=10):
+    for relative_path in relative_paths:
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(os.urandom(size))
+
+
+class TestArtifactCache:
+    def test_miss(self, tmp_path):
+        cache = ArtifactCache(str(tmp_path / 'cache'))
+
+        assert cache.restore('foo', str(tmp_path)) is None
+        assert cache.stats()['misses'] == 1
+
+    def test_restore(self, tmp_path):
+        project_dir = tmp_path / 'project'
+        create_artifacts(project_dir, 'foo.so', 'pkg/bar.so')
+        cache = ArtifactCache(str(tmp_path / 'cache'))
+        cache.store('foo', str(project_dir), ['foo.so', 'pkg/bar.so'])
+
+        destination = tmp_path / 'destination'
+        assert cache.restore('foo', str(destination)) == ['foo.so', 'pkg/bar.so']
+        assert (destination / 'foo.so').read_bytes() == (project_dir / 'foo.so').read_bytes()
+        assert (destination / 'pkg' / 'bar.so').read_bytes() == (project_dir / 'pkg' / 'bar.so').read_bytes()
+
+    def test_contains(self, tmp_path):
+        project_dir = tmp_path / 'project'
+        create_artifacts(project_dir, 'foo.so')
+        cache = ArtifactCache(str(tmp_path / 'cache'))
+        assert not cache.contains('foo')
+
+        cache.store('foo', str(project_dir), ['foo.so'])
+        assert cache.contains('foo')
+        assert cache.stats()['misses'] == 0
+
+    def test_stats(self, tmp_path):
+        create_artifacts(tmp_path, 'foo.so', 'bar.so', size=100)
+        cache = ArtifactCache(str(tmp_path / 'cache'))
+        cache.restore('foo', str(tmp_path))
+        cache.store('foo', str(tmp_path), ['foo.so', 'bar.so'])
+        cache.restore('foo', str(tmp_path))
+        cache.restore('foo', str(tmp_path))
+
+        assert cache.stats() == {
+            'hits': 2,
+            'misses': 1,
+            'stores': 1,
+            'evictions': 0,
+            'entries': 1,
+            'bytes': 200,
+            'max_bytes': cache.max_size,
+        }
+
+    def test_eviction(self, tmp_path):
+        create_artifacts(tmp_path, 'foo.so', size=100)
+        cache = ArtifactCache(str(tmp_path / 'cache'), max_size=250)
+        cache.store('foo', str(tmp_path), ['foo.so'])
+        cache.store('bar', str(tmp_path), ['foo.so'])
+
+        # Make sure that the first entry is the most recently used
+        os.utime(os.path.join(cache.entry_dir('bar'), 'manifest.json'), (0, 0))
+        cache.restore('foo', str(tmp_path))
+        cache.store('baz', str(tmp_path), ['foo.so'])
+
+        assert os.path.isdir(cache.entry_dir('foo'))
+        assert not os.path.isdir(cache.entry_dir('bar'))
+        assert os.path.isdir(cache.entry_dir('baz'))
+
+        stats = cache.stats()
+        assert stats['evictions'] == 1
+        assert stats['bytes'] == 200
+
+    def test_concurrent_stats(self, tmp_path):
+        cache = ArtifactCache(str(tmp_path / 'cache'))
+
+        with ThreadPoolExecutor(8) as executor:
+            for future in [executor.submit(cache.record, hits=1, misses=2) for _ in range(100)]:
+                future.result()
+
+        stats = cache.stats()
+        assert stats['hits'] == 100
+        assert stats['misses'] == 200
+        assert sorted(os.listdir(cache.directory)) == ['stats.json', 'stats.lock']
@@ -0,0 +1,55 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+import json
+
+from hatch_mypyc.compiler_cache import CompilerCache, parse_ccache_stats, parse_sccache_stats
+
+
+class TestParseStats:
+    def test_ccache(self):
+        output = 'stats_updated_timestamp\t1700000000\ndirect_cache_hit\t3\npreprocessed_cache_hit\t2\ncache_miss\t4\n'
+
+        assert parse_ccache_stats(output) == {'hits': 5, 'misses': 4}
+
+    def test_ccache_unknown(self):
+        assert parse_ccache_stats('Cache directory: /foo\n') is None
+
+    def test_sccache(self):
+        output = json.dumps(
+            {'stats': {'cache_hits': {'counts': {'C/C++': 3}}, 'cache_misses': {'counts': {'C/C++': 1, 'Rust': 2}}}}
+        )
+
+        assert parse_sccache_stats(output) == {'hits': 3, 'misses': 3}
+
+    def test_sccache_unknown(self):
+        assert parse_sccache_stats('foo') is None
+
+
+class TestEnvironment:
+    def test_wrap_compiler(self, monkeypatch):
+        monkeypatch.setenv('CC', 'gcc -pthread')
+
+        assert CompilerCache('/usr/bin/ccache').get_environment() == {'CC': '/usr/bin/ccache gcc -pthread'}
+
+    def test_quote_executable(self, monkeypatch):
+        monkeypatch.setenv('CC', 'gcc')
+
+        assert CompilerCache('/opt/my tools/sccache').get_environment() == {'CC': '"/opt/my tools/sccache" gcc'}
+
+    def test_already_wrapped(self, monkeypatch):
+        monkeypatch.setenv('CC', 'sccache gcc')
+
+        assert CompilerCache('/usr/bin/ccache').get_environment() == {}
+
+    def test_directory(self, monkeypatch):
+        monkeypatch.setenv('CC', 'gcc')
+
+        assert CompilerCache('/usr/bin/ccache', '/foo').get_environment() == {
+            'CCACHE_DIR': '/foo',
+            'CC': '/usr/bin/ccache gcc',
+        }
+        assert CompilerCache('/usr/bin/sccache', '/foo').get_environment() == {
+            'SCCACHE_DIR': '/foo',
+            'CC': '/usr/bin/sccache gcc',
+        }
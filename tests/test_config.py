@@ -1,6 +1,8 @@
 # SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
 #
 # SPDX-License-Identifier: MIT
+import os
+import sysconfig
 from os.path import join as pjoin
 
 import pytest
@@ -8,6 +10,7 @@ from hatchling.builders.config import BuilderConfig
 from hatchling.builders.wheel import WheelBuilder
 
 from hatch_mypyc.plugin import MypycBuildHook
+from hatch_mypyc.remote import HTTPBackend
 
 
 class TestMypyArgs:
@@ -134,6 +137,1305 @@ class TestExclude:
             _ = build_hook.config_exclude
 
 
+class TestArtifactCacheDir:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_artifact_cache_dir == ''
+        assert build_hook.artifact_cache is None
+
+    def test_correct(self, new_project):
+        config = {'artifact-cache-dir': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_artifact_cache_dir == str(new_project / 'foo')
+        assert build_hook.artifact_cache.directory == str(new_project / 'foo')
+
+    def test_environment_variable(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_ARTIFACT_CACHE_DIR', 'bar')
+        config = {'artifact-cache-dir': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_artifact_cache_dir == str(new_project / 'bar')
+
+    def test_not_string(self, new_project):
+        config = {'artifact-cache-dir': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `artifact-cache-dir` for build hook `mypyc` must be a string'):
+            _ = build_hook.config_artifact_cache_dir
+
+
+class TestArtifactCacheMaxSize:
+    def test_correct(self, new_project):
+        config = {'artifact-cache-max-size': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_artifact_cache_max_size == 9000
+
+    def test_not_integer(self, new_project):
+        config = {'artifact-cache-max-size': '9000'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            TypeError, match='Option `artifact-cache-max-size` for build hook `mypyc` must be an integer'
+        ):
+            _ = build_hook.config_artifact_cache_max_size
+
+    def test_not_positive(self, new_project):
+        config = {'artifact-cache-max-size': 0}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `artifact-cache-max-size` for build hook `mypyc` must be greater than zero'
+        ):
+            _ = build_hook.config_artifact_cache_max_size
+
+
+class TestRemoteCache:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_remote_cache == ''
+        assert build_hook.remote_cache is None
+
+    def test_url(self, new_project):
+        config = {'remote-cache': 'https://cache.example.com/mypyc'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_remote_cache == 'https://cache.example.com/mypyc'
+        assert isinstance(build_hook.remote_cache.backend, HTTPBackend)
+
+    def test_directory(self, new_project):
+        config = {'remote-cache': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_remote_cache == str(new_project / 'foo')
+        assert build_hook.remote_cache.backend.directory == str(new_project / 'foo')
+
+    def test_environment_variable(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_REMOTE_CACHE', 'http://localhost:8080')
+        config = {'remote-cache': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_remote_cache == 'http://localhost:8080'
+
+    def test_unknown_scheme(self, new_project):
+        config = {'remote-cache': 'foo://bar'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.remote_cache is None
+
+    def test_not_string(self, new_project):
+        config = {'remote-cache': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `remote-cache` for build hook `mypyc` must be a string'):
+            _ = build_hook.config_remote_cache
+
+
+class TestRemoteCacheTimeout:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_remote_cache_timeout == 30
+
+    def test_correct(self, new_project):
+        config = {'remote-cache-timeout': 2.5, 'remote-cache': 'http://localhost:8080'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_remote_cache_timeout == 2.5
+        assert build_hook.remote_cache.backend.timeout == 2.5
+
+    def test_env_var(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_REMOTE_CACHE_TIMEOUT', '5')
+        config = {'remote-cache-timeout': 2.5}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_remote_cache_timeout == 5
+
+    def test_not_number(self, new_project):
+        config = {'remote-cache-timeout': '9000'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `remote-cache-timeout` for build hook `mypyc` must be a number'):
+            _ = build_hook.config_remote_cache_timeout
+
+    def test_not_positive(self, new_project):
+        config = {'remote-cache-timeout': 0}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `remote-cache-timeout` for build hook `mypyc` must be greater than zero'
+        ):
+            _ = build_hook.config_remote_cache_timeout
+
+
+class TestIncremental:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_incremental is False
+        assert build_hook.persistent_build_dir == ''
+
+    def test_correct(self, new_project):
+        config = {'incremental': True}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_incremental is True
+        assert build_hook.persistent_build_dir == pjoin(build_hook.config_cache_dir, 'build')
+
+    def test_not_boolean(self, new_project):
+        config = {'incremental': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `incremental` for build hook `mypyc` must be a boolean'):
+            _ = build_hook.config_incremental
+
+
+class TestStaging:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_staging is False
+        assert build_hook.build_root == str(new_project)
+
+    def test_correct(self, new_project):
+        config = {'staging': True}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_staging is True
+        build_root = build_hook.build_root
+        assert os.path.isdir(build_root)
+        assert not build_root.startswith(str(new_project))
+
+        build_hook.finalize('standard', {}, '')
+        assert not os.path.exists(build_root)
+
+    def test_persistent(self, new_project):
+        config = {'staging': True, 'incremental': True}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.build_root == pjoin(build_hook.config_cache_dir, 'build', 'staging')
+
+    def test_not_boolean(self, new_project):
+        config = {'staging': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `staging` for build hook `mypyc` must be a boolean'):
+            _ = build_hook.config_staging
+
+
+class TestLockTimeout:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_lock_timeout == 600
+        assert build_hook.build_lock.path == pjoin(build_hook.config_cache_dir, 'build.lock')
+        assert build_hook.build_lock.timeout == 600
+
+    def test_correct(self, new_project):
+        config = {'lock-timeout': 1.5}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_lock_timeout == 1.5
+
+    def test_env_var(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_LOCK_TIMEOUT', '30')
+        config = {'lock-timeout': 1.5}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_lock_timeout == 30
+
+    def test_staging(self, new_project):
+        config = {'staging': True}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.build_lock is None
+
+    def test_staging_persistent(self, new_project):
+        config = {'staging': True, 'incremental': True}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.build_lock is not None
+
+    def test_not_number(self, new_project):
+        config = {'lock-timeout': '9000'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `lock-timeout` for build hook `mypyc` must be a number'):
+            _ = build_hook.config_lock_timeout
+
+    def test_env_var_not_number(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_LOCK_TIMEOUT', 'foo')
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `lock-timeout` for build hook `mypyc` must be a number'):
+            _ = build_hook.config_lock_timeout
+
+    def test_negative(self, new_project):
+        config = {'lock-timeout': -1}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(ValueError, match='Option `lock-timeout` for build hook `mypyc` cannot be negative'):
+            _ = build_hook.config_lock_timeout
+
+
+class TestEditable:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_editable == 'fallback'
+        assert build_hook.editable is False
+        assert build_hook.staging is False
+
+    def test_correct(self, new_project):
+        config = {'editable': 'recompile'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_editable == 'recompile'
+
+    def test_environment_variable(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_EDITABLE', 'off')
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_editable == 'off'
+
+    def test_not_string(self, new_project):
+        config = {'editable': True}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `editable` for build hook `mypyc` must be a string'):
+            _ = build_hook.config_editable
+
+    def test_unknown(self, new_project):
+        config = {'editable': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `editable` for build hook `mypyc` must be one of: fallback, recompile, off'
+        ):
+            _ = build_hook.config_editable
+
+
+class TestCacheDir:
+    def test_default(self, new_project, monkeypatch):
+        monkeypatch.delenv('HATCH_MYPYC_CACHE_DIR', raising=False)
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        cache_dir = build_hook.config_cache_dir
+        assert os.path.isabs(cache_dir)
+        assert os.path.basename(cache_dir).startswith('my-app-')
+        assert not cache_dir.startswith(str(new_project))
+
+    def test_correct(self, new_project, monkeypatch):
+        monkeypatch.delenv('HATCH_MYPYC_CACHE_DIR', raising=False)
+        config = {'cache-dir': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_cache_dir == str(new_project / 'foo')
+
+    def test_environment_variable(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_CACHE_DIR', 'bar')
+        config = {'cache-dir': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_cache_dir == str(new_project / 'bar')
+
+    def test_not_string(self, new_project, monkeypatch):
+        monkeypatch.delenv('HATCH_MYPYC_CACHE_DIR', raising=False)
+        config = {'cache-dir': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `cache-dir` for build hook `mypyc` must be a string'):
+            _ = build_hook.config_cache_dir
+
+    def test_mypy_version_change(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        mypy_cache_dir = build_hook.prepare_mypy_cache_dir()
+        cached_file = os.path.join(mypy_cache_dir, 'foo.json')
+        with open(cached_file, 'w', encoding='utf-8'):
+            pass
+
+        assert build_hook.prepare_mypy_cache_dir() == mypy_cache_dir
+        assert os.path.isfile(cached_file)
+
+        with open(os.path.join(mypy_cache_dir, '.mypy-version'), 'w', encoding='utf-8') as f:
+            f.write('0.0.0')
+
+        assert build_hook.prepare_mypy_cache_dir() == mypy_cache_dir
+        assert not os.path.isfile(cached_file)
+
+    def test_concurrent_preparation(self, new_project):
+        from concurrent.futures import ThreadPoolExecutor
+
+        build_dir = new_project / 'dist'
+        build_hooks = [MypycBuildHook(str(new_project), {}, None, None, str(build_dir), 'wheel') for _ in range(16)]
+
+        # Builds with different versions of Mypy repeatedly wipe the cache
+        with ThreadPoolExecutor(max_workers=len(build_hooks)) as executor:
+            mypy_cache_dirs = set(
+                executor.map(
+                    lambda i: build_hooks[i].prepare_mypy_cache_dir('tag', f'0.{i % 2}'), range(len(build_hooks))
+                )
+            )
+
+        assert len(mypy_cache_dirs) == 1
+        mypy_cache_dir = mypy_cache_dirs.pop()
+        assert os.listdir(mypy_cache_dir) == ['.mypy-version']
+        with open(os.path.join(mypy_cache_dir, '.mypy-version'), encoding='utf-8') as f:
+            assert f.read() in {'0.0', '0.1'}
+
+
+class TestJobs:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_jobs >= 1
+
+    def test_correct(self, new_project):
+        config = {'jobs': 4}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_jobs == 4
+
+    def test_environment_variable(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_JOBS', '2')
+        config = {'jobs': 4}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_jobs == 2
+
+    def test_not_integer(self, new_project):
+        config = {'jobs': '4'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `jobs` for build hook `mypyc` must be an integer'):
+            _ = build_hook.config_jobs
+
+    def test_negative(self, new_project):
+        config = {'jobs': -1}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(ValueError, match='Option `jobs` for build hook `mypyc` cannot be negative'):
+            _ = build_hook.config_jobs
+
+
+class TestShards:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_shards == 0
+
+    def test_correct(self, new_project):
+        config = {'shards': 4}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_shards == 4
+
+    def test_not_integer(self, new_project):
+        config = {'shards': '4'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `shards` for build hook `mypyc` must be an integer'):
+            _ = build_hook.config_shards
+
+    def test_negative(self, new_project):
+        config = {'shards': -1}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(ValueError, match='Option `shards` for build hook `mypyc` cannot be negative'):
+            _ = build_hook.config_shards
+
+    def test_separation(self, new_project):
+        config = {'shards': 4, 'options': {'separate': True}}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `shards` for build hook `mypyc` cannot be used with the `separate` option'
+        ):
+            _ = build_hook.config_shards
+
+
+class TestGroups:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_groups == {}
+
+    def test_correct(self, new_project):
+        config = {'groups': {'core': ['my_app/core/'], 'plugins': ['my_app/plugins/']}}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_groups == {'core': ['my_app/core/'], 'plugins': ['my_app/plugins/']}
+
+    def test_auto(self, new_project):
+        config = {'groups': 'auto'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_groups == 'auto'
+
+    def test_unknown_string(self, new_project):
+        config = {'groups': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `groups` for build hook `mypyc` must be a table or the string `auto`'
+        ):
+            _ = build_hook.config_groups
+
+    def test_not_table(self, new_project):
+        config = {'groups': ['foo']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            TypeError, match='Option `groups` for build hook `mypyc` must be a table or the string `auto`'
+        ):
+            _ = build_hook.config_groups
+
+    def test_invalid_name(self, new_project):
+        config = {'groups': {'foo-bar': ['foo/']}}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError,
+            match='Group `foo-bar` of option `groups` for build hook `mypyc` must only contain letters, digits and '
+            'underscores',
+        ):
+            _ = build_hook.config_groups
+
+    def test_patterns_not_array(self, new_project):
+        config = {'groups': {'foo': 'foo/'}}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            TypeError,
+            match='Group `foo` of option `groups` for build hook `mypyc` must be an array of non-empty strings',
+        ):
+            _ = build_hook.config_groups
+
+    def test_pattern_empty_string(self, new_project):
+        config = {'groups': {'foo': ['']}}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            TypeError,
+            match='Group `foo` of option `groups` for build hook `mypyc` must be an array of non-empty strings',
+        ):
+            _ = build_hook.config_groups
+
+    def test_separation(self, new_project):
+        config = {'groups': 'auto', 'options': {'separate': True}}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `groups` for build hook `mypyc` cannot be used with the `separate` option'
+        ):
+            _ = build_hook.config_groups
+
+    def test_shards(self, new_project):
+        config = {'groups': 'auto', 'shards': 4}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `groups` for build hook `mypyc` cannot be used with the `shards` option'
+        ):
+            _ = build_hook.config_groups
+
+
+class TestLazy:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_lazy is False
+
+    def test_correct(self, new_project):
+        config = {'lazy': True}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_lazy is True
+
+    def test_not_boolean(self, new_project):
+        config = {'lazy': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `lazy` for build hook `mypyc` must be a boolean'):
+            _ = build_hook.config_lazy
+
+    def test_separation(self, new_project):
+        config = {'lazy': True, 'options': {'separate': True}}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `lazy` for build hook `mypyc` cannot be used with the `separate` option'
+        ):
+            _ = build_hook.config_lazy
+
+    def test_shards(self, new_project):
+        config = {'lazy': True, 'shards': 4}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `lazy` for build hook `mypyc` cannot be used with the `shards` option'
+        ):
+            _ = build_hook.config_lazy
+
+    def test_groups(self, new_project):
+        config = {'lazy': True, 'groups': 'auto'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `lazy` for build hook `mypyc` cannot be used with the `groups` option'
+        ):
+            _ = build_hook.config_lazy
+
+
+class TestEngine:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_engine == 'subprocess'
+
+    def test_correct(self, new_project):
+        config = {'engine': 'in-process'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_engine == 'in-process'
+
+    def test_environment_variable(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_ENGINE', 'in-process')
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_engine == 'in-process'
+
+    def test_not_string(self, new_project):
+        config = {'engine': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `engine` for build hook `mypyc` must be a string'):
+            _ = build_hook.config_engine
+
+    def test_unknown(self, new_project):
+        config = {'engine': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `engine` for build hook `mypyc` must be one of: subprocess, in-process'
+        ):
+            _ = build_hook.config_engine
+
+
+class TestCompilerCache:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_compiler_cache == ''
+        assert build_hook.compiler_cache is None
+
+    def test_auto_detect(self, new_project, monkeypatch):
+        monkeypatch.setattr('hatch_mypyc.plugin.find_compiler_cache', lambda: '/usr/bin/sccache')
+        config = {'compiler-cache': True, 'compiler-cache-dir': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_compiler_cache == '/usr/bin/sccache'
+        assert build_hook.compiler_cache.name == 'sccache'
+        assert build_hook.compiler_cache.directory == str(new_project / 'foo')
+        assert build_hook.persistent_build_dir == pjoin(build_hook.config_cache_dir, 'build')
+
+    def test_auto_detect_not_found(self, new_project, monkeypatch):
+        monkeypatch.setattr('hatch_mypyc.plugin.find_compiler_cache', lambda: None)
+        config = {'compiler-cache': True}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.compiler_cache is None
+
+    def test_unknown_executable(self, new_project):
+        config = {'compiler-cache': 'foo-bar-baz'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError,
+            match=(
+                'Option `compiler-cache` for build hook `mypyc` refers to an executable '
+                'that could not be found: foo-bar-baz'
+            ),
+        ):
+            _ = build_hook.config_compiler_cache
+
+    def test_empty_string(self, new_project):
+        config = {'compiler-cache': ''}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `compiler-cache` for build hook `mypyc` cannot be an empty string'
+        ):
+            _ = build_hook.config_compiler_cache
+
+    def test_not_boolean_or_string(self, new_project):
+        config = {'compiler-cache': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            TypeError, match='Option `compiler-cache` for build hook `mypyc` must be a boolean or a string'
+        ):
+            _ = build_hook.config_compiler_cache
+
+    def test_directory_not_string(self, new_project):
+        config = {'compiler-cache-dir': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `compiler-cache-dir` for build hook `mypyc` must be a string'):
+            _ = build_hook.config_compiler_cache_dir
+
+
+class TestTimingReport:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_timing_report == ''
+
+    def test_correct(self, new_project):
+        config = {'timing-report': 'timings.json'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_timing_report == str(new_project / 'timings.json')
+
+    def test_environment_variable(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_TIMING_REPORT', 'report.json')
+        config = {'timing-report': 'timings.json'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_timing_report == str(new_project / 'report.json')
+
+    def test_not_string(self, new_project):
+        config = {'timing-report': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `timing-report` for build hook `mypyc` must be a string'):
+            _ = build_hook.config_timing_report
+
+
+class TestLogFile:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_log_file == ''
+
+    def test_correct(self, new_project):
+        config = {'log-file': 'mypyc.log'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_log_file == str(new_project / 'mypyc.log')
+
+    def test_environment_variable(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_LOG_FILE', 'build.log')
+        config = {'log-file': 'mypyc.log'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_log_file == str(new_project / 'build.log')
+
+    def test_not_string(self, new_project):
+        config = {'log-file': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `log-file` for build hook `mypyc` must be a string'):
+            _ = build_hook.config_log_file
+
+
+class TestInterpreters:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_interpreters == []
+
+    def test_correct(self, new_project):
+        config = {'interpreters': ['python3.10', 'python3.11', 'python3.10']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_interpreters == ['python3.10', 'python3.11']
+
+    def test_environment_variable(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_INTERPRETERS', 'python3.12, pypy3,')
+        config = {'interpreters': ['python3.10']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_interpreters == ['python3.12', 'pypy3']
+
+    def test_not_array(self, new_project):
+        config = {'interpreters': 'python3.10'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `interpreters` for build hook `mypyc` must be an array'):
+            _ = build_hook.config_interpreters
+
+    def test_interpreter_not_string(self, new_project):
+        config = {'interpreters': [9000]}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            TypeError, match='Interpreter #1 of option `interpreters` for build hook `mypyc` must be a string'
+        ):
+            _ = build_hook.config_interpreters
+
+    def test_interpreter_empty_string(self, new_project):
+        config = {'interpreters': ['']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError,
+            match='Interpreter #1 of option `interpreters` for build hook `mypyc` cannot be an empty string',
+        ):
+            _ = build_hook.config_interpreters
+
+
+class TestBenchmarks:
+    def test_correct(self, new_project):
+        config = {'benchmarks': ['foo.bar:baz', 'foo:Bar.baz']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_benchmarks == ['foo.bar:baz', 'foo:Bar.baz']
+
+    def test_not_array(self, new_project):
+        config = {'benchmarks': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `benchmarks` for build hook `mypyc` must be an array'):
+            _ = build_hook.config_benchmarks
+
+    def test_benchmark_not_string(self, new_project):
+        config = {'benchmarks': [9000]}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            TypeError, match='Benchmark #1 of option `benchmarks` for build hook `mypyc` must be a string'
+        ):
+            _ = build_hook.config_benchmarks
+
+    def test_benchmark_no_callable(self, new_project):
+        config = {'benchmarks': ['foo.bar']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError,
+            match='Benchmark #1 of option `benchmarks` for build hook `mypyc` must be in the form `module:callable`',
+        ):
+            _ = build_hook.config_benchmarks
+
+
+class TestBenchmarkRepeat:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_benchmark_repeat == 5
+
+    def test_not_integer(self, new_project):
+        config = {'benchmark-repeat': '5'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `benchmark-repeat` for build hook `mypyc` must be an integer'):
+            _ = build_hook.config_benchmark_repeat
+
+    def test_too_low(self, new_project):
+        config = {'benchmark-repeat': 1}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(ValueError, match='Option `benchmark-repeat` for build hook `mypyc` must be at least 2'):
+            _ = build_hook.config_benchmark_repeat
+
+
+class TestImportReport:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_import_report == []
+
+    def test_correct(self, new_project):
+        config = {'import-report': ['foo.cli', 'foo']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_import_report == ['foo.cli', 'foo']
+
+    def test_not_array(self, new_project):
+        config = {'import-report': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `import-report` for build hook `mypyc` must be an array'):
+            _ = build_hook.config_import_report
+
+    def test_module_not_string(self, new_project):
+        config = {'import-report': ['']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            TypeError, match='Module #1 of option `import-report` for build hook `mypyc` must be a non-empty string'
+        ):
+            _ = build_hook.config_import_report
+
+
+class TestProfile:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_profile == ''
+
+    def test_correct(self, new_project):
+        (new_project / 'profile.txt').touch()
+        config = {'profile': 'profile.txt'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_profile == str(new_project / 'profile.txt')
+
+    def test_not_string(self, new_project):
+        config = {'profile': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `profile` for build hook `mypyc` must be a string'):
+            _ = build_hook.config_profile
+
+    def test_not_found(self, new_project):
+        config = {'profile': 'profile.txt'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `profile` for build hook `mypyc` refers to a file that does not exist'
+        ):
+            _ = build_hook.config_profile
+
+
+class TestProfileThreshold:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_profile_threshold == 0.01
+
+    def test_integer(self, new_project):
+        config = {'profile-threshold': 0}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_profile_threshold == 0
+
+    def test_not_number(self, new_project):
+        config = {'profile-threshold': '0.1'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `profile-threshold` for build hook `mypyc` must be a number'):
+            _ = build_hook.config_profile_threshold
+
+    def test_out_of_range(self, new_project):
+        config = {'profile-threshold': 1.5}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `profile-threshold` for build hook `mypyc` must be between 0 and 1'
+        ):
+            _ = build_hook.config_profile_threshold
+
+
+class TestProfileTop:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_profile_top == 0
+
+    def test_not_integer(self, new_project):
+        config = {'profile-top': '5'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `profile-top` for build hook `mypyc` must be an integer'):
+            _ = build_hook.config_profile_top
+
+    def test_negative(self, new_project):
+        config = {'profile-top': -1}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(ValueError, match='Option `profile-top` for build hook `mypyc` cannot be negative'):
+            _ = build_hook.config_profile_top
+
+
+class TestExcludeSlow:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_exclude_slow is False
+
+    def test_not_boolean(self, new_project):
+        config = {'exclude-slow': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `exclude-slow` for build hook `mypyc` must be a boolean'):
+            _ = build_hook.config_exclude_slow
+
+
+class TestMinSpeedup:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_min_speedup == 1.0
+
+    def test_correct(self, new_project):
+        config = {'min-speedup': 1.5}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_min_speedup == 1.5
+
+    def test_not_number(self, new_project):
+        config = {'min-speedup': '1.5'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `min-speedup` for build hook `mypyc` must be a number'):
+            _ = build_hook.config_min_speedup
+
+    def test_not_positive(self, new_project):
+        config = {'min-speedup': 0}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(ValueError, match='Option `min-speedup` for build hook `mypyc` must be greater than zero'):
+            _ = build_hook.config_min_speedup
+
+
+class TestPGO:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_pgo == []
+
+    def test_string(self, new_project):
+        config = {'pgo': 'python -m my_app "foo bar"'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_pgo == ['python', '-m', 'my_app', 'foo bar']
+
+    def test_array(self, new_project):
+        config = {'pgo': ['python', '-m', 'my_app']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_pgo == ['python', '-m', 'my_app']
+
+    def test_not_string_nor_array(self, new_project):
+        config = {'pgo': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `pgo` for build hook `mypyc` must be a string or an array'):
+            _ = build_hook.config_pgo
+
+    def test_argument_not_string(self, new_project):
+        config = {'pgo': [9000]}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Argument #1 of option `pgo` for build hook `mypyc` must be a string'):
+            _ = build_hook.config_pgo
+
+    def test_argument_empty_string(self, new_project):
+        config = {'pgo': ['']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Argument #1 of option `pgo` for build hook `mypyc` cannot be an empty string'
+        ):
+            _ = build_hook.config_pgo
+
+
+class TestBuildProfile:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_build_profile == []
+        assert build_hook.build_profile_flags == {'cflags': [], 'ldflags': []}
+
+    def test_string(self, new_project):
+        config = {'build-profile': 'lto'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_build_profile == ['lto']
+        assert build_hook.build_profile_flags == {'cflags': ['-flto'], 'ldflags': ['-flto']}
+
+    def test_combined(self, new_project):
+        config = {'build-profile': ['lto', 'native']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.build_profile_flags == {'cflags': ['-flto', '-march=native'], 'ldflags': ['-flto']}
+
+    def test_env_var(self, new_project, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_BUILD_PROFILE', 'lto, native')
+        config = {'build-profile': 'portable'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_build_profile == ['lto', 'native']
+
+    def test_not_string_nor_array(self, new_project):
+        config = {'build-profile': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            TypeError, match='Option `build-profile` for build hook `mypyc` must be a string or an array'
+        ):
+            _ = build_hook.config_build_profile
+
+    def test_unknown(self, new_project):
+        config = {'build-profile': 'foo'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError, match='Option `build-profile` for build hook `mypyc` must be one of: lto, native, portable'
+        ):
+            _ = build_hook.config_build_profile
+
+    def test_custom(self, new_project):
+        config = {
+            'build-profile': 'x86-64-v3',
+            'build-profiles': {'x86-64-v3': {'cflags': ['-march=x86-64-v3']}, 'lto': {'cflags': ['-flto=auto']}},
+        }
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.build_profile_flags == {'cflags': ['-march=x86-64-v3'], 'ldflags': []}
+        assert build_hook.config_build_profiles['lto'] == {'cflags': ['-flto=auto'], 'ldflags': []}
+
+    def test_profiles_not_table(self, new_project):
+        config = {'build-profiles': 9000}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `build-profiles` for build hook `mypyc` must be a table'):
+            _ = build_hook.config_build_profiles
+
+    def test_profile_not_table(self, new_project):
+        config = {'build-profiles': {'foo': 9000}}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            TypeError, match='Profile `foo` of option `build-profiles` for build hook `mypyc` must be a table'
+        ):
+            _ = build_hook.config_build_profiles
+
+    def test_flags_not_array(self, new_project):
+        config = {'build-profiles': {'foo': {'ldflags': '-flto'}}}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            TypeError,
+            match=(
+                'Field `ldflags` of profile `foo` of option `build-profiles` for build hook `mypyc` '
+                'must be an array of non-empty strings'
+            ),
+        ):
+            _ = build_hook.config_build_profiles
+
+
+class TestVariants:
+    def test_default(self, new_project):
+        config = {}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_variants == []
+
+    def test_correct(self, new_project):
+        config = {'variants': ['x86-64-v3', 'x86-64-v2', 'x86-64-v3']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        assert build_hook.config_variants == ['x86-64-v3', 'x86-64-v2']
+
+    def test_not_array(self, new_project):
+        config = {'variants': 'x86-64-v3'}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Option `variants` for build hook `mypyc` must be an array'):
+            _ = build_hook.config_variants
+
+    def test_variant_not_string(self, new_project):
+        config = {'variants': [3]}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(TypeError, match='Variant #1 of option `variants` for build hook `mypyc` must be a string'):
+            _ = build_hook.config_variants
+
+    def test_unknown(self, new_project):
+        config = {'variants': ['armv9']}
+        build_dir = new_project / 'dist'
+        build_hook = MypycBuildHook(str(new_project), config, None, None, str(build_dir), 'wheel')
+
+        with pytest.raises(
+            ValueError,
+            match=(
+                'Variant #1 of option `variants` for build hook `mypyc` must be one of: '
+                'x86-64-v2, x86-64-v3, x86-64-v4'
+            ),
+        ):
+            _ = build_hook.config_variants
+
+
 class TestPatternMatching:
     def test_default_include(self, tmp_path):
         build_dir = tmp_path / 'dist'
@@ -304,6 +1606,146 @@ class TestPackageSource:
         assert build_hook.package_source == 'src'
 
 
+class TestFileSelectionCache:
+    @staticmethod
+    def get_build_hook(project_dir):
+        config = {
+            'project': {'name': 'my_app', 'version': '0.0.1'},
+            'tool': {
+                'hatch': {
+                    'build': {
+                        'targets': {'wheel': {'include': ['foo'], 'hooks': {'mypyc': {'exclude': ['foo/baz.py']}}}},
+                    },
+                },
+            },
+        }
+        builder = WheelBuilder(str(project_dir), config=config)
+        return MypycBuildHook(
+            str(project_dir),
+            builder.config.hook_config['mypyc'],
+            builder.config,
+            None,
+            str(project_dir / 'dist'),
+            builder.PLUGIN_NAME,
+        )
+
+    def test_unchanged(self, tmp_path, monkeypatch):
+        foo_dir = tmp_path / 'foo'
+        foo_dir.mkdir()
+        (foo_dir / 'bar.py').touch()
+        (foo_dir / 'baz.py').touch()
+
+        build_hook = self.get_build_hook(tmp_path)
+        assert build_hook.included_files == [pjoin('foo', 'bar.py')]
+        build_hook.save_file_selection()
+
+        build_hook = self.get_build_hook(tmp_path)
+        monkeypatch.setattr(build_hook.build_config.builder, 'recurse_included_files', None)
+        assert build_hook.included_files == [pjoin('foo', 'bar.py')]
+        assert list(build_hook.source_hashes) == ['foo/bar.py', 'foo/baz.py']
+
+    def test_new_file(self, tmp_path):
+        foo_dir = tmp_path / 'foo'
+        foo_dir.mkdir()
+        (foo_dir / 'bar.py').touch()
+
+        build_hook = self.get_build_hook(tmp_path)
+        assert build_hook.included_files == [pjoin('foo', 'bar.py')]
+        build_hook.save_file_selection()
+
+        new_dir = foo_dir / 'new'
+        new_dir.mkdir()
+        (new_dir / 'qux.py').touch()
+
+        build_hook = self.get_build_hook(tmp_path)
+        assert build_hook.included_files == [pjoin('foo', 'bar.py'), pjoin('foo', 'new', 'qux.py')]
+
+    def test_file_added_during_build(self, tmp_path):
+        foo_dir = tmp_path / 'foo'
+        foo_dir.mkdir()
+        (foo_dir / 'bar.py').touch()
+
+        build_hook = self.get_build_hook(tmp_path)
+        assert build_hook.included_files == [pjoin('foo', 'bar.py')]
+        (foo_dir / 'qux.py').touch()
+        build_hook.save_file_selection()
+
+        build_hook = self.get_build_hook(tmp_path)
+        assert build_hook.included_files == [pjoin('foo', 'bar.py'), pjoin('foo', 'qux.py')]
+
+    def test_artifacts_built_in_place(self, tmp_path, monkeypatch):
+        foo_dir = tmp_path / 'foo'
+        foo_dir.mkdir()
+        (foo_dir / 'bar.py').touch()
+
+        build_hook = self.get_build_hook(tmp_path)
+        assert build_hook.included_files == [pjoin('foo', 'bar.py')]
+        (foo_dir / 'bar.so').touch()
+        (tmp_path / 'build').mkdir()
+        (tmp_path / 'build' / '__native.c').touch()
+        build_hook.save_file_selection()
+
+        build_hook = self.get_build_hook(tmp_path)
+        monkeypatch.setattr(build_hook.build_config.builder, 'recurse_included_files', None)
+        assert build_hook.included_files == [pjoin('foo', 'bar.py')]
+
+
+class TestSpeedupMeasurement:
+    @staticmethod
+    def get_build_hook(project_dir, hook_config):
+        config = {
+            'project': {'name': 'my-app', 'version': '1.2.3'},
+            'tool': {'hatch': {'build': {'targets': {'wheel': {'hooks': {'mypyc': hook_config}}}}}},
+        }
+        builder = WheelBuilder(str(project_dir), config=config)
+        return MypycBuildHook(
+            str(project_dir),
+            builder.config.hook_config['mypyc'],
+            builder.config,
+            builder.metadata,
+            str(project_dir / 'dist'),
+            builder.PLUGIN_NAME,
+        )
+
+    @pytest.mark.parametrize(
+        'hook_config, artifacts, expected',
+        [
+            pytest.param(
+                {},
+                ['my_app/__init__', 'my_app/fib', 'abc123__mypyc'],
+                {'my_app': 'abc123__mypyc', 'my_app.fib': 'abc123__mypyc'},
+                id='shared',
+            ),
+            pytest.param(
+                {'options': {'separate': True}},
+                ['my_app/__init__', 'my_app/fib', 'my_app__mypyc', 'my_app/fib__mypyc'],
+                {'my_app': 'my_app__mypyc', 'my_app.fib': 'my_app.fib__mypyc'},
+                id='separate',
+            ),
+            pytest.param(
+                {'groups': {'core': ['my_app/fib.py']}},
+                ['my_app/__init__', 'my_app/fib', 'my_app_core__mypyc', 'my_app_default__mypyc'],
+                {'my_app': 'my_app_default__mypyc', 'my_app.fib': 'my_app_core__mypyc'},
+                id='groups',
+            ),
+        ],
+    )
+    def test_module_libraries(self, new_project, hook_config, artifacts, expected):
+        build_hook = self.get_build_hook(new_project, hook_config)
+        ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+
+        assert build_hook.get_module_libraries([f'{artifact}{ext_suffix}' for artifact in artifacts]) == expected
+
+    def test_compile_bytecode(self, new_project, tmp_path):
+        build_hook = self.get_build_hook(new_project, {})
+        pycache_prefix = tmp_path / 'pycache'
+        build_hook.compile_bytecode(str(pycache_prefix))
+
+        compiled_files = sorted(path.name.split('.')[0] for path in pycache_prefix.rglob('*.pyc'))
+        assert compiled_files == ['__init__', 'fib']
+        assert not list(new_project.rglob('__pycache__'))
+
+
 def test_coverage(new_project):
     config = {
         'project': {'name': 'my_app', 'version': '0.0.1'},
@@ -330,8 +1772,6 @@ def test_coverage(new_project):
     assert build_hook.config_include is build_hook.config_include
     assert build_hook.config_exclude is build_hook.config_exclude
     assert build_hook.package_source is build_hook.package_source
-    assert build_hook.include_spec is build_hook.include_spec
-    assert build_hook.exclude_spec is build_hook.exclude_spec
     assert build_hook.included_files is build_hook.included_files
     assert build_hook.normalized_included_files is build_hook.normalized_included_files
     assert build_hook.artifact_globs is build_hook.artifact_globs
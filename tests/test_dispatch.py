@@ -0,0 +1,39 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+import pytest
+
+from hatch_mypyc.dispatch import X86_64_V2, X86_64_V3, X86_64_V4, get_variant_tag, select_variant
+
+
+@pytest.fixture(autouse=True)
+def no_override(monkeypatch):
+    monkeypatch.delenv('HATCH_MYPYC_VARIANT', raising=False)
+
+
+class TestSelectVariant:
+    def test_highest_supported(self):
+        assert select_variant(['x86-64-v2', 'x86-64-v3', 'x86-64-v4'], set(X86_64_V3)) == 'x86-64-v3'
+
+    def test_order_independent(self):
+        assert select_variant(['x86-64-v4', 'x86-64-v2'], set(X86_64_V4)) == 'x86-64-v4'
+
+    def test_baseline(self):
+        assert select_variant(['x86-64-v3'], set(X86_64_V2)) == ''
+
+    def test_no_features(self):
+        assert select_variant(['x86-64-v2'], set()) == ''
+
+    def test_override(self, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_VARIANT', 'x86-64-v2')
+
+        assert select_variant(['x86-64-v2', 'x86-64-v3'], set(X86_64_V3)) == 'x86-64-v2'
+
+    def test_override_baseline(self, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_VARIANT', 'baseline')
+
+        assert select_variant(['x86-64-v2'], set(X86_64_V2)) == ''
+
+
+def test_variant_tag():
+    assert get_variant_tag('x86-64-v3') == 'x86_64_v3'
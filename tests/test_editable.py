@@ -0,0 +1,232 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+import os
+import shutil
+import sys
+import time
+
+from hatch_mypyc.editable import (
+    KEPT_GENERATIONS,
+    EditableFinder,
+    get_file_state,
+    hash_file,
+    load_manifest,
+    publish,
+    recompile,
+)
+
+PACKAGES = ['pkg', 'pkg__mypyc']
+RECOMPILE_SCRIPT = """\
+import sys
+
+with open(sys.argv[1], 'w') as f:
+    f.write('recompiled')
+"""
+
+
+def create_project(tmp_path, *, recompile_command=None):
+    project_dir = tmp_path / 'project'
+    staging_dir = tmp_path / 'staging'
+    editable_dir = tmp_path / 'editable'
+    for root in (project_dir, staging_dir):
+        package_dir = root / 'pkg'
+        package_dir.mkdir(parents=True)
+        (package_dir / '__init__.py').write_text('')
+        (package_dir / 'foo.py').write_text('FOO = 1\n')
+        (package_dir / 'bar.py').write_text('from pkg.foo import FOO\n')
+
+    for artifact in ('pkg/__init__.so', 'pkg/foo.so', 'pkg/bar.so', 'pkg__mypyc.so'):
+        (staging_dir / artifact).write_text('')
+
+    manifest = {
+        'root': str(project_dir),
+        'staging': str(staging_dir),
+        'artifacts': ['pkg/__init__.so', 'pkg/foo.so', 'pkg/bar.so', 'pkg__mypyc.so'],
+        'modules': {
+            'pkg': {'source': 'pkg/__init__.py', 'artifact': 'pkg/__init__.so', 'package': True, 'dependencies': []},
+            'pkg.foo': {'source': 'pkg/foo.py', 'artifact': 'pkg/foo.so', 'package': False, 'dependencies': []},
+            'pkg.bar': {
+                'source': 'pkg/bar.py',
+                'artifact': 'pkg/bar.so',
+                'package': False,
+                'dependencies': ['pkg.foo'],
+            },
+        },
+        'libraries': {'pkg__mypyc': 'pkg__mypyc.so'},
+        'sources': {
+            relative_path: [
+                *get_file_state(str(project_dir / relative_path)),
+                hash_file(str(project_dir / relative_path)),
+            ]
+            for relative_path in ('pkg/__init__.py', 'pkg/foo.py', 'pkg/bar.py')
+        },
+        'recompile': recompile_command,
+    }
+    manifest_file = editable_dir / 'editable.json'
+    editable_dir.mkdir()
+    publish(str(manifest_file), manifest, str(staging_dir))
+
+    return project_dir, str(manifest_file)
+
+
+class TestEditableFinder:
+    def test_unknown_package(self, tmp_path):
+        _, manifest_file = create_project(tmp_path)
+        finder = EditableFinder(manifest_file, PACKAGES)
+
+        assert finder.find_spec('foo') is None
+        assert finder.find_spec('pkg.baz') is None
+
+    def test_missing_manifest(self, tmp_path):
+        finder = EditableFinder(str(tmp_path / 'editable.json'), PACKAGES)
+
+        assert finder.find_spec('pkg') is None
+
+    def test_fresh(self, tmp_path):
+        project_dir, manifest_file = create_project(tmp_path)
+        generation = load_manifest(manifest_file)['generation']
+        finder = EditableFinder(manifest_file, PACKAGES)
+
+        spec = finder.find_spec('pkg')
+        assert spec.origin == os.path.join(generation, 'pkg/__init__.so')
+        assert spec.submodule_search_locations == [str(project_dir / 'pkg')]
+
+        spec = finder.find_spec('pkg.bar')
+        assert spec.origin == os.path.join(generation, 'pkg/bar.so')
+        assert spec.submodule_search_locations is None
+
+        spec = finder.find_spec('pkg__mypyc')
+        assert spec.origin == os.path.join(generation, 'pkg__mypyc.so')
+
+    def test_touched(self, tmp_path):
+        project_dir, manifest_file = create_project(tmp_path)
+        source = project_dir / 'pkg' / 'foo.py'
+        os.utime(source, ns=(0, 0))
+        finder = EditableFinder(manifest_file, PACKAGES)
+
+        assert finder.find_spec('pkg.foo') is not None
+
+    def test_changed(self, tmp_path):
+        project_dir, manifest_file = create_project(tmp_path)
+        (project_dir / 'pkg' / 'foo.py').write_text('FOO = 2\n')
+        finder = EditableFinder(manifest_file, PACKAGES)
+
+        assert finder.find_spec('pkg.foo').origin == str(project_dir / 'pkg' / 'foo.py')
+        assert finder.find_spec('pkg.bar').origin == str(project_dir / 'pkg' / 'bar.py')
+        assert finder.find_spec('pkg').origin.endswith('__init__.so')
+        assert finder.find_spec('pkg__mypyc') is not None
+        assert not finder.recompiling
+
+    def test_uncompiled_submodule(self, tmp_path):
+        project_dir, manifest_file = create_project(tmp_path)
+        (project_dir / 'pkg' / 'baz.py').write_text('')
+        finder = EditableFinder(manifest_file, PACKAGES)
+
+        assert finder.find_spec('pkg.baz').origin == str(project_dir / 'pkg' / 'baz.py')
+
+    def test_deleted(self, tmp_path):
+        project_dir, manifest_file = create_project(tmp_path)
+        (project_dir / 'pkg' / 'bar.py').unlink()
+        finder = EditableFinder(manifest_file, PACKAGES)
+
+        assert finder.find_spec('pkg.bar') is None
+        assert finder.find_spec('pkg.foo').origin.endswith('foo.so')
+
+
+class TestPublish:
+    def test_generations(self, tmp_path):
+        _, manifest_file = create_project(tmp_path)
+        first_generation = load_manifest(manifest_file)['generation']
+        generations_dir = os.path.dirname(first_generation)
+
+        generations = [first_generation]
+        for _ in range(KEPT_GENERATIONS + 1):
+            manifest = load_manifest(manifest_file)
+            publish(manifest_file, manifest, manifest['staging'])
+            generations.append(load_manifest(manifest_file)['generation'])
+
+        # Generations that were replaced recently may still be used by running processes
+        assert sorted(os.listdir(generations_dir)) == sorted(os.path.basename(g) for g in generations)
+        assert os.path.isfile(os.path.join(generations[-1], 'pkg', 'foo.so'))
+
+    def test_stale_generations(self, tmp_path):
+        _, manifest_file = create_project(tmp_path)
+        generations_dir = os.path.dirname(load_manifest(manifest_file)['generation'])
+        shutil.rmtree(generations_dir)
+        os.makedirs(generations_dir)
+
+        # Every generation was replaced by the next one two days later
+        start = time.time_ns() - (2 * (KEPT_GENERATIONS + 1) + 1) * 86400 * 1_000_000_000
+        old_generations = [f'{start + i * 2 * 86400 * 1_000_000_000:x}' for i in range(KEPT_GENERATIONS + 1)]
+        for old_generation in old_generations:
+            os.makedirs(os.path.join(generations_dir, old_generation))
+
+        manifest = load_manifest(manifest_file)
+        publish(manifest_file, manifest, manifest['staging'])
+
+        assert sorted(os.listdir(generations_dir)) == sorted(
+            [*old_generations[-(KEPT_GENERATIONS - 1) :], os.path.basename(load_manifest(manifest_file)['generation'])]
+        )
+
+
+class TestRecompile:
+    def test_disabled(self, tmp_path):
+        _, manifest_file = create_project(tmp_path)
+
+        assert recompile(manifest_file) is False
+
+    def test_success(self, tmp_path):
+        script = tmp_path / 'recompile.py'
+        script.write_text(RECOMPILE_SCRIPT)
+        project_dir, manifest_file = create_project(
+            tmp_path, recompile_command={'command': [str(script), 'pkg/foo.so'], 'environment': {}}
+        )
+        (project_dir / 'pkg' / 'foo.py').write_text('FOO = 2\n')
+        previous_generation = load_manifest(manifest_file)['generation']
+
+        assert recompile(manifest_file) is True
+
+        manifest = load_manifest(manifest_file)
+        assert manifest['generation'] != previous_generation
+        assert (tmp_path / 'staging' / 'pkg' / 'foo.py').read_text() == 'FOO = 2\n'
+        with open(os.path.join(manifest['generation'], 'pkg', 'foo.so'), encoding='utf-8') as f:
+            assert f.read() == 'recompiled'
+
+        assert EditableFinder(manifest_file, PACKAGES).find_spec('pkg.bar') is not None
+        assert not os.path.exists(os.path.join(os.path.dirname(manifest_file), 'recompile.lock'))
+
+    def test_failure(self, tmp_path):
+        project_dir, manifest_file = create_project(
+            tmp_path, recompile_command={'command': ['-c', 'raise SystemExit(1)'], 'environment': {}}
+        )
+        (project_dir / 'pkg' / 'foo.py').write_text('FOO = 2\n')
+        previous_manifest = load_manifest(manifest_file)
+
+        assert recompile(manifest_file) is False
+        assert load_manifest(manifest_file) == previous_manifest
+
+    def test_in_progress(self, tmp_path):
+        _, manifest_file = create_project(tmp_path, recompile_command={'command': ['-c', 'pass'], 'environment': {}})
+        lock_file = os.path.join(os.path.dirname(manifest_file), 'recompile.lock')
+        with open(lock_file, 'w', encoding='utf-8'):
+            pass
+
+        assert recompile(manifest_file) is False
+        assert os.path.isfile(lock_file)
+
+    def test_start(self, tmp_path, monkeypatch):
+        project_dir, manifest_file = create_project(
+            tmp_path, recompile_command={'command': ['-c', 'pass'], 'environment': {}}
+        )
+        (project_dir / 'pkg' / 'foo.py').write_text('FOO = 2\n')
+        commands = []
+        monkeypatch.setattr('subprocess.Popen', lambda command, **kwargs: commands.append(command))
+        finder = EditableFinder(manifest_file, PACKAGES)
+
+        assert finder.find_spec('pkg.foo').origin == str(project_dir / 'pkg' / 'foo.py')
+        assert finder.find_spec('pkg.bar').origin == str(project_dir / 'pkg' / 'bar.py')
+        assert finder.recompiling
+        assert len(commands) == 1
+        assert commands[0][0] == sys.executable
+        assert commands[0][-1] == manifest_file
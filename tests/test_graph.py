@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+from hatch_mypyc.graph import (
+    cluster,
+    get_dependencies,
+    get_dependents,
+    get_module_name,
+    get_strongly_connected_components,
+    get_transitive_dependencies,
+    parse_imports,
+    partition,
+)
+
+
+class TestModuleName:
+    def test_module(self):
+        assert get_module_name('foo/bar.py') == 'foo.bar'
+
+    def test_package(self):
+        assert get_module_name('foo/bar/__init__.py') == 'foo.bar'
+
+    def test_package_source(self):
+        assert get_module_name('src/foo/bar.py', 'src') == 'foo.bar'
+
+
+class TestParseImports:
+    def test_absolute(self):
+        assert parse_imports(b'import foo.bar\nfrom baz import qux', 'pkg.mod', is_package=False) == {
+            'foo',
+            'foo.bar',
+            'baz',
+            'baz.qux',
+        }
+
+    def test_relative(self):
+        assert parse_imports(b'from . import foo\nfrom .bar import baz', 'pkg.mod', is_package=False) == {
+            'pkg',
+            'pkg.foo',
+            'pkg.bar',
+            'pkg.bar.baz',
+        }
+
+    def test_relative_from_package(self):
+        assert parse_imports(b'from .foo import bar', 'pkg', is_package=True) == {'pkg', 'pkg.foo', 'pkg.foo.bar'}
+
+    def test_relative_beyond_top_level(self):
+        assert parse_imports(b'from ... import foo', 'pkg.mod', is_package=False) == set()
+
+    def test_syntax_error(self):
+        assert parse_imports(b'import', 'pkg.mod', is_package=False) == set()
+
+
+def test_dependencies(tmp_path):
+    package_dir = tmp_path / 'src' / 'pkg'
+    package_dir.mkdir(parents=True)
+    (package_dir / '__init__.py').write_text('from .core import run', encoding='utf-8')
+    (package_dir / 'core.py').write_text('from pkg import utils\nimport os', encoding='utf-8')
+    (package_dir / 'utils.py').write_text('', encoding='utf-8')
+
+    paths = ['src/pkg/__init__.py', 'src/pkg/core.py', 'src/pkg/utils.py']
+    dependencies = get_dependencies(str(tmp_path), paths, 'src')
+    assert dependencies == {
+        'src/pkg/__init__.py': ['src/pkg/core.py'],
+        'src/pkg/core.py': ['src/pkg/__init__.py', 'src/pkg/utils.py'],
+        'src/pkg/utils.py': [],
+    }
+
+    # Unchanged entries are not parsed again
+    (package_dir / 'core.py').write_text('', encoding='utf-8')
+    assert get_dependencies(str(tmp_path), paths, 'src', dependencies, {'src/pkg/core.py'}) == dependencies
+
+
+def test_dependents():
+    dependencies = {'a.py': ['b.py'], 'b.py': ['c.py'], 'c.py': [], 'd.py': ['c.py'], 'e.py': []}
+
+    assert get_dependents(dependencies, {'c.py'}) == {'a.py', 'b.py', 'c.py', 'd.py'}
+    assert get_dependents(dependencies, {'b.py'}) == {'a.py', 'b.py'}
+    assert get_dependents(dependencies, {'e.py'}) == {'e.py'}
+
+
+def test_transitive_dependencies():
+    dependencies = {'a.py': ['b.py'], 'b.py': ['c.py', 'a.py'], 'c.py': [], 'd.py': ['c.py'], 'e.py': []}
+
+    assert get_transitive_dependencies(dependencies, {'a.py'}) == {'a.py', 'b.py', 'c.py'}
+    assert get_transitive_dependencies(dependencies, {'d.py', 'e.py'}) == {'c.py', 'd.py', 'e.py'}
+
+
+def test_strongly_connected_components():
+    dependencies = {'a': ['b'], 'b': ['a', 'c'], 'c': [], 'd': ['c', 'e'], 'e': ['d'], 'f': ['f']}
+
+    assert get_strongly_connected_components(dependencies) == [['a', 'b'], ['c'], ['d', 'e'], ['f']]
+
+
+def test_strongly_connected_components_deep():
+    # Make sure that there is no recursion limit
+    dependencies = {f'{i}': [f'{i + 1}'] for i in range(5000)}
+    dependencies['5000'] = ['0']
+
+    assert get_strongly_connected_components(dependencies) == [sorted(dependencies)]
+
+
+class TestPartition:
+    def test_balanced(self):
+        components = [['a', 'b'], ['c'], ['d'], ['e']]
+        weights = {'a': 3, 'b': 3, 'c': 4, 'd': 1, 'e': 1}
+
+        assert partition(components, weights, 2) == [['a', 'b'], ['c', 'd', 'e']]
+
+    def test_fewer_components(self):
+        assert partition([['a'], ['b']], {'a': 1, 'b': 1}, 4) == [['a'], ['b']]
+
+
+class TestCluster:
+    def test_shared_core(self):
+        dependencies = {
+            'core.py': ['utils.py'],
+            'utils.py': [],
+            'plugin_a.py': ['core.py', 'plugin_a_helpers.py'],
+            'plugin_a_helpers.py': [],
+            'plugin_b.py': ['core.py'],
+            'cycle_a.py': ['cycle_b.py'],
+            'cycle_b.py': ['cycle_a.py'],
+        }
+
+        assert cluster(dependencies) == [
+            ['core.py', 'utils.py'],
+            ['cycle_a.py', 'cycle_b.py'],
+            ['plugin_a.py', 'plugin_a_helpers.py'],
+            ['plugin_b.py'],
+        ]
+
+    def test_no_core(self):
+        dependencies = {'a.py': ['b.py'], 'b.py': [], 'c.py': []}
+
+        assert cluster(dependencies) == [['a.py', 'b.py'], ['c.py']]
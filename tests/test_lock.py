@@ -0,0 +1,57 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+import os
+
+import pytest
+
+from hatch_mypyc.lock import FileLock, LockTimeoutError
+
+
+class TestFileLock:
+    def test_acquire(self, tmp_path):
+        lock_file = tmp_path / 'locks' / 'build.lock'
+        lock = FileLock(str(lock_file), 0)
+
+        with lock:
+            assert lock.locked
+            assert lock_file.is_file()
+
+        assert not lock.locked
+        assert lock_file.read_text() == ''
+
+    def test_reacquire(self, tmp_path):
+        lock_file = str(tmp_path / 'build.lock')
+        lock = FileLock(lock_file, 0)
+
+        lock.acquire()
+        lock.acquire()
+        lock.release()
+        lock.release()
+
+        with FileLock(lock_file, 0) as other_lock:
+            assert other_lock.locked
+
+    def test_timeout(self, tmp_path):
+        lock_file = str(tmp_path / 'build.lock')
+        messages = []
+
+        with FileLock(lock_file, 0):
+            other_lock = FileLock(lock_file, 0.3, interval=0.05)
+            with pytest.raises(LockTimeoutError, match=f'waiting for process {os.getpid()} on .+ to release the lock'):
+                other_lock.acquire(messages.append)
+
+        assert not other_lock.locked
+        assert len(messages) == 1
+        assert messages[0].startswith(f'Waiting for process {os.getpid()} on ')
+        assert messages[0].endswith(lock_file)
+
+        other_lock.acquire()
+        assert other_lock.locked
+        other_lock.release()
+
+    def test_unknown_holder(self, tmp_path):
+        lock_file = tmp_path / 'build.lock'
+        lock_file.write_text('foo')
+
+        assert FileLock(str(lock_file), 0).describe_holder() == 'another process'
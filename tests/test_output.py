@@ -0,0 +1,107 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+import json
+
+import pytest
+
+from hatch_mypyc.output import BuildOutput, is_compiler_command
+from hatch_mypyc.runner import PROGRESS_PREFIX
+
+
+class MockApp:
+    def __init__(self):
+        self.info = []
+        self.debug = []
+
+    def display_info(self, message=''):
+        self.info.append(message)
+
+    def display_debug(self, message='', level=1):
+        self.debug.append(message)
+
+
+def progress_line(phase, done, total):
+    return f'{PROGRESS_PREFIX}{json.dumps([phase, done, total])}\n'
+
+
+class TestBuildOutput:
+    def test_lines(self, tmp_path):
+        app = MockApp()
+        log_file = tmp_path / 'build.log'
+        with BuildOutput(app, str(log_file)) as output:
+            output.write('foo\nb')
+            output.write('ar\r\n')
+            output.write_line('baz\n')
+            output.write('unterminated')
+
+        assert app.info == ['foo', 'bar', 'baz', 'unterminated']
+        assert not app.debug
+        assert log_file.read_text(encoding='utf-8') == 'foo\nbar\nbaz\nunterminated\n'
+
+    def test_compiler_commands(self, tmp_path):
+        app = MockApp()
+        log_file = tmp_path / 'build.log'
+        with BuildOutput(app, str(log_file)) as output:
+            output.write_line("building 'my_app.fib' extension")
+            output.write_line('gcc -fPIC -c build/my_app/fib.c -o build/my_app/fib.o')
+            output.write_line('build/my_app/fib.c:1:1: warning: unused variable')
+
+        assert app.info == ["building 'my_app.fib' extension", 'build/my_app/fib.c:1:1: warning: unused variable']
+        assert app.debug == ['gcc -fPIC -c build/my_app/fib.c -o build/my_app/fib.o']
+        assert len(log_file.read_text(encoding='utf-8').splitlines()) == 3
+
+    def test_progress(self):
+        app = MockApp()
+        with BuildOutput(app) as output:
+            output.write_line(progress_line('type_checking', 1, 1))
+            for done in range(1, 101):
+                output.write_line(progress_line('c_compilation', done, 100))
+
+            output.write_line(progress_line('linking', 1, None))
+            output.write_line(progress_line('unknown', 1, 1))
+
+        assert not app.debug
+        assert app.info[0] == 'Mypyc progress: type checking done'
+        assert app.info[1:-1] == [f'Mypyc progress: {done}/100 C files compiled' for done in (1, *range(10, 101, 10))]
+        assert app.info[-1] == 'Mypyc progress: 1 extensions linked'
+
+    def test_error_output(self, tmp_path):
+        app = MockApp()
+        log_file = tmp_path / 'build.log'
+        with BuildOutput(app, str(log_file), max_lines=2) as output:
+            for i in range(5):
+                output.write_line(str(i))
+
+        assert output.get_error_output() == f'(3 lines of output were omitted, see {log_file} for all of it)\n3\n4'
+        assert log_file.read_text(encoding='utf-8').splitlines() == ['0', '1', '2', '3', '4']
+
+
+class TestIsCompilerCommand:
+    @pytest.mark.parametrize(
+        'line',
+        [
+            'gcc -shared build/fib.o -o build/fib.so',
+            'x86_64-linux-gnu-gcc-12 -c build/fib.c',
+            '/usr/bin/clang++ -c build/fib.c',
+            'ccache cc -c build/fib.c',
+            '"C:\\Program Files\\Microsoft Visual Studio\\bin\\cl.exe" /c build\\fib.c',
+            'link.exe /DLL build\\fib.obj',
+        ],
+    )
+    def test_match(self, line):
+        assert is_compiler_command(line)
+
+    @pytest.mark.parametrize(
+        'line',
+        [
+            'Parsed and typechecked in 0.855s',
+            'running build_ext',
+            "building 'my_app.fib' extension",
+            'copying build/fib.so -> my_app',
+            'my_app/fib.py:3: error: Incompatible return value type',
+            'gcc',
+        ],
+    )
+    def test_no_match(self, line):
+        assert not is_compiler_command(line)
@@ -0,0 +1,58 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+import sys
+
+import pytest
+
+from hatch_mypyc.pgo import get_compiler_family, get_generate_flags, get_use_flags, join_flags
+
+
+def create_compiler(directory, name, version):
+    compiler = directory / name
+    compiler.write_text(f'#!{sys.executable}\nprint({version!r})\n', encoding='utf-8')
+    compiler.chmod(0o755)
+
+    return compiler
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='Compilers are executable scripts')
+class TestCompilerFamily:
+    def test_gcc(self, tmp_path):
+        compiler = create_compiler(tmp_path, 'cc', 'cc (Debian 12.2.0-14) 12.2.0\nFree Software Foundation, Inc.')
+
+        assert get_compiler_family(f'{compiler} -pthread') == 'gcc'
+
+    def test_clang(self, tmp_path):
+        compiler = create_compiler(tmp_path, 'cc', 'Apple clang version 15.0.0 (clang-1500.1.0.2.5)')
+
+        assert get_compiler_family(str(compiler)) == 'clang'
+
+    def test_compiler_cache(self, tmp_path):
+        compiler = create_compiler(tmp_path, 'cc', 'Ubuntu clang version 18.1.3')
+
+        assert get_compiler_family(f'ccache {compiler}') == 'clang'
+
+    def test_unknown(self, tmp_path):
+        compiler = create_compiler(tmp_path, 'cc', 'Intel(R) oneAPI DPC++/C++ Compiler')
+
+        assert not get_compiler_family(str(compiler))
+
+    def test_missing(self, tmp_path):
+        assert not get_compiler_family(str(tmp_path / 'cc'))
+
+    def test_empty(self):
+        assert not get_compiler_family('')
+
+
+class TestFlags:
+    def test_gcc(self):
+        assert get_generate_flags('gcc', '/profiles')[0] == '-fprofile-generate=/profiles'
+        assert get_use_flags('gcc', '/profiles')[0] == '-fprofile-use=/profiles'
+
+    def test_clang(self, tmp_path):
+        assert get_generate_flags('clang', str(tmp_path)) == [f'-fprofile-generate={tmp_path}']
+        assert get_use_flags('clang', str(tmp_path))[0] == f'-fprofile-use={tmp_path / "default.profdata"}'
+
+    def test_join(self):
+        assert join_flags('-fprofile-use=/foo bar', '-O3') == "'-fprofile-use=/foo bar' -O3"
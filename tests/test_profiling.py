@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+import cProfile
+
+from hatch_mypyc.profiling import load_profile, rank_modules, select_modules
+
+
+def test_load_pstats(tmp_path):
+    module_file = tmp_path / 'site-packages' / 'my_app' / 'fib.py'
+    module_file.parent.mkdir(parents=True)
+    module_file.write_text(
+        """\
+def fib(n):
+    return n if n <= 1 else fib(n - 2) + fib(n - 1)
+""",
+        encoding='utf-8',
+    )
+    namespace = {}
+    exec(compile(module_file.read_text(encoding='utf-8'), str(module_file), 'exec'), namespace)  # noqa: S102
+
+    profiler = cProfile.Profile()
+    profiler.runcall(namespace['fib'], 15)
+    profile_file = tmp_path / 'profile.pstats'
+    profiler.dump_stats(str(profile_file))
+
+    times = load_profile(str(profile_file))
+    assert times[str(module_file)] > 0
+
+
+def test_load_collapsed_stacks(tmp_path):
+    profile_file = tmp_path / 'profile.txt'
+    profile_file.write_text(
+        """\
+<module> (app.py:1);main (/site-packages/my_app/cli.py:10) 5
+<module> (app.py:1);main (/site-packages/my_app/cli.py:10);fib (/site-packages/my_app/fib.py:2) 20
+<module> (app.py:1);fib (/site-packages/my_app/fib.py:2) 15
+""",
+        encoding='utf-8',
+    )
+
+    assert load_profile(str(profile_file)) == {'/site-packages/my_app/cli.py': 5, '/site-packages/my_app/fib.py': 35}
+
+
+def test_rank_modules():
+    times = {
+        '/venv/lib/python3.11/site-packages/my_app/fib.py': 3.0,
+        'C:\\venv\\Lib\\site-packages\\my_app\\cli.py': 1.0,
+        '/venv/lib/python3.11/site-packages/other/fib.py': 9.0,
+        '/usr/lib/python3.11/json/decoder.py': 5.0,
+    }
+    ranking = rank_modules(times, ['src/my_app/__init__.py', 'src/my_app/cli.py', 'src/my_app/fib.py'], 'src')
+
+    assert ranking == [['src/my_app/fib.py', 3.0], ['src/my_app/cli.py', 1.0], ['src/my_app/__init__.py', 0.0]]
+
+
+def test_select_modules():
+    ranking = [['a.py', 50.0], ['b.py', 30.0], ['c.py', 15.0], ['d.py', 5.0], ['e.py', 0.0]]
+    selection = select_modules(ranking, 200.0, 0.05, 2)
+
+    assert [module['selected'] for module in selection] == [True, True, False, False, False]
+    assert [module['reason'] for module in selection] == [
+        '',
+        '',
+        'not in top 2',
+        'below threshold of 5.00%',
+        'not in profile',
+    ]
+    assert selection[0]['share'] == 0.25
@@ -0,0 +1,181 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+import io
+import json
+import threading
+import zipfile
+
+import pytest
+
+from hatch_mypyc.remote import (
+    FileSystemBackend,
+    HTTPBackend,
+    RemoteCache,
+    RemoteCacheBackend,
+    RemoteCacheError,
+    get_backend,
+)
+
+
+def create_artifacts(root):
+    (root / 'pkg').mkdir(parents=True)
+    (root / 'pkg' / 'foo.so').write_bytes(b'foo')
+    (root / 'abc__mypyc.so').write_bytes(b'abc')
+    return ['pkg/foo.so', 'abc__mypyc.so']
+
+
+class MemoryBackend(RemoteCacheBackend):
+    def __init__(self, url='memory://', timeout=1):
+        super().__init__(url, timeout)
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, data):
+        self.entries[key] = data
+
+
+class TestGetBackend:
+    def test_path(self, tmp_path):
+        backend = get_backend(str(tmp_path))
+
+        assert isinstance(backend, FileSystemBackend)
+        assert backend.directory == str(tmp_path)
+
+    def test_file_url(self, tmp_path):
+        backend = get_backend(tmp_path.as_uri())
+
+        assert isinstance(backend, FileSystemBackend)
+        assert backend.directory == str(tmp_path)
+
+    def test_http(self):
+        backend = get_backend('https://cache.example.com/mypyc', 5)
+
+        assert isinstance(backend, HTTPBackend)
+        assert backend.timeout == 5
+
+    def test_unknown_scheme(self):
+        with pytest.raises(RemoteCacheError, match='Unknown remote cache scheme: foo'):
+            get_backend('foo://bar')
+
+
+class TestFileSystemBackend:
+    def test_round_trip(self, tmp_path):
+        backend = FileSystemBackend(str(tmp_path / 'cache'), 1)
+
+        assert backend.get('abcdef') is None
+
+        backend.put('abcdef', b'data')
+        assert backend.get('abcdef') == b'data'
+        assert (tmp_path / 'cache' / 'ab' / 'abcdef.zip').is_file()
+        assert not list((tmp_path / 'cache' / 'ab').glob('*.tmp'))
+
+
+class TestHTTPBackend:
+    def test_round_trip(self, remote_cache_server, monkeypatch):
+        monkeypatch.setenv('HATCH_MYPYC_REMOTE_CACHE_TOKEN', 'secret')
+        backend = HTTPBackend(remote_cache_server.url, 5)
+
+        assert backend.get('abcdef') is None
+
+        backend.put('abcdef', b'data')
+        assert backend.get('abcdef') == b'data'
+        assert remote_cache_server.requests == [
+            ('GET', '/cache/abcdef.zip', 'Bearer secret'),
+            ('PUT', '/cache/abcdef.zip', 'Bearer secret'),
+            ('GET', '/cache/abcdef.zip', 'Bearer secret'),
+        ]
+
+    def test_error(self, remote_cache_server):
+        remote_cache_server.status = 500
+        backend = HTTPBackend(remote_cache_server.url, 5)
+
+        with pytest.raises(RemoteCacheError, match=r'Reading `abcdef` from .+ failed with HTTP status 500'):
+            backend.get('abcdef')
+
+        with pytest.raises(RemoteCacheError, match=r'Writing `abcdef` to .+ failed with HTTP status 500'):
+            backend.put('abcdef', b'data')
+
+    def test_unreachable(self, remote_cache_server):
+        url = remote_cache_server.url
+        remote_cache_server.shutdown()
+        remote_cache_server.server_close()
+
+        with pytest.raises(OSError):
+            HTTPBackend(url, 5).get('abcdef')
+
+
+class TestRemoteCache:
+    def test_round_trip(self, tmp_path, remote_cache_server):
+        artifacts = create_artifacts(tmp_path / 'build')
+        remote_cache = RemoteCache(HTTPBackend(remote_cache_server.url, 5))
+
+        assert remote_cache.restore('abcdef', str(tmp_path / 'other')) is None
+
+        remote_cache.store_async('abcdef', str(tmp_path / 'build'), artifacts)
+        assert remote_cache.wait(5) == 0
+        assert not remote_cache.errors
+
+        assert remote_cache.restore('abcdef', str(tmp_path / 'other')) == artifacts
+        assert (tmp_path / 'other' / 'pkg' / 'foo.so').read_bytes() == b'foo'
+        assert (tmp_path / 'other' / 'abc__mypyc.so').read_bytes() == b'abc'
+
+    def test_upload_error(self, tmp_path, remote_cache_server):
+        remote_cache_server.status = 403
+        artifacts = create_artifacts(tmp_path / 'build')
+        remote_cache = RemoteCache(HTTPBackend(remote_cache_server.url, 5))
+
+        remote_cache.store_async('abcdef', str(tmp_path / 'build'), artifacts)
+        assert remote_cache.wait(5) == 0
+        assert remote_cache.errors == [
+            f'RemoteCacheError: Writing `abcdef` to {remote_cache_server.url} failed with HTTP status 403'
+        ]
+
+    def test_upload_timeout(self, tmp_path):
+        uploading = threading.Event()
+
+        class SlowBackend(MemoryBackend):
+            def put(self, key, data):
+                uploading.wait(5)
+                super().put(key, data)
+
+        artifacts = create_artifacts(tmp_path / 'build')
+        remote_cache = RemoteCache(SlowBackend())
+
+        remote_cache.store_async('abcdef', str(tmp_path / 'build'), artifacts)
+        assert remote_cache.wait(0.1) == 1
+
+        uploading.set()
+        assert remote_cache.wait(5) == 0
+        assert 'abcdef' in remote_cache.backend.entries
+
+    def test_corrupt_entry(self, tmp_path):
+        backend = MemoryBackend()
+        backend.entries['abcdef'] = b'foo'
+
+        with pytest.raises(zipfile.BadZipFile):
+            RemoteCache(backend).restore('abcdef', str(tmp_path))
+
+        assert not list(tmp_path.iterdir())
+
+    def test_path_outside_of_root(self, tmp_path):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('manifest.json', json.dumps({'files': ['pkg/foo.so', '../evil.so']}))
+            archive.writestr('artifacts/pkg/foo.so', b'foo')
+            archive.writestr('artifacts/../evil.so', b'evil')
+
+        backend = MemoryBackend()
+        backend.entries['abcdef'] = buffer.getvalue()
+        root = tmp_path / 'root'
+        root.mkdir()
+
+        with pytest.raises(
+            RemoteCacheError, match=r'Invalid artifact path in remote cache entry `abcdef`: \.\./evil\.so'
+        ):
+            RemoteCache(backend).restore('abcdef', str(root))
+
+        assert not list(root.iterdir())
+        assert not (tmp_path / 'evil.so').exists()
@@ -0,0 +1,67 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+from hatch_mypyc.runner import BuildStats, get_wall_time
+
+
+class TestWallTime:
+    def test_empty(self):
+        assert get_wall_time([]) == 0
+
+    def test_sequential(self):
+        assert get_wall_time([(3, 4), (0, 1)]) == 2
+
+    def test_overlapping(self):
+        assert get_wall_time([(0, 2), (1, 3), (2.5, 4), (5, 6)]) == 5
+
+
+class TestBuildStats:
+    def test_module_names(self, tmp_path):
+        stats = BuildStats(str(tmp_path))
+        stats.record('c_compilation', 0, 1, 0.5, None, name=stats.get_name(str(tmp_path / 'pkg' / 'mod.c')))
+        stats.record('c_compilation', 0.5, 2, None, 100, name=stats.get_name(str(tmp_path / 'pkg' / 'mod.c')))
+
+        data = stats.as_dict()
+        assert data['compiled_files'] == 2
+        assert data['compile_time'] == 2
+        assert data['phases'] == {'c_compilation': {'wall_time': 2, 'cpu_time': 0.5, 'peak_rss': 100}}
+        assert data['modules'] == {'c_compilation': {'pkg/mod.c': 2.5}}
+
+    def test_progress(self):
+        stats = BuildStats()
+        events = [
+            (2, 1.5, 10, 'Parsed and typechecked in 2.000s'),
+            (3, 2.5, 20, 'Compiling foo'),
+            (5, 4.5, 30, 'Compiling bar, baz'),
+            (6, 5.5, 40, 'Compiled to C in 4.000s'),
+        ]
+        stats.record_progress(0, 0, 7, events)
+
+        data = stats.as_dict()
+        assert data['phases']['type_checking']['wall_time'] == 2
+        assert data['phases']['type_checking']['cpu_time'] == 1.5
+        assert data['phases']['type_checking']['peak_rss'] == 10
+        assert data['phases']['code_generation']['wall_time'] == 5
+        assert data['modules'] == {'code_generation': {'bar, baz': 1, 'foo': 2}}
+
+    def test_progress_unavailable(self):
+        stats = BuildStats()
+        stats.record_progress(0, 0, 7, [])
+
+        data = stats.as_dict()
+        assert list(data['phases']) == ['type_checking']
+        assert data['phases']['type_checking']['wall_time'] == 7
+
+    def test_merge(self):
+        child = BuildStats()
+        child.record('linking', 0, 1, 1, 10, name='foo.so')
+
+        stats = BuildStats()
+        stats.record('linking', 0, 2, 1, 20, name='foo.so')
+        stats.record('file_selection', 0, 1, 1, 5)
+        stats.merge(child.as_dict())
+
+        data = stats.as_dict()
+        assert list(data['phases']) == ['file_selection', 'linking']
+        assert data['phases']['linking'] == {'wall_time': 3, 'cpu_time': 2, 'peak_rss': 20}
+        assert data['modules'] == {'linking': {'foo.so': 3}}
@@ -0,0 +1,80 @@
+# SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
+#
+# SPDX-License-Identifier: MIT
+import pathspec
+import pytest
+
+from hatch_mypyc.selection import FileMatcher, GitIgnorePattern, PatternMatcher
+
+PATHS = [
+    'my_app/__init__.py',
+    'my_app/core/utils.py',
+    'my_app/plugins/foo/__init__.py',
+    'my_app/plugins/foo_test.py',
+    'tests/test_foo.py',
+    'foo/bar.py',
+    'bar/foo/baz.py',
+]
+
+
+class TestPatternMatcher:
+    @pytest.mark.parametrize(
+        'patterns',
+        [
+            ['my_app/'],
+            ['*_test.py', 'tests'],
+            ['/foo/*.py'],
+            ['my_app/**/foo', '# comment'],
+            ['my_app/', '!my_app/core/'],
+        ],
+    )
+    def test_same_as_pathspec(self, patterns):
+        matcher = PatternMatcher(patterns)
+        spec = pathspec.PathSpec.from_lines(GitIgnorePattern, patterns)
+
+        assert [matcher.match_file(path) for path in PATHS] == [spec.match_file(path) for path in PATHS]
+
+    def test_directory(self):
+        matcher = PatternMatcher(['my_app/plugins/', '*.py'])
+
+        assert matcher.match_directory('my_app/plugins')
+        assert matcher.match_directory('my_app/plugins/foo')
+        assert not matcher.match_directory('my_app/core')
+
+    def test_directory_negation(self):
+        matcher = PatternMatcher(['my_app/', '!my_app/core/'])
+
+        assert not matcher.match_directory('my_app')
+
+    def test_no_patterns(self):
+        matcher = PatternMatcher([])
+
+        assert not matcher.match_file('foo.py')
+        assert not matcher.match_directory('foo')
+
+
+class TestFileMatcher:
+    def test_include_and_exclude(self):
+        matcher = FileMatcher(['my_app/', '/foo/'], ['*_test.py', 'my_app/plugins/foo/'])
+
+        assert [path for path in PATHS if matcher.match_file(path)] == [
+            'my_app/__init__.py',
+            'my_app/core/utils.py',
+            'foo/bar.py',
+        ]
+
+    def test_no_include(self):
+        matcher = FileMatcher([], ['tests/'])
+
+        assert [path for path in PATHS if matcher.match_file(path)] == [
+            path for path in PATHS if not path.startswith('tests/')
+        ]
+
+    def test_directories_are_remembered(self):
+        matcher = FileMatcher(['my_app/'], ['my_app/plugins/'])
+        for path in PATHS:
+            matcher.match_file(path)
+
+        assert matcher.directories['my_app/plugins/foo'] == (True, True)
+        assert matcher.directories['my_app/core'] == (True, False)
+        assert matcher.directories['bar/foo'] == (False, False)
@@ -1,119 +1,55 @@
 # SPDX-FileCopyrightText: 2021-present Ofek Lev <oss@ofek.dev>
 #
 # SPDX-License-Identifier: MIT
-from hatch_mypyc.utils import construct_setup_file
-
-
-class TestConstructSetupFile:
-    def test_no_arguments(self):
-        assert (
-            construct_setup_file([], opt_level='3')
-            == """\
-from setuptools import setup
-from mypyc.build import mypycify
-
-setup(
-    name='mypyc_output',
-    ext_modules=mypycify(
-        [
-        ],
-        opt_level='3',
-    ),
+from hatch_mypyc.utils import (
+    format_duration,
+    format_table,
+    get_cgroup_cpu_quota,
+    get_cpu_count,
 )
-"""
-        )
-
-    def test_one_argument(self):
-        assert (
-            construct_setup_file([], 'foo', opt_level='3')
-            == """\
-from setuptools import setup
-from mypyc.build import mypycify
-
-setup(
-    name='mypyc_output',
-    ext_modules=mypycify(
-        [
-            'foo',
-        ],
-        opt_level='3',
-    ),
-)
-"""
-        )
-
-    def test_multiple_arguments(self):
-        assert (
-            construct_setup_file([], 'foo', 'bar', opt_level='3')
-            == """\
-from setuptools import setup
-from mypyc.build import mypycify
-
-setup(
-    name='mypyc_output',
-    ext_modules=mypycify(
-        [
-            'foo',
-            'bar',
-        ],
-        opt_level='3',
-    ),
-)
-"""
-        )
-
-    def test_no_options(self):
-        assert (
-            construct_setup_file([], 'foo', 'bar')
-            == """\
-from setuptools import setup
-from mypyc.build import mypycify
-
-setup(
-    name='mypyc_output',
-    ext_modules=mypycify(
-        [
-            'foo',
-            'bar',
-        ],
-    ),
-)
-"""
-        )
-
-    def test_packages_root(self):
-        assert (
-            construct_setup_file('', 'foo')
-            == """\
-from setuptools import setup
-from mypyc.build import mypycify
-
-setup(
-    name='mypyc_output',
-    ext_modules=mypycify(
-        [
-            'foo',
-        ],
-    ),
-)
-"""
-        )
-
-    def test_packages_source(self):
-        assert (
-            construct_setup_file('src', 'foo')
-            == """\
-from setuptools import setup
-from mypyc.build import mypycify
-
-setup(
-    name='mypyc_output',
-    ext_modules=mypycify(
-        [
-            'foo',
-        ],
-    ),
-    package_dir={'': 'src'},
-)
-"""
-        )
+
+
+class TestCgroupCpuQuota:
+    def test_none(self, tmp_path):
+        assert get_cgroup_cpu_quota(str(tmp_path)) is None
+
+    def test_v2(self, tmp_path):
+        (tmp_path / 'cpu.max').write_text('250000 100000\n', encoding='utf-8')
+
+        assert get_cgroup_cpu_quota(str(tmp_path)) == 3
+
+    def test_v2_unlimited(self, tmp_path):
+        (tmp_path / 'cpu.max').write_text('max 100000\n', encoding='utf-8')
+
+        assert get_cgroup_cpu_quota(str(tmp_path)) is None
+
+    def test_v1(self, tmp_path):
+        controller_dir = tmp_path / 'cpu,cpuacct'
+        controller_dir.mkdir()
+        (controller_dir / 'cpu.cfs_quota_us').write_text('50000\n', encoding='utf-8')
+        (controller_dir / 'cpu.cfs_period_us').write_text('100000\n', encoding='utf-8')
+
+        assert get_cgroup_cpu_quota(str(tmp_path)) == 1
+
+    def test_v1_unlimited(self, tmp_path):
+        controller_dir = tmp_path / 'cpu'
+        controller_dir.mkdir()
+        (controller_dir / 'cpu.cfs_quota_us').write_text('-1\n', encoding='utf-8')
+        (controller_dir / 'cpu.cfs_period_us').write_text('100000\n', encoding='utf-8')
+
+        assert get_cgroup_cpu_quota(str(tmp_path)) is None
+
+
+def test_cpu_count():
+    assert get_cpu_count() >= 1
+
+
+def test_format_duration():
+    assert format_duration(2.5) == '2.5 s'
+    assert format_duration(0.0123) == '12.3 ms'
+    assert format_duration(0.0000456) == '45.6 us'
+    assert format_duration(0.0000000789) == '78.9 ns'
+
+
+def test_format_table():
+    assert format_table([['a', 'bb', 'c'], ['ddd', 'e', 'f']]) == 'a    bb  c\nddd  e   f'
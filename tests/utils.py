@@ -12,3 +12,5 @@ def build_project(*args):
     process = subprocess.run([sys.executable, '-m', 'build', *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
     if process.returncode:  # no cov
         raise Exception(process.stdout.decode('utf-8'))
+
+    return process.stdout.decode('utf-8')